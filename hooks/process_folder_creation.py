@@ -14,15 +14,14 @@ I/O Hook which creates folders on disk.
 """
 
 from tank import Hook
-import os
-import sys
-import shutil
+from tank.folder import FolderIOExecutor
 
 class ProcessFolderCreation(Hook):
     
     def execute(self, items, preview_mode, **kwargs):
         """
         The default implementation creates folders recursively using open permissions.
+        Folders of the same depth, files and symbolic links are created concurrently.
         
         This hook should return a list of created items.
         
@@ -95,97 +94,22 @@ class ProcessFolderCreation(Hook):
         * "target": the target to which the symbolic link should point
         """
         
-        # set the umask so that we get true permissions
-        old_umask = os.umask(0)
-        folders = []
-        try:
-
-            # loop through our list of items
-            for i in items:
-                
-                action = i.get("action")
-                
-                if action in ["entity_folder", "folder"]:
-                    # folder creation
-                    path = i.get("path")    
-                    if not os.path.exists(path):
-                        if not preview_mode:
-                            # create the folder using open permissions
-                            os.makedirs(path, 0777)
-                        folders.append(path)
-                        
-                elif action == "remote_entity_folder":
-                    # Remote folder creation
-                    #
-                    # NOTE! This action happens when another user has created
-                    # a folder on their machine and we are syncing our local path 
-                    # cache to be aware of this folder's existance.
-                    # 
-                    # For a traditional setup, where the project storage is shared,
-                    # there is no need to do I/O for remote folders - these folders
-                    # have already been created on the remote storage so you have access
-                    # to them already. 
-                    # 
-                    # On a setup where each user or group of users is attached to
-                    # different, independendent file storages, which are synced, 
-                    # it may be meaningful to "replay" the remote folder creation
-                    # on the local system. This would result in the same folder
-                    # scaffold on each disk which is storing project data.
-                    # 
-                    # path = i.get("path")    
-                    # if not os.path.exists(path):
-                    #     if not preview_mode:
-                    #         # create the folder using open permissions
-                    #         os.makedirs(path, 0777)
-                    #     folders.append(path)
-                    pass
-                
-                elif action == "symlink":
-                    # symbolic link
-                    if sys.platform == "win32":
-                        # no windows support
-                        continue
-                    path = i.get("path")
-                    target = i.get("target")
-                    # note use of lexists to check existance of symlink
-                    # rather than what symlink is pointing at
-                    if not os.path.lexists(path):
-                        if not preview_mode:
-                            os.symlink(target, path)
-                        folders.append(path)
-
-                elif action == "copy":
-                    # a file copy
-                    source_path = i.get("source_path")
-                    target_path = i.get("target_path")
-                    if not os.path.exists(target_path):
-                        if not preview_mode:
-                            # do a standard file copy
-                            shutil.copy(source_path, target_path)
-                            # set permissions to open
-                            os.chmod(target_path, 0666)
-                        folders.append(target_path)
-    
-                elif action == "create_file":
-                    # create a new file based on content
-                    path = i.get("path")
-                    parent_folder = os.path.dirname(path)
-                    content = i.get("content")
-                    if not os.path.exists(parent_folder) and not preview_mode:
-                        os.makedirs(parent_folder, 0777)
-                    if not os.path.exists(path):
-                        if not preview_mode:
-                            # create the file
-                            fp = open(path, "wb")
-                            fp.write(content)
-                            fp.close()
-                            # and set permissions to open
-                            os.chmod(path, 0666)
-                        folders.append(path)
-                    
-        
-        finally:
-            # reset umask
-            os.umask(old_umask)
-
-        return folders
+        # the I/O is carried out concurrently by the core, using open permissions.
+        #
+        # NOTE! Remote entity folder items are ignored. This action happens when
+        # another user has created a folder on their machine and we are syncing our
+        # local path cache to be aware of this folder's existance.
+        #
+        # For a traditional setup, where the project storage is shared,
+        # there is no need to do I/O for remote folders - these folders
+        # have already been created on the remote storage so you have access
+        # to them already.
+        #
+        # On a setup where each user or group of users is attached to
+        # different, independendent file storages, which are synced,
+        # it may be meaningful to "replay" the remote folder creation
+        # on the local system. This would result in the same folder
+        # scaffold on each disk which is storing project data. To do so,
+        # pass these items on as "entity_folder" items.
+        executor = FolderIOExecutor(preview_mode, folder_permissions=0777, file_permissions=0666)
+        return executor.execute(items)
@@ -13,14 +13,14 @@ Classes for the main Sgtk API.
 """
 
 import os
-import glob
 
 from . import folder
 from . import context
 from .util import shotgun, yaml_cache
 from .errors import TankError, TankMultipleMatchingTemplatesError
 from .path_cache import PathCache
-from .template import read_templates
+from .template import read_templates, TemplateIndex
+from .template_path_scanner import TemplatePathScanner
 from . import constants
 from .util import log_user_activity_metric
 from . import pipelineconfig
@@ -59,6 +59,12 @@ class Sgtk(object):
         except TankError, e:
             raise TankError("Could not read templates configuration: %s" % e)
 
+        # index used to speed up template_from_path lookups
+        self.__template_index = TemplateIndex(self.templates)
+
+        # contexts resolved by context_from_path
+        self.__context_cache = context.PathContextCache()
+
         # execute a tank_init hook for developers to use.
         self.execute_core_hook(constants.TANK_INIT_HOOK_NAME)
 
@@ -80,6 +86,18 @@ class Sgtk(object):
         """
         return self.__pipeline_config
 
+    @property
+    def context_cache(self):
+        """
+        Cache of contexts resolved by :meth:`context_from_path`. Its
+        ``hits`` and ``misses`` attributes can be used to check how
+        effective the cache is.
+
+        Internal Use Only - We provide no guarantees that this method
+        will be backwards compatible.
+        """
+        return self.__context_cache
+
     def execute_core_hook(self, hook_name, **kwargs):
         """
         Executes a core level hook, passing it any keyword arguments supplied.
@@ -269,6 +287,8 @@ class Sgtk(object):
         except TankError, e:
             raise TankError("Templates could not be reloaded: %s" % e)
 
+        self.__template_index = TemplateIndex(self.templates)
+
     def list_commands(self):
         """
         Lists the system commands registered with the system.
@@ -322,8 +342,13 @@ class Sgtk(object):
         :param path: Path to match against a template
         :returns: :class:`TemplatePath` or None if no match could be found.
         """
+        # the templates dictionary is public and may have been
+        # replaced or modified since the index was last built.
+        if not self.__template_index.is_current(self.templates):
+            self.__template_index = TemplateIndex(self.templates)
+
         matched_templates = []
-        for key, template in self.templates.items():
+        for template in self.__template_index.get_candidates(path):
             if template.validate(path):
                 matched_templates.append(template)
 
@@ -393,6 +418,45 @@ class Sgtk(object):
         :returns: Matching file paths
         :rtype: List of strings.
         """
+        return list(
+            self.iter_paths_from_template(template, fields, skip_keys, skip_missing_optional_keys)
+        )
+
+    def iter_paths_from_template(self, template, fields, skip_keys=None,
+                                 skip_missing_optional_keys=False, limit=None):
+        """
+        Iterates over the paths that match a template using field values passed.
+
+        Works exactly like :meth:`paths_from_template`, but yields each matching path
+        as soon as it is found on disk rather than returning them all once the
+        file system has been fully scanned. This allows a user interface to show
+        partial results while a large number of files is being scanned.
+
+        The scan stops when the caller stops iterating or when ``limit``
+        paths have been returned::
+
+            >>> for path in tk.iter_paths_from_template(maya_work, {"Sequence": "AAA"}, limit=2):
+            ...     print path
+            /studio/my_proj/sequences/AAA/001/work/background.v001.ma
+            /studio/my_proj/sequences/AAA/001/work/background.v002.ma
+
+        .. note:: The paths are not returned in any particular order.
+
+        :param template: Template against whom to match.
+        :type  template: :class:`TemplatePath`
+        :param fields: Fields and values to use.
+        :type  fields: Dictionary
+        :param skip_keys: Keys whose values should be ignored from the fields parameter.
+        :type  skip_keys: List of key names
+        :param skip_missing_optional_keys: Specify if optional keys should be skipped if they
+                                        aren't found in the fields collection
+        :param limit: Optional maximum number of paths to return.
+        :type  limit: int
+        :returns: Generator of matching file paths.
+        """
+        if limit is not None and limit <= 0:
+            return
+
         skip_keys = skip_keys or []
         if isinstance(skip_keys, basestring):
             skip_keys = [skip_keys]
@@ -410,6 +474,7 @@ class Sgtk(object):
         # iterate for each set of keys in the template:
         found_files = set()
         globs_searched = set()
+        scanner = TemplatePathScanner(template)
         for keys in template._keys:
             # create fields and skip keys with those that 
             # are relevant for this key set:
@@ -442,9 +507,13 @@ class Sgtk(object):
             globs_searched.add(glob_str)
             
             # Find all files which are valid for this key set
-            found_files.update([found_file for found_file in glob.iglob(glob_str) if template.validate(found_file)])
-                    
-        return list(found_files) 
+            for found_file in scanner.scan(glob_str):
+                if found_file in found_files or not template.validate(found_file):
+                    continue
+                found_files.add(found_file)
+                yield found_file
+                if limit is not None and len(found_files) >= limit:
+                    return
 
 
     def abstract_paths_from_template(self, template, fields):
@@ -503,6 +572,31 @@ class Sgtk(object):
         :returns: A list of paths whose abstract keys use their abstract(default) value unless
                   a value is specified for them in the fields parameter.
         """
+        return list(self.iter_abstract_paths_from_template(template, fields))
+
+    def iter_abstract_paths_from_template(self, template, fields, limit=None):
+        """
+        Iterates over the abstract paths based on a template.
+
+        Works exactly like :meth:`abstract_paths_from_template`, but yields each
+        abstract path as soon as a first file collapsing to it is found on disk.
+        The scan stops when the caller stops iterating or when ``limit`` abstract
+        paths have been returned.
+
+        .. note:: The paths are not returned in any particular order.
+
+        :param template: Template with which to search
+        :type  template: :class:`TemplatePath`
+        :param fields: Mapping of keys to values with which to assemble the abstract path.
+        :type fields: dictionary
+        :param limit: Optional maximum number of abstract paths to return.
+        :type  limit: int
+        :returns: Generator of paths whose abstract keys use their abstract(default) value
+                  unless a value is specified for them in the fields parameter.
+        """
+        if limit is not None and limit <= 0:
+            return
+
         search_template = template
 
         # the logic is as follows:
@@ -532,7 +626,7 @@ class Sgtk(object):
             search_template = template.parent
 
         # now carry out a regular search based on the template
-        found_files = self.paths_from_template(search_template, fields)
+        found_files = self.iter_paths_from_template(search_template, fields)
 
         st_abstract_key_names = [k.name for k in search_template.keys.values() if k.is_abstract]
 
@@ -565,9 +659,12 @@ class Sgtk(object):
 
             # now we have all the fields we need to compose the full template
             abstract_path = template.apply_fields(cur_fields)
+            if abstract_path in abstract_paths:
+                continue
             abstract_paths.add(abstract_path)
-
-        return list(abstract_paths)
+            yield abstract_path
+            if limit is not None and len(abstract_paths) >= limit:
+                return
 
 
     def paths_from_entity(self, entity_type, entity_id):
@@ -629,7 +726,7 @@ class Sgtk(object):
         :type previous_context: :class:`Context`
         :returns: :class:`Context`
         """
-        return context.from_path(self, path, previous_context)
+        return context.from_path(self, path, previous_context, self.__context_cache)
 
     def context_from_entity(self, entity_type, entity_id):
         """
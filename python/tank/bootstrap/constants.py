@@ -15,6 +15,9 @@ PIPELINE_CONFIGURATION_ENTITY_TYPE = "PipelineConfiguration"
 # the manifest file inside a bundle
 BUNDLE_METADATA_FILE = "info.yml"
 
+# maximum number of bundles downloaded at the same time during bootstrap
+MAX_CONCURRENT_BUNDLE_DOWNLOADS = 4
+
 # the generation of the logic that handles cloud based deploy.
 # if major changes happen to the way cloud based configs are handled
 # by the system, for example requiring any existing deployed cloud
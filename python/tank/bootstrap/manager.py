@@ -15,6 +15,7 @@ from .errors import TankBootstrapError
 from .configuration import Configuration
 from .resolver import ConfigurationResolver
 from ..authentication import ShotgunAuthenticator
+from ..util import thread_pool
 from .. import LogManager
 
 log = LogManager.get_logger(__name__)
@@ -692,21 +693,99 @@ class ToolkitManager(object):
             for framework in env_obj.get_frameworks():
                 descriptors.append(env_obj.get_framework_descriptor(framework))
 
-        # pass 2 - download all apps
+        # the same bundle is typically used in several environments
+        unique_descriptors = []
+        uris = set()
+        for descriptor in descriptors:
+            uri = descriptor.get_uri()
+            if uri not in uris:
+                uris.add(uri)
+                unique_descriptors.append(descriptor)
+        descriptors = unique_descriptors
+
+        # pass 2 - find the bundles which are not cached yet
+        missing_descriptors = []
         for idx, descriptor in enumerate(descriptors):
 
-            # Scale the progress step 0.3 between this value 0.4 and the next one 0.7
-            # to compute a value progressing while looping over the indexes.
-            progress_value = 0.4 + idx * (0.3 / len(descriptors))
-
             if not descriptor.exists_local():
-                message = "Downloading %s (%s of %s)..." % (descriptor, idx+1, len(descriptors))
-                self._report_progress(progress_callback, progress_value, message)
-                descriptor.download_local()
+                missing_descriptors.append(descriptor)
             else:
+                # Scale the progress step 0.3 between this value 0.4 and the next one 0.7
+                # to compute a value progressing while looping over the indexes.
+                progress_value = 0.4 + (idx - len(missing_descriptors)) * (0.3 / len(descriptors))
                 message = "Checking %s (%s of %s)." % (descriptor, idx+1, len(descriptors))
                 self._report_progress(progress_callback, progress_value, message)
 
+        # pass 3 - download all missing bundles
+        if missing_descriptors:
+            self._download_bundles(
+                missing_descriptors,
+                len(descriptors) - len(missing_descriptors),
+                len(descriptors),
+                progress_callback
+            )
+
+    def _download_bundles(self, descriptors, num_completed, num_total, progress_callback):
+        """
+        Downloads bundles concurrently.
+
+        Downloads are carried out by a pool of at most ``constants.MAX_CONCURRENT_BUNDLE_DOWNLOADS``
+        threads. Bundles which don't support concurrent downloads are downloaded by the calling
+        thread first. Progress is reported from the calling thread as downloads complete.
+        All downloads are attempted even if some of them fail.
+
+        :param descriptors: List of descriptors to download.
+        :param num_completed: Number of bundles already processed, used to report progress.
+        :param num_total: Total number of bundles to process, used to report progress.
+        :param progress_callback: Callback function that reports back on the engine startup progress.
+        :raises: The original error if a single download failed, :class:`TankBootstrapError`
+                 listing all the errors if several downloads failed.
+        """
+        log.debug("Downloading %d bundles..." % len(descriptors))
+
+        message = "Downloading %s..." % (
+            descriptors[0] if len(descriptors) == 1 else "%d bundles" % len(descriptors)
+        )
+        self._report_progress(progress_callback, 0.4 + num_completed * (0.3 / num_total), message)
+
+        failures = []
+
+        def process_result(descriptor, exc_info, num_completed):
+            if exc_info:
+                log.error("Failed to download %s: %s" % (descriptor, exc_info[1]))
+                failures.append((descriptor, exc_info))
+                message = "Failed to download %s (%s of %s)." % (descriptor, num_completed, num_total)
+            else:
+                message = "Downloaded %s (%s of %s)." % (descriptor, num_completed, num_total)
+            self._report_progress(progress_callback, 0.4 + num_completed * (0.3 / num_total), message)
+
+        # Shotgun API instances can't be used by several threads at once, so bundles
+        # downloaded through the site connection are downloaded by this thread,
+        # before any worker starts.
+        serial_descriptors = [d for d in descriptors if not d.supports_concurrent_download()]
+        concurrent_descriptors = [d for d in descriptors if d.supports_concurrent_download()]
+
+        for (pool_descriptors, max_workers) in [
+            (serial_descriptors, 1),
+            (concurrent_descriptors, constants.MAX_CONCURRENT_BUNDLE_DOWNLOADS)
+        ]:
+            for (descriptor, _, exc_info) in thread_pool.imap_unordered(
+                lambda descriptor: descriptor.download_local(), pool_descriptors, max_workers
+            ):
+                num_completed += 1
+                process_result(descriptor, exc_info, num_completed)
+
+        if len(failures) == 1:
+            exc_info = failures[0][1]
+            raise exc_info[0], exc_info[1], exc_info[2]
+        elif failures:
+            raise TankBootstrapError(
+                "Failed to download %d bundles:\n%s" % (
+                    len(failures),
+                    "\n".join("%s: %s" % (descriptor, exc_info[1]) for (descriptor, exc_info) in failures)
+                )
+            )
+
     def _default_progress_callback(self, progress_value, message):
         """
         Default callback function that reports back on the toolkit and engine bootstrap progress.
@@ -15,11 +15,13 @@ import cPickle
 from .action_base import Action
 from ..errors import TankError
 from ..util import yaml_cache
+from ..config_snapshot import ConfigSnapshot
 
 class CacheYamlAction(Action):
     """
     Action that ensures that crawls a config, caching all YAML data found
-    to disk as pickled data.
+    to disk as pickled data, along with a snapshot of the resolved
+    configuration data.
     """
     def __init__(self):
         Action.__init__(
@@ -90,5 +92,10 @@ class CacheYamlAction(Action):
         except Exception, e:
             raise TankError("Unable to dump pickled cache data: %s" % e)
 
+        # also resolve the templates, roots and environments
+        # so they can be loaded without reading any yaml file.
+        log.debug("Writing config snapshot to %s" % root_dir)
+        ConfigSnapshot.build(self.tk.pipeline_configuration).write(root_dir)
+
         log.info("")
         log.info("Cache yaml completed!")
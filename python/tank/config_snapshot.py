@@ -0,0 +1,324 @@
+# Copyright (c) 2016 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Snapshot of the resolved configuration data of a pipeline configuration.
+
+Resolving the templates and environments of a configuration means reading
+and parsing every yaml file they include. A snapshot holds the result of this
+resolution for all of them in a single file, which is loaded in one read.
+It also holds the folder structure of the folder creation schema.
+"""
+
+from __future__ import with_statement
+
+import os
+import copy
+import uuid
+import cPickle as pickle
+
+from . import constants
+from .errors import TankError
+from .util import yaml_cache
+from .util.includes import resolve_include
+from .platform import environment_includes
+from . import template_includes
+from . import pipelineconfig_utils
+from . import LogManager
+
+log = LogManager.get_logger(__name__)
+
+# snapshot entry keys
+_ROOTS = "roots"
+_TEMPLATES = "templates"
+_ENVIRONMENT = "environment"
+_SCHEMA = "schema"
+
+
+class ConfigSnapshot(object):
+    """
+    Resolved templates, roots and environments of a pipeline configuration.
+
+    Each entry of the snapshot holds the size and modification time of all the
+    yaml files it was resolved from. An entry is ignored as soon as one of these
+    files changes, in which case the data is resolved from the yaml files again.
+
+    Snapshots are written by the ``tank cache_yaml`` command and loaded
+    by the pipeline configuration.
+    """
+
+    def __init__(self, entries=None):
+        """
+        :param entries: Dictionary of snapshot entries, indexed by key.
+        """
+        self._entries = entries or {}
+
+    @classmethod
+    def load(cls, pipeline_config_path):
+        """
+        Loads the snapshot of a pipeline configuration.
+
+        :param pipeline_config_path: Path to the root of a pipeline configuration.
+        :returns: :class:`ConfigSnapshot` or None if the configuration has no usable snapshot.
+        """
+        snapshot_path = os.path.join(pipeline_config_path, constants.CONFIG_SNAPSHOT_FILE)
+        if not os.path.exists(snapshot_path):
+            return None
+
+        try:
+            with open(snapshot_path, "rb") as fh:
+                content = pickle.load(fh)
+        except Exception, e:
+            log.warning("Could not read config snapshot %s: %s" % (snapshot_path, e))
+            return None
+
+        if not isinstance(content, dict) or content.get("version") != constants.CONFIG_SNAPSHOT_FORMAT_VERSION:
+            log.debug("Ignoring config snapshot %s written in a different format." % snapshot_path)
+            return None
+
+        log.debug("Read %d entries from config snapshot %s" % (len(content["entries"]), snapshot_path))
+        return cls(content["entries"])
+
+    @classmethod
+    def build(cls, pipeline_configuration):
+        """
+        Resolves the data of a pipeline configuration into a snapshot.
+
+        Environments and templates including files based on the context,
+        environment variables or the user's home folder can't be resolved
+        upfront and are left out of the snapshot.
+
+        :param pipeline_configuration: :class:`~sgtk.pipelineconfig.PipelineConfiguration` to snapshot.
+        :returns: :class:`ConfigSnapshot` instance.
+        """
+        snapshot = cls()
+        pc_root = pipeline_configuration.get_path()
+        core_path = os.path.join(pc_root, "config", "core")
+
+        roots_file = os.path.join(core_path, constants.STORAGE_ROOTS_FILE)
+        if os.path.exists(roots_file):
+            snapshot._add(_ROOTS, [roots_file], lambda: pipelineconfig_utils.get_roots_metadata(pc_root))
+
+        templates_file = os.path.join(core_path, constants.CONTENT_TEMPLATES_FILE)
+        if os.path.exists(templates_file):
+            snapshot._add(
+                _TEMPLATES,
+                _get_included_files(templates_file),
+                lambda: template_includes.process_includes(
+                    templates_file,
+                    yaml_cache.g_yaml_cache.get(templates_file, deepcopy_data=False)
+                )
+            )
+
+        for env_name in pipeline_configuration.get_environments():
+            env_file = pipeline_configuration.get_environment_path(env_name)
+            snapshot._add(
+                (_ENVIRONMENT, env_file),
+                _get_included_files(env_file),
+                lambda: environment_includes.process_includes(
+                    env_file,
+                    yaml_cache.g_yaml_cache.get(env_file, copy_on_write=True),
+                    None
+                )
+            )
+
+        schema_path = pipeline_configuration.get_schema_config_location()
+        if os.path.isdir(schema_path):
+            snapshot._add_schema(schema_path)
+
+        return snapshot
+
+    def write(self, pipeline_config_path):
+        """
+        Writes the snapshot at the root of a pipeline configuration.
+
+        :param pipeline_config_path: Path to the root of a pipeline configuration.
+        :raises: :class:`~sgtk.TankError` if the snapshot can't be written.
+        """
+        snapshot_path = os.path.join(pipeline_config_path, constants.CONFIG_SNAPSHOT_FILE)
+        temp_path = "%s.%s" % (snapshot_path, uuid.uuid4().hex)
+        content = {"version": constants.CONFIG_SNAPSHOT_FORMAT_VERSION, "entries": self._entries}
+        try:
+            with open(temp_path, "wb") as fh:
+                pickle.dump(content, fh, pickle.HIGHEST_PROTOCOL)
+            # processes loading the snapshot either see the previous one or the new one.
+            if os.name == "nt" and os.path.exists(snapshot_path):
+                os.remove(snapshot_path)
+            os.rename(temp_path, snapshot_path)
+        except Exception, e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise TankError("Unable to write config snapshot '%s': %s" % (snapshot_path, e))
+
+    def get_roots(self):
+        """
+        Returns the storage roots of the configuration.
+
+        :returns: Dictionary of :class:`~sgtk.util.ShotgunPath` indexed by storage name,
+                  as returned by ``pipelineconfig_utils.get_roots_metadata``, or None if
+                  not part of the snapshot or out of date.
+        """
+        return copy.deepcopy(self._get(_ROOTS))
+
+    def get_templates(self):
+        """
+        Returns the templates configuration, with its includes resolved.
+
+        :returns: Copy-on-write view of the templates data or None if not
+                  part of the snapshot or out of date.
+        """
+        return _make_view(self._get(_TEMPLATES))
+
+    def get_environment(self, env_path):
+        """
+        Returns the data of an environment, with its includes resolved.
+
+        :param env_path: Path to the environment file.
+        :returns: Copy-on-write view of the environment data or None if not
+                  part of the snapshot or out of date.
+        """
+        return _make_view(self._get((_ENVIRONMENT, env_path)))
+
+    def get_schema(self, schema_config_path):
+        """
+        Returns the folder structure of the folder creation schema.
+
+        :param schema_config_path: Path to the schema folder.
+        :returns: Schema dictionary, as returned by ``folder.configuration.scan_schema``,
+                  or None if not part of the snapshot or out of date.
+        """
+        return self._get((_SCHEMA, schema_config_path))
+
+    def _get(self, key):
+        """
+        Returns the data of an entry if none of its files changed.
+
+        :param key: Key of the entry.
+        :returns: The data of the entry or None.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        for (path, mtime, size) in entry["manifest"]:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+            if stat is None or stat.st_mtime != mtime or stat.st_size != size:
+                log.debug("Ignoring config snapshot entry %s: %s changed." % (key, path))
+                self._entries.pop(key, None)
+                return None
+
+        return entry["data"]
+
+    def _add(self, key, paths, resolve):
+        """
+        Adds an entry to the snapshot.
+
+        :param key: Key of the entry.
+        :param paths: Paths of the yaml files the entry is resolved from,
+                      or None if the entry can't be part of the snapshot.
+        :param resolve: Callable returning the data of the entry.
+        """
+        if paths is None:
+            log.debug("Not adding %s to the config snapshot, it depends on the runtime environment." % (key,))
+            return
+
+        # stat the files before reading them, so that changes
+        # made while resolving invalidate the entry.
+        manifest = []
+        for path in paths:
+            stat = os.stat(path)
+            manifest.append((path, stat.st_mtime, stat.st_size))
+
+        try:
+            data = resolve()
+        except Exception, e:
+            # the regular resolution will report the error when the data is needed.
+            log.debug("Not adding %s to the config snapshot: %s" % (key, e))
+            return
+
+        self._entries[key] = {"manifest": manifest, "data": data}
+
+    def _add_schema(self, schema_config_path):
+        """
+        Adds the folder structure of the folder creation schema to the snapshot.
+
+        The schema manifest lists the folders as well as the metadata files,
+        so the entry is ignored as soon as files are added to or removed from
+        the schema.
+
+        :param schema_config_path: Path to the schema folder.
+        """
+        # the folder module depends on the pipeline configuration
+        from .folder.configuration import scan_schema
+
+        try:
+            schema = scan_schema(schema_config_path)
+        except Exception, e:
+            # folder creation will report the error when the schema is needed.
+            log.debug("Not adding the schema to the config snapshot: %s" % e)
+            return
+
+        self._entries[(_SCHEMA, schema_config_path)] = {"manifest": schema["manifest"], "data": schema}
+
+
+def _make_view(data):
+    """
+    Wraps snapshot data into a copy-on-write view, so callers can't alter the snapshot.
+
+    :param data: Data to wrap, or None.
+    :returns: The view, or None.
+    """
+    if data is None:
+        return None
+    return yaml_cache.CopyOnWriteDict(data) if type(data) is dict else copy.deepcopy(data)
+
+
+def _get_included_files(file_name):
+    """
+    Lists a yaml file and all the files it includes, recursively.
+
+    :param file_name: Path to the yaml file.
+    :returns: List of paths, or None if any of the includes depends on the
+              context, environment variables or the user's home folder.
+    """
+    files = []
+    pending = [file_name]
+    while pending:
+        path = pending.pop()
+        if path in files:
+            continue
+        files.append(path)
+
+        data = yaml_cache.g_yaml_cache.get(path, deepcopy_data=False)
+        if not isinstance(data, dict):
+            continue
+
+        includes = []
+        if constants.SINGLE_INCLUDE_SECTION in data:
+            includes.append(data[constants.SINGLE_INCLUDE_SECTION])
+        if constants.MULTI_INCLUDE_SECTION in data:
+            includes.extend(data[constants.MULTI_INCLUDE_SECTION] or [])
+
+        for include in includes:
+            if any(token in include for token in ("{", "$", "%", "~")):
+                return None
+            try:
+                resolved = resolve_include(path, include)
+            except TankError:
+                # the configuration is broken, let the regular
+                # resolution report the error.
+                return None
+            if resolved:
+                pending.append(resolved)
+
+    return files
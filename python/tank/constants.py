@@ -56,6 +56,14 @@ SINGLE_INCLUDE_SECTION = "include"
 # the name of the includes section in env and template files
 MULTI_INCLUDE_SECTION = "includes"
 
+# file at the root of a pipeline configuration holding a snapshot
+# of its resolved templates, roots and environments
+CONFIG_SNAPSHOT_FILE = "config_snapshot.pickle"
+
+# version of the config snapshot format. Snapshots with
+# a different version are ignored.
+CONFIG_SNAPSHOT_FORMAT_VERSION = 1
+
 # the key sections in a template file
 TEMPLATE_SECTIONS = ["keys", "paths", "strings"]
 
@@ -85,3 +93,34 @@ SUPPORT_EMAIL = "support@shotgunsoftware.com"
 
 # environment variable to hold external pipeline config data
 ENV_VAR_EXTERNAL_PIPELINE_CONFIG_DATA = "SGTK_EXT_CONFIG_DATA"
+
+# maximum number of paths held by the context_from_path cache
+CONTEXT_FROM_PATH_CACHE_SIZE = 250
+
+# number of seconds shotgun field values used to populate
+# template keys are cached for, across all contexts
+ENTITY_FIELDS_CACHE_TTL = 60
+
+# maximum number of shotgun field values held by the entity fields cache
+ENTITY_FIELDS_CACHE_SIZE = 5000
+
+# environment variable that if set, disables the caching of resolved hook
+# paths and hook classes so that changes made to hooks on disk while
+# developing them are picked up
+HOOK_DEV_MODE_ENV_VAR = "SGTK_HOOK_DEV_MODE"
+
+# folder in the global cache location holding the compiled
+# code of hooks and other plugins loaded by toolkit
+BYTECODE_CACHE_FOLDER = "bytecode_cache"
+
+# environment variable that if set, makes the path cache use a replica
+# on local disk for lookups rather than the shared path cache file
+PATH_CACHE_REPLICA_ENV_VAR = "SGTK_PATH_CACHE_LOCAL_REPLICA"
+
+# maximum number of folders listed at the same time when
+# scanning the file system for paths matching a template
+TEMPLATE_SCAN_MAX_WORKERS = 8
+
+# maximum number of file system operations issued at the
+# same time by the default folder creation hook
+FOLDER_IO_MAX_WORKERS = 8
@@ -13,9 +13,14 @@ Management of the current context, e.g. the current shotgun entity/step/task.
 
 """
 
+from __future__ import with_statement
+
 import os
+import time
 import pickle
 import copy
+import threading
+import collections
 
 from tank_vendor import yaml
 from . import authentication
@@ -737,6 +742,10 @@ class Context(object):
         Query Shotgun server for keys used by this template whose values come directly
         from Shotgun fields.
 
+        All the fields needed from a given entity type are retrieved in a single
+        query. Raw values are shared across contexts through the process wide
+        :class:`EntityFieldsCache`.
+
         :param template: Template to retrieve Shotgun fields for.
         :param entities: Dictionary of entities for the current context.
         :param validate: If True, missing fields will raise a TankError.
@@ -747,13 +756,16 @@ class Context(object):
         :raises TankError: Raised if a key is missing from the entities list when ``validate`` is ``True``.
         """
         fields = {}
+        # keys that still need a value, along with the entity providing it
+        pending_keys = []
+
         # for any sg query field
         for key in template.keys.values():
-            
+
             # check each key to see if it has shotgun query information that we should resolve
             if key.shotgun_field_name:
-                # this key is a shotgun value that needs fetching! 
-                
+                # this key is a shotgun value that needs fetching!
+
                 # ensure that the context actually provides the desired entities
                 if not key.shotgun_entity_type in entities:
                     if validate:
@@ -762,64 +774,117 @@ class Context(object):
                                         "shotgun entity of type '%s'!" % (key, template, self, key.shotgun_entity_type))
                     else:
                         continue
-                    
+
                 entity = entities[key.shotgun_entity_type]
-                
-                # check the context cache 
+
+                # check the context cache
                 cache_key = (entity["type"], entity["id"], key.shotgun_field_name)
                 if cache_key in self._entity_fields_cache:
                     # already have the value cached - no need to fetch from shotgun
                     fields[key.name] = self._entity_fields_cache[cache_key]
-                
                 else:
-                    # get the value from shotgun
-                    filters = [["id", "is", entity["id"]]]
-                    query_fields = [key.shotgun_field_name]
-                    result = self.__tk.shotgun.find_one(key.shotgun_entity_type, filters, query_fields)
-                    if not result:
-                        # no record with that id in shotgun!
-                        raise TankError("Could not retrieve Shotgun data for key '%s' in "
-                                        "template '%s'. No records in Shotgun are matching "
-                                        "entity '%s' (Which is part of the current "
-                                        "context '%s')" % (key, template, entity, self))                        
-
-                    value = result.get(key.shotgun_field_name)
-
-                    # note! It is perfectly possible (and may be valid) to return None values from 
-                    # shotgun at this point. In these cases, a None field will be returned in the 
-                    # fields dictionary from as_template_fields, and this may be injected into
-                    # a template with optional fields.
-    
-                    if value is None:
-                        processed_val = None
-                    
-                    else:
+                    pending_keys.append((key, entity))
 
-                        # now convert the shotgun value to a string.
-                        # note! This means that there is no way currently to create an int key
-                        # in a tank template which matches an int field in shotgun, since we are
-                        # force converting everything into strings...
-                                 
-                        processed_val = shotgun_entity.sg_entity_to_string(self.__tk,
-                                                                           key.shotgun_entity_type,
-                                                                           entity.get("id"),
-                                                                           key.shotgun_field_name, 
-                                                                           value)
-                    
-                        if not key.validate(processed_val):                    
-                            raise TankError("Template validation failed for value '%s'. This "
-                                            "value was retrieved from entity %s in Shotgun to "
-                                            "represent key '%s' in "
-                                            "template '%s'." % (processed_val, entity, key, template))
-                            
-                    # all good!
-                    # populate dictionary and cache
-                    fields[key.name] = processed_val
-                    self._entity_fields_cache[cache_key] = processed_val
+        if not pending_keys:
+            return fields
+
+        # get the raw values from the process wide cache or shotgun
+        sg_values = self.__get_entity_field_values(
+            [(entity, key.shotgun_field_name) for (key, entity) in pending_keys]
+        )
+
+        for (key, entity) in pending_keys:
 
+            cache_key = (entity["type"], entity["id"], key.shotgun_field_name)
+            if cache_key not in sg_values:
+                # no record with that id in shotgun!
+                raise TankError("Could not retrieve Shotgun data for key '%s' in "
+                                "template '%s'. No records in Shotgun are matching "
+                                "entity '%s' (Which is part of the current "
+                                "context '%s')" % (key, template, entity, self))
+
+            value = sg_values[cache_key]
+
+            # note! It is perfectly possible (and may be valid) to return None values from
+            # shotgun at this point. In these cases, a None field will be returned in the
+            # fields dictionary from as_template_fields, and this may be injected into
+            # a template with optional fields.
+
+            if value is None:
+                processed_val = None
+
+            else:
+
+                # now convert the shotgun value to a string.
+                # note! This means that there is no way currently to create an int key
+                # in a tank template which matches an int field in shotgun, since we are
+                # force converting everything into strings...
+
+                processed_val = shotgun_entity.sg_entity_to_string(self.__tk,
+                                                                   key.shotgun_entity_type,
+                                                                   entity.get("id"),
+                                                                   key.shotgun_field_name,
+                                                                   value)
+
+                if not key.validate(processed_val):
+                    raise TankError("Template validation failed for value '%s'. This "
+                                    "value was retrieved from entity %s in Shotgun to "
+                                    "represent key '%s' in "
+                                    "template '%s'." % (processed_val, entity, key, template))
+
+            # all good!
+            # populate dictionary and cache
+            fields[key.name] = processed_val
+            self._entity_fields_cache[cache_key] = processed_val
 
         return fields
 
+    def __get_entity_field_values(self, requests):
+        """
+        Retrieves the values of shotgun fields for a list of entities.
+
+        Values found in the process wide entity fields cache are returned
+        directly. The other ones are retrieved from Shotgun with one query
+        per entity type, and added to the cache.
+
+        :param requests: List of (entity dictionary, field name) tuples.
+        :returns: Dictionary of raw shotgun values, indexed by (entity type, entity id,
+                  field name). Entities which could not be found in Shotgun are
+                  left out of the dictionary.
+        """
+        site = self.__tk.shotgun_url
+        values = {}
+
+        # missing fields, grouped by entity type and entity id
+        missing = {}
+        for (entity, field_name) in requests:
+            cache_key = (entity["type"], entity["id"], field_name)
+            (found, value) = g_entity_fields_cache.get(site, cache_key)
+            if found:
+                values[cache_key] = value
+            else:
+                missing.setdefault(entity["type"], {}).setdefault(entity["id"], set()).add(field_name)
+
+        for (entity_type, field_names_by_id) in missing.iteritems():
+            query_fields = set()
+            for field_names in field_names_by_id.values():
+                query_fields.update(field_names)
+
+            results = self.__tk.shotgun.find(
+                entity_type,
+                [["id", "in", field_names_by_id.keys()]],
+                list(query_fields)
+            )
+
+            for result in results:
+                for field_name in field_names_by_id.get(result["id"], []):
+                    cache_key = (entity_type, result["id"], field_name)
+                    value = result.get(field_name)
+                    values[cache_key] = value
+                    g_entity_fields_cache.add(site, cache_key, value)
+
+        return values
+
 
     def _fields_from_entity_paths(self, template):
         """
@@ -1210,7 +1275,182 @@ def from_entity_dictionary(tk, entity_dictionary):
 
     return Context(**context)
 
-def from_path(tk, path, previous_context=None):
+class PathContextCache(object):
+    """
+    Least recently used cache of context data resolved from paths.
+
+    Entries are keyed by normalized path and are only valid for the
+    path cache state they were resolved against. Whenever the path cache
+    reports a different modification token (because mappings were added,
+    the cache was synchronized or the database file changed on disk), all
+    entries are discarded.
+
+    The number of cache hits and misses are available via the ``hits``
+    and ``misses`` attributes.
+    """
+
+    def __init__(self, max_size=constants.CONTEXT_FROM_PATH_CACHE_SIZE):
+        """
+        :param max_size: Maximum number of paths to keep in the cache.
+        """
+        self._lock = threading.Lock()
+        # plain dictionary and deque of keys from least to most recently
+        # used, since collections.OrderedDict requires Python 2.7.
+        self._entries = {}
+        self._order = collections.deque()
+        self._max_size = max_size
+        self._token = None
+        self._token_getter = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path):
+        """
+        Returns the cached context data for a path.
+
+        :param path: Path to look up.
+        :returns: A copy of the context data dictionary or None if the
+                  path is not cached or the cache is out of date.
+        """
+        key = os.path.normpath(path)
+
+        with self._lock:
+            token_getter = self._token_getter
+            token = self._token
+
+        # check that the path cache hasn't changed since the entries
+        # were resolved. Done outside the lock since it hits the disk.
+        if token_getter is None or token_getter() != token:
+            with self._lock:
+                if self._token == token:
+                    self._entries.clear()
+                    self._order.clear()
+                self.misses += 1
+            return None
+
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            # move to the end to mark as most recently used
+            self._order.remove(key)
+            self._order.append(key)
+            self.hits += 1
+
+        return copy.deepcopy(data)
+
+    def add(self, path, data, token, token_getter):
+        """
+        Adds context data for a path to the cache.
+
+        :param path: Path the data was resolved from.
+        :param data: Context data dictionary.
+        :param token: Path cache modification token retrieved before
+                      the data was resolved.
+        :param token_getter: Callable returning the current path cache
+                             modification token.
+        """
+        if token is None:
+            # path cache is disabled or missing, nothing to validate against
+            return
+
+        key = os.path.normpath(path)
+        with self._lock:
+            if token != self._token:
+                # entries were resolved against a different path cache state
+                self._entries.clear()
+                self._order.clear()
+                self._token = token
+                self._token_getter = token_getter
+
+            if key in self._entries:
+                self._order.remove(key)
+            self._entries[key] = copy.deepcopy(data)
+            self._order.append(key)
+            while len(self._order) > self._max_size:
+                del self._entries[self._order.popleft()]
+
+    def clear(self):
+        """
+        Removes all entries from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._order.clear()
+            self._token = None
+            self._token_getter = None
+
+
+class EntityFieldsCache(object):
+    """
+    Process wide cache of Shotgun field values used to populate template keys.
+
+    Values are shared between all the contexts of a process and expire after
+    a number of seconds, after which they are retrieved from Shotgun again.
+    """
+
+    def __init__(self, ttl=constants.ENTITY_FIELDS_CACHE_TTL, max_size=constants.ENTITY_FIELDS_CACHE_SIZE):
+        """
+        :param ttl: Number of seconds values are kept for.
+        :param max_size: Maximum number of values to keep in the cache.
+        """
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._ttl = ttl
+        self._max_size = max_size
+
+    def get(self, site, key):
+        """
+        Returns the cached value of a shotgun field.
+
+        :param site: Url of the Shotgun site the value comes from.
+        :param key: (entity type, entity id, field name) tuple.
+        :returns: (found, value) tuple. ``found`` is False if the
+                  value is not cached or has expired.
+        """
+        with self._lock:
+            entry = self._entries.get((site, key))
+            if entry is None:
+                return (False, None)
+            (expiry, value) = entry
+            if expiry < time.time():
+                del self._entries[(site, key)]
+                return (False, None)
+        return (True, copy.deepcopy(value))
+
+    def add(self, site, key, value):
+        """
+        Adds the value of a shotgun field to the cache.
+
+        :param site: Url of the Shotgun site the value comes from.
+        :param key: (entity type, entity id, field name) tuple.
+        :param value: Raw value returned by Shotgun.
+        """
+        now = time.time()
+        with self._lock:
+            if len(self._entries) >= self._max_size:
+                # drop expired entries first, then everything if this wasn't enough.
+                for (entry_key, (expiry, _)) in self._entries.items():
+                    if expiry < now:
+                        del self._entries[entry_key]
+                if len(self._entries) >= self._max_size:
+                    self._entries.clear()
+            self._entries[(site, key)] = (now + self._ttl, copy.deepcopy(value))
+
+    def clear(self):
+        """
+        Removes all values from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+# shotgun field values shared by all contexts
+g_entity_fields_cache = EntityFieldsCache()
+
+
+def from_path(tk, path, previous_context=None, cache=None):
     """
     Factory method that constructs a context object from a path on disk.
 
@@ -1224,12 +1464,65 @@ def from_path(tk, path, previous_context=None):
                              suitable and if the task wasn't already expressed in the file system
                              path passed in via the path argument.
     :type previous_context: :class:`Context`
+    :param cache: Optional :class:`PathContextCache` used to avoid resolving
+                  the same path more than once.
     :returns: :class:`Context`
     """
+    context = None
+    if cache:
+        context = cache.get(path)
+
+    if context is None:
+        # get a cache handle
+        path_cache = PathCache(tk)
+        try:
+            # grab the modification token before looking anything up so that
+            # changes made while we are resolving the path invalidate the result.
+            modification_token = path_cache.get_modification_token()
+            context = _context_data_from_path(tk, path, path_cache)
+        finally:
+            path_cache.close()
+
+        if cache:
+            cache.add(path, context, modification_token, path_cache.get_modification_token)
 
+    context["tk"] = tk
+
+    # see if we can populate it based on the previous context
+    if previous_context and \
+       context.get("entity") == previous_context.entity and \
+       context.get("additional_entities") == previous_context.additional_entities:
+
+        # cool, everything is matching down to the step/task level.
+        # if context is missing a step and a task, we try to auto populate it.
+        # (note: weird edge that a context can have a task but no step)
+        if context.get("task") is None and context.get("step") is None:
+            context["step"] = previous_context.step
+
+        # now try to assign previous task but only if the step matches!
+        if context.get("task") is None and context.get("step") == previous_context.step:
+            context["task"] = previous_context.task
+
+    # ensure that we don't have a Project as the entity. Projects should only 
+    # appear on the projects level, despite being entities.
+    if context["project"] and context["entity"] and context["entity"]["type"] == "Project":
+        # remove double entry!
+        context["entity"] = None
+
+    return Context(**context)
+
+
+def _context_data_from_path(tk, path, path_cache):
+    """
+    Resolves the context fields for a path using the path cache.
+
+    :param tk: Sgtk API instance
+    :param path: a file system path
+    :param path_cache: :class:`PathCache` instance to use
+    :returns: dictionary with keys project, entity, step, user, task and additional_entities
+    """
     # prep our return data structure
     context = {
-        "tk": tk,
         "project": None,
         "entity": None,
         "step": None,
@@ -1241,41 +1534,18 @@ def from_path(tk, path, previous_context=None):
     # ask hook for extra entity types we should recognize and insert into the additional_entities list.
     additional_types = tk.execute_core_hook("context_additional_entities").get("entity_types_in_path", [])
 
-    # get a cache handle
-    path_cache = PathCache(tk)
-
-    # gather all roots as lower case
-    project_roots = [x.lower() for x in tk.pipeline_configuration.get_data_roots().values()]
-
-    # first gather entities
+    # first gather entities for the path and all its parents
+    # in a single path cache lookup
     entities = []
     secondary_entities = []
-    curr_path = path
-    while True:
-        curr_entity = path_cache.get_entity(curr_path)
+    for (_, curr_entity, curr_secondary_entities) in path_cache.get_entities_for_path_hierarchy(path):
         if curr_entity:
             # Don't worry about entity types we've already got in the context. In the future
             # we should look for entity ids that conflict in order to flag a degenerate schema.
             entities.append(curr_entity)
-        
-        # add secondary entities
-        secondary_entities.extend( path_cache.get_secondary_entities(curr_path) )
-
-        if curr_path.lower() in project_roots:
-            #TODO this could fail with windows path variations
-            # we have reached a root!
-            break
-
-        # and continue with parent path
-        parent_path = os.path.abspath(os.path.join(curr_path, ".."))
 
-        if curr_path == parent_path:
-            # We're at the disk root, probably a degenerate path
-            break
-        else:
-            curr_path = parent_path
-
-    path_cache.close()
+        # add secondary entities
+        secondary_entities.extend(curr_secondary_entities)
 
     # now populate the context
     # go from the root down, so that in the case there are a path with
@@ -1325,28 +1595,7 @@ def from_path(tk, path, previous_context=None):
             if context["entity"] is None:
                 context["entity"] = curr_entity
 
-    # see if we can populate it based on the previous context
-    if previous_context and \
-       context.get("entity") == previous_context.entity and \
-       context.get("additional_entities") == previous_context.additional_entities:
-
-        # cool, everything is matching down to the step/task level.
-        # if context is missing a step and a task, we try to auto populate it.
-        # (note: weird edge that a context can have a task but no step)
-        if context.get("task") is None and context.get("step") is None:
-            context["step"] = previous_context.step
-
-        # now try to assign previous task but only if the step matches!
-        if context.get("task") is None and context.get("step") == previous_context.step:
-            context["task"] = previous_context.task
-
-    # ensure that we don't have a Project as the entity. Projects should only 
-    # appear on the projects level, despite being entities.
-    if context["project"] and context["entity"] and context["entity"]["type"] == "Project":
-        # remove double entry!
-        context["entity"] = None
-
-    return Context(**context)
+    return context
 
 
 ################################################################################################
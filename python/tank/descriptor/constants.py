@@ -53,6 +53,24 @@ SGTK_APP_STORE_CONN_TIMEOUT = 5
 # the manifest file inside a bundle
 BUNDLE_METADATA_FILE = "info.yml"
 
+# the file at the root of a bundle cache holding the
+# manifests of all the immutable bundles it contains
+MANIFEST_REGISTRY_FILE = "manifest_registry.marshal"
+
+# suffix of the lock file created next to a bundle folder
+# while the bundle is downloaded into the bundle cache
+DOWNLOAD_LOCK_FILE_SUFFIX = ".download.lock"
+
+# file written inside a bundle folder once its download has completed
+DOWNLOAD_COMPLETE_MARKER_FILE = ".sgtk_download_complete"
+
+# number of seconds after which a download lock which hasn't been
+# refreshed by its holder is considered abandoned
+DOWNLOAD_LOCK_STALE_TIMEOUT = 600
+
+# number of seconds between checks of a download lock held by another process
+DOWNLOAD_LOCK_POLL_INTERVAL = 1
+
 # readme file for toolkit configurations
 CONFIG_README_FILE = "README"
 
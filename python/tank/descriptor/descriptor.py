@@ -355,6 +355,13 @@ class Descriptor(object):
         """
         return self._io_descriptor.download_local()
 
+    def supports_concurrent_download(self):
+        """
+        Returns true if this item can be downloaded by another thread than
+        the one which created it, concurrently with other downloads.
+        """
+        return self._io_descriptor.supports_concurrent_download()
+
     def find_latest_version(self, constraint_pattern=None):
         """
         Returns a descriptor object that represents the latest version.
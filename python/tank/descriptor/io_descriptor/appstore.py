@@ -12,12 +12,15 @@
 Toolkit App Store Descriptor.
 """
 
+from __future__ import with_statement
+
 import os
 import urllib
 import urllib2
 import httplib
 from tank_vendor.shotgun_api3.lib import httplib2
 import cPickle as pickle
+import threading
 
 from ...util import shotgun, filesystem
 from ...util import UnresolvableCoreConfigurationError, ShotgunAttachmentDownloadError
@@ -55,8 +58,13 @@ class IODescriptorAppStore(IODescriptorBase):
 
     """
 
-    # cache app store connections for performance
-    _app_store_connections = {}
+    # cache app store connections for performance. Shotgun API instances
+    # can't be used by several threads at once, so connections are
+    # cached per thread, while the credentials are shared. Thread local
+    # connections are released when their thread exits.
+    _app_store_connections = threading.local()
+    _app_store_credentials = {}
+    _app_store_connections_lock = threading.Lock()
 
     # internal app store mappings
     (APP, FRAMEWORK, ENGINE, CONFIG, CORE) = range(5)
@@ -184,6 +192,17 @@ class IODescriptorAppStore(IODescriptorBase):
         Fetches metadata about the app from the toolkit app store. Writes it to disk.
 
         :param path: Path to write the cache file to.
+        :returns: A dictionary with keys 'sg_bundle_data' and 'sg_version_data',
+                  containing Shotgun metadata.
+        """
+        metadata = self.__fetch_app_store_metadata()
+        self.__write_app_store_metadata(path, metadata)
+        return metadata
+
+    def __fetch_app_store_metadata(self):
+        """
+        Fetches metadata about the app from the toolkit app store.
+
         :returns: A dictionary with keys 'sg_bundle_data' and 'sg_version_data',
                   containing Shotgun metadata.
         """
@@ -242,11 +261,18 @@ class IODescriptorAppStore(IODescriptorBase):
                     "version '%s' of item '%s'!" % (self._version, self._name)
                 )
 
-        metadata = {
+        return {
             "sg_bundle_data": sg_bundle_data,
             "sg_version_data": sg_version_data
         }
 
+    def __write_app_store_metadata(self, path, metadata):
+        """
+        Writes metadata about the app to disk.
+
+        :param path: Path to write the cache file to.
+        :param metadata: Dictionary returned by :meth:`__fetch_app_store_metadata`.
+        """
         filesystem.ensure_folder_exists(os.path.dirname(path))
         fp = open(path, "wt")
         try:
@@ -255,8 +281,6 @@ class IODescriptorAppStore(IODescriptorBase):
         finally:
             fp.close()
 
-        return metadata
-
     def _get_bundle_cache_path(self, bundle_cache_root):
         """
         Given a cache root, compute a cache path suitable
@@ -363,45 +387,52 @@ class IODescriptorAppStore(IODescriptorBase):
             # nothing to do!
             return
 
-        # cache into the primary location
-        target = self._get_primary_cache_path()
-
-        # connect to the app store
-        (sg, script_user) = self.__create_sg_app_store_connection()
+        # cache into the primary location, making sure a single process
+        # downloads the bundle when the bundle cache is shared.
+        with self._locked_download_target() as target:
+            if target is None:
+                # downloaded by another process in the meantime
+                return
 
-        # fetch metadata from sg...
-        metadata_cache_file = os.path.join(target, METADATA_FILE)
-        metadata = self.__cache_app_store_metadata(metadata_cache_file)
+            # connect to the app store
+            (sg, script_user) = self.__create_sg_app_store_connection()
+
+            # fetch metadata from sg. It is only written to disk once the
+            # bundle has been unpacked, so that the bundle folder only appears
+            # once the download is complete.
+            metadata = self.__fetch_app_store_metadata()
+
+            # now get the attachment info
+            version = metadata.get("sg_version_data")
+
+            # attachment field is on the following form in the case a file has been uploaded:
+            #  {'name': 'v1.2.3.zip',
+            #  'url': 'https://sg-media-usor-01.s3.amazonaws.com/...',
+            #  'content_type': 'application/zip',
+            #  'type': 'Attachment',
+            #  'id': 139,
+            #  'link_type': 'upload'}
+            attachment_id = version[constants.TANK_CODE_PAYLOAD_FIELD]["id"]
+
+            # download and unzip
+            try:
+                shotgun.download_and_unpack_attachment(sg, attachment_id, target)
+            except ShotgunAttachmentDownloadError, e:
+                raise TankAppStoreError(
+                    "Failed to download %s. Error: %s" % (self, e)
+                )
 
-        # now get the attachment info
-        version = metadata.get("sg_version_data")
+            self.__write_app_store_metadata(os.path.join(target, METADATA_FILE), metadata)
 
-        # attachment field is on the following form in the case a file has been uploaded:
-        #  {'name': 'v1.2.3.zip',
-        #  'url': 'https://sg-media-usor-01.s3.amazonaws.com/...',
-        #  'content_type': 'application/zip',
-        #  'type': 'Attachment',
-        #  'id': 139,
-        #  'link_type': 'upload'}
-        attachment_id = version[constants.TANK_CODE_PAYLOAD_FIELD]["id"]
-
-        # download and unzip
-        try:
-            shotgun.download_and_unpack_attachment(sg, attachment_id, target)
-        except ShotgunAttachmentDownloadError, e:
-            raise TankAppStoreError(
-                "Failed to download %s. Error: %s" % (self, e)
-            )
-
-        # write a stats record to the tank app store
-        data = {}
-        data["description"] = "%s: %s %s was downloaded" % (self._sg_connection.base_url, self._name, self._version)
-        data["event_type"] = self._DOWNLOAD_STATS_EVENT_TYPE[self._type]
-        data["entity"] = version
-        data["user"] = script_user
-        data["project"] = constants.TANK_APP_STORE_DUMMY_PROJECT
-        data["attribute_name"] = constants.TANK_CODE_PAYLOAD_FIELD
-        sg.create("EventLogEntry", data)
+            # write a stats record to the tank app store
+            data = {}
+            data["description"] = "%s: %s %s was downloaded" % (self._sg_connection.base_url, self._name, self._version)
+            data["event_type"] = self._DOWNLOAD_STATS_EVENT_TYPE[self._type]
+            data["entity"] = version
+            data["user"] = script_user
+            data["project"] = constants.TANK_APP_STORE_DUMMY_PROJECT
+            data["attribute_name"] = constants.TANK_CODE_PAYLOAD_FIELD
+            sg.create("EventLogEntry", data)
 
     #############################################################################
     # searching for other versions
@@ -643,84 +674,117 @@ class IODescriptorAppStore(IODescriptorBase):
         # 1:1 relationship between app store accounts
         # and shotgun sites.
         sg_url = self._sg_connection.base_url
+        if not hasattr(self._app_store_connections, "connections"):
+            self._app_store_connections.connections = {}
+        connections = self._app_store_connections.connections
+
+        with self._app_store_connections_lock:
+            if sg_url not in connections:
+                if sg_url in self._app_store_credentials:
+                    # credentials already resolved by another thread
+                    (script_name, script_key, script_user) = self._app_store_credentials[sg_url]
+                    app_store_sg = self.__create_sg_app_store_api(script_name, script_key)
+                else:
+                    (app_store_sg, script_user) = self.__connect_to_app_store()
+                    self._app_store_credentials[sg_url] = (
+                        app_store_sg.config.script_name, app_store_sg.config.api_key, script_user
+                    )
+                connections[sg_url] = (app_store_sg, script_user)
 
-        if sg_url not in self._app_store_connections:
+            return connections[sg_url]
 
-            # Connect to associated Shotgun site and retrieve the credentials to use to
-            # connect to the app store site
-            try:
+    def __create_sg_app_store_api(self, script_name, script_key):
+        """
+        Creates a shotgun API instance for the Toolkit app store.
+
+        :param script_name: App store script user name.
+        :param script_key: App store script user key.
+        :returns: Shotgun API instance.
+        """
+        # Set the timeout explicitly so we ensure the connection won't hang in cases where
+        # a response is not returned in a reasonable amount of time.
+        app_store_sg = shotgun_api3.Shotgun(
+            constants.SGTK_APP_STORE,
+            script_name=script_name,
+            api_key=script_key,
+            http_proxy=self.__get_app_store_proxy_setting(),
+            connect=False
+        )
+        # set the default timeout for app store connections
+        app_store_sg.config.timeout_secs = constants.SGTK_APP_STORE_CONN_TIMEOUT
+        return app_store_sg
+
+    def __connect_to_app_store(self):
+        """
+        Retrieves the app store credentials from Shotgun and connects to the app store.
+
+        :returns: (sg, dict) where the first item is the shotgun api instance and the second
+                  is an sg entity dictionary (keys type/id) corresponding to to the user used
+                  to connect to the app store.
+        """
+        # Connect to associated Shotgun site and retrieve the credentials to use to
+        # connect to the app store site
+        try:
+            (script_name, script_key) = self.__get_app_store_key_from_shotgun()
+        except urllib2.HTTPError, e:
+            if e.code == 403:
+                # edge case alert!
+                # this is likely because our session token in shotgun has expired.
+                # The authentication system is based around wrapping the shotgun API,
+                # and requesting authentication if needed. Because the app store
+                # credentials is a separate endpoint and doesn't go via the shotgun
+                # API, we have to explicitly check.
+                #
+                # trigger a refresh of our session token by issuing a shotgun API call
+                self._sg_connection.find_one("HumanUser", [])
+                # and retry
                 (script_name, script_key) = self.__get_app_store_key_from_shotgun()
-            except urllib2.HTTPError, e:
-                if e.code == 403:
-                    # edge case alert!
-                    # this is likely because our session token in shotgun has expired.
-                    # The authentication system is based around wrapping the shotgun API,
-                    # and requesting authentication if needed. Because the app store
-                    # credentials is a separate endpoint and doesn't go via the shotgun
-                    # API, we have to explicitly check.
-                    #
-                    # trigger a refresh of our session token by issuing a shotgun API call
-                    self._sg_connection.find_one("HumanUser", [])
-                    # and retry
-                    (script_name, script_key) = self.__get_app_store_key_from_shotgun()
-                else:
-                    raise
-
-            log.debug("Connecting to %s..." % constants.SGTK_APP_STORE)
-            # Connect to the app store and resolve the script user id we are connecting with.
-            # Set the timeout explicitly so we ensure the connection won't hang in cases where
-            # a response is not returned in a reasonable amount of time.
-            app_store_sg = shotgun_api3.Shotgun(
-                constants.SGTK_APP_STORE,
-                script_name=script_name,
-                api_key=script_key,
-                http_proxy=self.__get_app_store_proxy_setting(),
-                connect=False
-            )
-            # set the default timeout for app store connections
-            app_store_sg.config.timeout_secs = constants.SGTK_APP_STORE_CONN_TIMEOUT
+            else:
+                raise
 
-            # determine the script user running currently
-            # get the API script user ID from shotgun
-            try:
-                script_user = app_store_sg.find_one(
-                    "ApiUser",
-                    filters=[["firstname", "is", script_name]],
-                    fields=["type", "id"]
-                )
-            except shotgun_api3.AuthenticationFault:
-                raise InvalidAppStoreCredentialsError(
-                    "The Toolkit App Store credentials found in Shotgun are invalid.\n"
-                    "Please contact %s to resolve this issue." % SUPPORT_EMAIL
-                )
-            # Connection errors can occur for a variety of reasons. For example, there is no
-            # internet access or there is a proxy server blocking access to the Toolkit app store.
-            except (httplib2.HttpLib2Error, httplib2.socks.HTTPError, httplib.HTTPException), e:
-                raise TankAppStoreConnectionError(e)
-            # In cases where there is a firewall/proxy blocking access to the app store, sometimes
-            # the firewall will drop the connection instead of rejecting it. The API request will
-            # timeout which unfortunately results in a generic SSLError with only the message text
-            # to give us a clue why the request failed.
-            # The exception raised in this case is "ssl.SSLError: The read operation timed out"
-            except httplib2.ssl.SSLError, e:
-                if "timed" in e.message:
-                    raise TankAppStoreConnectionError(
-                        "Connection to %s timed out: %s" % (app_store_sg.config.server, e)
-                    )
-                else:
-                    # other type of ssl error
-                    raise TankAppStoreError(e)
-            except Exception, e:
-                raise TankAppStoreError(e)
+        log.debug("Connecting to %s..." % constants.SGTK_APP_STORE)
+        # Connect to the app store and resolve the script user id we are connecting with.
+        app_store_sg = self.__create_sg_app_store_api(script_name, script_key)
 
-            if script_user is None:
-                raise TankAppStoreError(
-                    "Could not evaluate the current App Store User! Please contact support."
+        # determine the script user running currently
+        # get the API script user ID from shotgun
+        try:
+            script_user = app_store_sg.find_one(
+                "ApiUser",
+                filters=[["firstname", "is", script_name]],
+                fields=["type", "id"]
+            )
+        except shotgun_api3.AuthenticationFault:
+            raise InvalidAppStoreCredentialsError(
+                "The Toolkit App Store credentials found in Shotgun are invalid.\n"
+                "Please contact %s to resolve this issue." % SUPPORT_EMAIL
+            )
+        # Connection errors can occur for a variety of reasons. For example, there is no
+        # internet access or there is a proxy server blocking access to the Toolkit app store.
+        except (httplib2.HttpLib2Error, httplib2.socks.HTTPError, httplib.HTTPException), e:
+            raise TankAppStoreConnectionError(e)
+        # In cases where there is a firewall/proxy blocking access to the app store, sometimes
+        # the firewall will drop the connection instead of rejecting it. The API request will
+        # timeout which unfortunately results in a generic SSLError with only the message text
+        # to give us a clue why the request failed.
+        # The exception raised in this case is "ssl.SSLError: The read operation timed out"
+        except httplib2.ssl.SSLError, e:
+            if "timed" in e.message:
+                raise TankAppStoreConnectionError(
+                    "Connection to %s timed out: %s" % (app_store_sg.config.server, e)
                 )
+            else:
+                # other type of ssl error
+                raise TankAppStoreError(e)
+        except Exception, e:
+            raise TankAppStoreError(e)
 
-            self._app_store_connections[sg_url] = (app_store_sg, script_user)
+        if script_user is None:
+            raise TankAppStoreError(
+                "Could not evaluate the current App Store User! Please contact support."
+            )
 
-        return self._app_store_connections[sg_url]
+        return (app_store_sg, script_user)
 
     def __get_app_store_proxy_setting(self):
         """
@@ -10,6 +10,8 @@
 
 import os
 import re
+import shutil
+import contextlib
 import cgi
 import sys
 import urllib
@@ -20,6 +22,8 @@ from ... import LogManager
 from ...util import filesystem
 from ...util.version import is_version_newer
 from ..errors import TankDescriptorError
+from .manifest_registry import ManifestRegistry
+from .download_lock import DownloadLock, is_download_complete, mark_download_complete
 
 from tank_vendor import yaml
 
@@ -353,14 +357,17 @@ class IODescriptorBase(object):
         if self.__manifest_data is None:
             # make sure payload exists locally
             if not self.exists_local():
-                # @todo - at this point add to a metadata cache for performance
-                # we can either just store it in a pickle, in order to avoid yaml parsing, which
-                # is expensive, or if we want to be more fancy, we can maintain a single
-                # "registry" file which holds the metadata for all known bundles in a single place.
-                # given that all descriptors are immutable (except the ones where the immutable)
-                # property returns false, we can keep adding to this global cache file over time.
                 self.download_local()
 
+            # the content of immutable descriptors never changes, so their
+            # manifest can be looked up in the bundle cache wide registry.
+            registry = None
+            if self._bundle_cache_root and self.is_immutable():
+                registry = ManifestRegistry.get_registry(self._bundle_cache_root)
+                self.__manifest_data = registry.get(self.get_uri())
+                if self.__manifest_data is not None:
+                    return self.__manifest_data
+
             # get the metadata
             bundle_root = self.get_path()
             file_path = os.path.join(bundle_root, constants.BUNDLE_METADATA_FILE)
@@ -381,6 +388,8 @@ class IODescriptorBase(object):
 
             # cache it
             self.__manifest_data = metadata
+            if registry:
+                registry.add(self.get_uri(), metadata)
 
         return self.__manifest_data
 
@@ -590,12 +599,61 @@ class IODescriptorBase(object):
         """
         for path in self._get_cache_paths():
             # we determine local existence based on the existence of the
-            # bundle's directory on disk.
-            if os.path.exists(path):
+            # bundle's directory on disk. Folders still being downloaded
+            # into a shared bundle cache are skipped.
+            if os.path.exists(path) and is_download_complete(path):
                 return path
 
         return None
 
+    @contextlib.contextmanager
+    def _locked_download_target(self):
+        """
+        Context manager returning the folder to download this item into.
+
+        Bundle caches can be shared by several processes, potentially running
+        on different hosts. The download is guarded by a lock file so that only
+        one of them downloads the item, while the others wait for it to complete.
+        The bundle folder is flagged as complete when the context exits without errors,
+        and removed when it exits with an error.
+
+        :returns: Path to the primary cache location, or None if the item
+                  was downloaded by another process in the meantime.
+        """
+        target = self._get_primary_cache_path()
+        lock = DownloadLock(target)
+
+        while True:
+            if self.exists_local():
+                yield None
+                return
+            if lock.acquire():
+                break
+            lock.wait()
+
+        try:
+            if self.exists_local():
+                # completed by another process before we got the lock.
+                yield None
+                return
+
+            if os.path.exists(target):
+                log.warning("Removing %s, left over by an interrupted download." % target)
+                shutil.rmtree(target)
+
+            try:
+                yield target
+            except:
+                # a folder without completion marker and lock would be taken
+                # for a bundle cached by an older version of Toolkit.
+                if os.path.exists(target):
+                    log.debug("Removing %s, left over by a failed download." % target)
+                    shutil.rmtree(target, ignore_errors=True)
+                raise
+            mark_download_complete(target)
+        finally:
+            lock.release()
+
     def clone_cache(self, cache_root):
         """
         The descriptor system maintains an internal cache where it downloads
@@ -671,6 +729,17 @@ class IODescriptorBase(object):
         """
         raise NotImplementedError
 
+    def supports_concurrent_download(self):
+        """
+        Returns true if this item can be downloaded by another thread than
+        the one which created it, concurrently with other downloads.
+
+        Descriptors downloading through the Shotgun connection they were
+        created with should return False, since a Shotgun API instance
+        can't be used by several threads at once.
+        """
+        return True
+
     def get_latest_version(self, constraint_pattern=None):
         """
         Returns a descriptor object that represents the latest version.
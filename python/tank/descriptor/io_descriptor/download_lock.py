@@ -0,0 +1,270 @@
+# Copyright (c) 2016 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from __future__ import with_statement
+
+import os
+import sys
+import time
+import errno
+import uuid
+import socket
+import threading
+
+from .. import constants
+from ... import LogManager
+from ...util import filesystem
+
+log = LogManager.get_logger(__name__)
+
+
+class DownloadLock(object):
+    """
+    Lock file coordinating the download of a bundle into a shared bundle cache.
+
+    The lock is a file created next to the bundle folder. Creating it is atomic,
+    including across hosts sharing the bundle cache over the network, so only
+    one process at a time can hold it. While held, its modification time is
+    regularly refreshed. A lock which hasn't been refreshed for
+    ``constants.DOWNLOAD_LOCK_STALE_TIMEOUT`` seconds, or which was created on
+    this host by a process which no longer runs, is considered abandoned and
+    can be broken.
+
+    The same locking is used to guard other files of the bundle cache which
+    are written by several processes, like the manifest registry.
+
+    Each lock file holds a unique owner token, so that a holder never refreshes
+    or deletes a lock which was broken and acquired by another process.
+    """
+
+    def __init__(self, bundle_path):
+        """
+        :param bundle_path: Path to the bundle folder to download.
+        """
+        self._path = get_lock_path(bundle_path)
+        self._stale_timeout = constants.DOWNLOAD_LOCK_STALE_TIMEOUT
+        self._heartbeat = None
+        self._released = threading.Event()
+        self._token = None
+
+    @property
+    def path(self):
+        """
+        Path to the lock file.
+        """
+        return self._path
+
+    def acquire(self):
+        """
+        Attempts to acquire the lock, breaking it if it was abandoned.
+
+        :returns: True if the lock was acquired, False if another process holds it.
+        """
+        if self._create():
+            return True
+        stale_token = self._get_owner(self._path)
+        if stale_token and self._is_stale():
+            return self._break(stale_token)
+        return False
+
+    def wait(self):
+        """
+        Waits until the lock is released by its holder, or gets abandoned.
+        """
+        log.debug("Waiting for another process to complete the download locked by %s..." % self._path)
+        while os.path.exists(self._path) and not self._is_stale():
+            time.sleep(constants.DOWNLOAD_LOCK_POLL_INTERVAL)
+
+    def release(self):
+        """
+        Releases the lock.
+        """
+        self._released.set()
+        if self._heartbeat:
+            self._heartbeat.join()
+            self._heartbeat = None
+        if self._token and self._get_owner(self._path) == self._token:
+            filesystem.safe_delete_file(self._path)
+        self._token = None
+
+    def _break(self, stale_token):
+        """
+        Breaks an abandoned lock and acquires it.
+
+        Breaking is serialized through a second lock file, so that processes
+        which found the same abandoned lock don't break each other's new lock.
+        The lock is only broken if it still holds the owner token which was
+        found abandoned.
+
+        :param stale_token: Owner token of the abandoned lock.
+        :returns: True if the lock was acquired, False if another process holds it.
+        """
+        break_path = "%s.break" % self._path
+        if not self._create_file(break_path, "%s %s" % (self._get_owner_prefix(), uuid.uuid4().hex)):
+            # another process is breaking the lock. Its break lock is only left
+            # behind if it died while breaking, in which case it is removed.
+            try:
+                if time.time() - os.path.getmtime(break_path) > self._stale_timeout:
+                    filesystem.safe_delete_file(break_path)
+            except OSError:
+                pass
+            return False
+
+        try:
+            owner = self._get_owner(self._path)
+            if owner is None:
+                # released in the meantime
+                return self._create()
+            if owner != stale_token:
+                # already broken and acquired by another process
+                return False
+            log.warning("Breaking abandoned download lock %s" % self._path)
+            filesystem.safe_delete_file(self._path)
+            return self._create()
+        finally:
+            filesystem.safe_delete_file(break_path)
+
+    def _create(self):
+        """
+        Creates the lock file.
+
+        :returns: True if the lock file was created, False if it already exists.
+        """
+        token = "%s %s" % (self._get_owner_prefix(), uuid.uuid4().hex)
+        if not self._create_file(self._path, token):
+            return False
+        self._token = token
+
+        # keep the lock fresh for as long as the download runs
+        self._released.clear()
+        self._heartbeat = threading.Thread(target=self._refresh)
+        self._heartbeat.setDaemon(True)
+        self._heartbeat.start()
+        return True
+
+    def _create_file(self, path, content):
+        """
+        Atomically creates a file.
+
+        :param path: Path to the file to create.
+        :param content: Content to write to the file.
+        :returns: True if the file was created, False if it already exists.
+        """
+        filesystem.ensure_folder_exists(os.path.dirname(path))
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0666)
+        except OSError, e:
+            if e.errno == errno.EEXIST:
+                return False
+            raise
+        try:
+            os.write(fd, content)
+        finally:
+            os.close(fd)
+        return True
+
+    def _get_owner_prefix(self):
+        """
+        Returns the host, process id and time written at the start of a lock file.
+        """
+        return "%s %s %s" % (socket.gethostname(), os.getpid(), time.time())
+
+    def _get_owner(self, path):
+        """
+        Reads the owner token of a lock file.
+
+        :param path: Path to the lock file.
+        :returns: The content of the lock file, or None if it doesn't exist.
+        """
+        try:
+            with open(path) as fh:
+                return fh.read()
+        except (IOError, OSError):
+            return None
+
+    def _refresh(self):
+        """
+        Refreshes the modification time of the lock file until it is released.
+        """
+        # Event.wait() always returns None before Python 2.7, so check the flag explicitly.
+        while not self._released.isSet():
+            self._released.wait(self._stale_timeout / 4.0)
+            if self._released.isSet():
+                return
+            if self._get_owner(self._path) != self._token:
+                # broken by someone else
+                return
+            try:
+                os.utime(self._path, None)
+            except OSError:
+                return
+
+    def _is_stale(self):
+        """
+        Checks if the lock was abandoned by its holder.
+
+        :returns: True if the lock can be broken.
+        """
+        try:
+            age = time.time() - os.path.getmtime(self._path)
+            with open(self._path) as fh:
+                content = fh.read().split()
+        except (IOError, OSError):
+            # released in the meantime
+            return False
+
+        if age > self._stale_timeout:
+            return True
+
+        if len(content) >= 2 and content[0] == socket.gethostname() and sys.platform != "win32":
+            # the lock was created on this host, check its process still runs
+            try:
+                os.kill(int(content[1]), 0)
+            except ValueError:
+                return False
+            except OSError, e:
+                return e.errno == errno.ESRCH
+        return False
+
+
+def get_lock_path(bundle_path):
+    """
+    Returns the path to the lock file of a bundle.
+
+    :param bundle_path: Path to the bundle folder.
+    :returns: Path to the lock file.
+    """
+    return "%s%s" % (bundle_path.rstrip(os.sep), constants.DOWNLOAD_LOCK_FILE_SUFFIX)
+
+
+def is_download_complete(bundle_path):
+    """
+    Checks if the bundle folder holds a complete download.
+
+    Bundles are complete once their completion marker has been written.
+    Bundles without a marker were downloaded by a version of Toolkit not
+    using markers and are complete unless a download is in progress.
+
+    :param bundle_path: Path to an existing bundle folder.
+    :returns: False if the bundle is being downloaded, or a download was
+              interrupted.
+    """
+    if os.path.exists(os.path.join(bundle_path, constants.DOWNLOAD_COMPLETE_MARKER_FILE)):
+        return True
+    return not os.path.exists(get_lock_path(bundle_path))
+
+
+def mark_download_complete(bundle_path):
+    """
+    Writes the completion marker of a bundle.
+
+    :param bundle_path: Path to the bundle folder.
+    """
+    filesystem.touch_file(os.path.join(bundle_path, constants.DOWNLOAD_COMPLETE_MARKER_FILE))
@@ -7,6 +7,9 @@
 # By accessing, using, copying or modifying this work you indicate your 
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights 
 # not expressly granted therein are reserved by Shotgun Software Inc.
+
+from __future__ import with_statement
+
 import os
 import copy
 
@@ -146,19 +149,23 @@ class IODescriptorGitTag(IODescriptorGit):
             # nothing to do!
             return
 
-        # cache into the primary location
-        target = self._get_primary_cache_path()
-
-        try:
-            # clone the repo, checkout the given tag
-            commands = ["checkout -q \"%s\"" % self._version]
-            self._clone_then_execute_git_commands(target, commands)
-
-        except Exception, e:
-            raise TankDescriptorError(
-                "Could not download %s, "
-                "tag %s: %s" % (self._path, self._version, e)
-            )
+        # cache into the primary location, making sure a single process
+        # downloads the bundle when the bundle cache is shared.
+        with self._locked_download_target() as target:
+            if target is None:
+                # downloaded by another process in the meantime
+                return
+
+            try:
+                # clone the repo, checkout the given tag
+                commands = ["checkout -q \"%s\"" % self._version]
+                self._clone_then_execute_git_commands(target, commands)
+
+            except Exception, e:
+                raise TankDescriptorError(
+                    "Could not download %s, "
+                    "tag %s: %s" % (self._path, self._version, e)
+                )
 
     def get_latest_version(self, constraint_pattern=None):
         """
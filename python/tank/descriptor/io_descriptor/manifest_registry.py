@@ -0,0 +1,165 @@
+# Copyright (c) 2016 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from __future__ import with_statement
+
+import os
+import copy
+import uuid
+import marshal
+import threading
+
+from .. import constants
+from ... import LogManager
+from .download_lock import DownloadLock
+
+log = LogManager.get_logger(__name__)
+
+
+class ManifestRegistry(object):
+    """
+    Registry of the manifests (``info.yml`` contents) of immutable descriptors.
+
+    Since the content of an immutable descriptor never changes, its manifest only
+    ever needs to be parsed once. Parsed manifests are stored, keyed by descriptor
+    uri, in a single marshalled file at the root of a bundle cache so that other
+    processes can look them up without parsing yaml or touching the bundle on disk.
+
+    Registries are shared by all descriptors using the same bundle cache
+    and should be obtained via :meth:`get_registry`. Writes are guarded by a
+    lock file, so that processes registering manifests at the same time don't
+    overwrite each other's entries.
+    """
+
+    # registries indexed by bundle cache root
+    _registries = {}
+    _registries_lock = threading.Lock()
+
+    @classmethod
+    def get_registry(cls, bundle_cache_root):
+        """
+        Returns the registry for a bundle cache.
+
+        :param bundle_cache_root: Path to the root of the bundle cache.
+        :returns: :class:`ManifestRegistry` instance.
+        """
+        with cls._registries_lock:
+            registry = cls._registries.get(bundle_cache_root)
+            if registry is None:
+                registry = cls(bundle_cache_root)
+                cls._registries[bundle_cache_root] = registry
+            return registry
+
+    def __init__(self, bundle_cache_root):
+        """
+        :param bundle_cache_root: Path to the root of the bundle cache.
+        """
+        self._path = os.path.join(bundle_cache_root, constants.MANIFEST_REGISTRY_FILE)
+        self._lock = threading.Lock()
+        self._manifests = {}
+        # modification time of the registry file when it was last read
+        self._mtime = None
+
+    def get(self, uri):
+        """
+        Returns the manifest registered for a descriptor.
+
+        :param uri: Uri of the immutable descriptor.
+        :returns: Dictionary with the contents of info.yml or None if not registered.
+        """
+        with self._lock:
+            if uri not in self._manifests:
+                # another process may have registered it since we last looked
+                self._load()
+            manifest = self._manifests.get(uri)
+        # registered manifests are shared by all descriptors, so make sure
+        # callers changing the data don't affect each other.
+        return copy.deepcopy(manifest)
+
+    def add(self, uri, manifest):
+        """
+        Registers the manifest of a descriptor.
+
+        Failures to write the registry, e.g. because the bundle cache
+        is read only, are logged and otherwise ignored. The manifest isn't
+        registered if another process is writing the registry.
+
+        :param uri: Uri of the immutable descriptor.
+        :param manifest: Dictionary with the contents of info.yml.
+        """
+        try:
+            data = marshal.dumps(manifest)
+        except ValueError:
+            # only basic types can be marshalled.
+            log.debug("Cannot register the manifest of %s: unsupported data types." % uri)
+            return
+
+        with self._lock:
+            lock = DownloadLock(self._path)
+            try:
+                if not lock.acquire():
+                    log.debug("Manifest registry %s is locked by another process, "
+                              "not registering %s." % (self._path, uri))
+                    return
+            except (IOError, OSError), e:
+                log.debug("Could not lock manifest registry %s: %s" % (self._path, e))
+                return
+
+            temp_path = "%s.%s" % (self._path, uuid.uuid4().hex)
+            try:
+                # merge with what other processes may have registered
+                self._load(force=True)
+                self._manifests[uri] = marshal.loads(data)
+                with open(temp_path, "wb") as fh:
+                    marshal.dump(self._manifests, fh)
+                # readers either see the previous registry or the new one.
+                if os.name == "nt" and os.path.exists(self._path):
+                    os.remove(self._path)
+                os.rename(temp_path, self._path)
+                self._mtime = os.path.getmtime(self._path)
+            except (IOError, OSError), e:
+                log.debug("Could not write manifest registry %s: %s" % (self._path, e))
+                if os.path.exists(temp_path):
+                    try:
+                        os.remove(temp_path)
+                    except OSError:
+                        pass
+            finally:
+                lock.release()
+
+    def _load(self, force=False):
+        """
+        Reads the registry file if it changed since it was last read.
+        Must be called with the lock held.
+
+        :param force: Read the file even if its modification time didn't
+                      change, which doesn't catch writes within the
+                      resolution of the file system timestamps.
+        """
+        try:
+            mtime = os.path.getmtime(self._path)
+        except OSError:
+            # no registry yet
+            return
+
+        if mtime == self._mtime and not force:
+            return
+
+        try:
+            with open(self._path, "rb") as fh:
+                manifests = marshal.load(fh)
+        except (IOError, EOFError, ValueError, TypeError), e:
+            # unreadable, or written by an incompatible version of python
+            log.debug("Could not read manifest registry %s: %s" % (self._path, e))
+            return
+
+        if isinstance(manifests, dict):
+            self._manifests.update(manifests)
+        self._mtime = mtime
@@ -8,6 +8,8 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights 
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
+from __future__ import with_statement
+
 import os
 import urlparse
 
@@ -143,15 +145,26 @@ class IODescriptorShotgunEntity(IODescriptorBase):
             # nothing to do!
             return
 
-        # cache into the primary location
-        target = self._get_primary_cache_path()
-
-        try:
-            shotgun.download_and_unpack_attachment(self._sg_connection, self._version, target)
-        except ShotgunAttachmentDownloadError, e:
-            raise TankDescriptorError(
-                "Failed to download %s from %s. Error: %s" % (self, self._sg_connection.base_url, e)
-            )
+        # cache into the primary location, making sure a single process
+        # downloads the bundle when the bundle cache is shared.
+        with self._locked_download_target() as target:
+            if target is None:
+                # downloaded by another process in the meantime
+                return
+
+            try:
+                shotgun.download_and_unpack_attachment(self._sg_connection, self._version, target)
+            except ShotgunAttachmentDownloadError, e:
+                raise TankDescriptorError(
+                    "Failed to download %s from %s. Error: %s" % (self, self._sg_connection.base_url, e)
+                )
+
+    def supports_concurrent_download(self):
+        """
+        Returns False, since downloads go through the Shotgun connection
+        of the site, which can't be used by several threads at once.
+        """
+        return False
 
     def get_latest_version(self, constraint_pattern=None):
         """
@@ -69,3 +69,9 @@ class TankMultipleMatchingTemplatesError(TankError):
     Exception that indicates that a path matches multiple templates.
     """
 
+
+class TankAmbiguousTemplateFieldsError(TankError):
+    """
+    Exception that indicates that a path matches a template but the values
+    of its keys can't be resolved unambiguously.
+    """
@@ -15,3 +15,4 @@ This module contains functionality relating to folder creation.
 
 from .operations import process_filesystem_structure, synchronize_folders
 from .configuration import read_ignore_files
+from .io_executor import FolderIOExecutor
@@ -13,8 +13,11 @@ Handles the creation of a configuration object structure based on the folder con
 
 """
 
+from __future__ import with_statement
+
 import os
 import fnmatch
+import threading
 
 from .folder_types import Static, ListField, Entity, Project, UserWorkspace, ShotgunStep, ShotgunTask
 
@@ -44,80 +47,193 @@ def read_ignore_files(schema_config_path):
             open_file.close()
     return ignore_files
 
-class FolderConfiguration(object):
+def scan_schema(schema_config_path):
     """
-    Class that loads the schema from disk and constructs folder objects.
+    Reads the folder structure of a schema from disk.
+    
+    The result only holds plain data, so that it can be cached and pickled.
+    Folder objects are constructed from it by :class:`FolderConfiguration`.
+    
+    :param schema_config_path: Path to the schema folder.
+    :returns: Dictionary with the following keys:
+              - projects: list of folder dictionaries for the project folders.
+              - manifest: list of (path, mtime, size) tuples for all the folders 
+                and metadata files read.
+              Folder dictionaries have the keys path, metadata (None if the folder has 
+              no yml file), children (folder dictionaries), symlinks (see 
+              :meth:`_SchemaReader._get_symlinks_in_folder`) and files.
     """
+    return _SchemaReader(schema_config_path).read()
 
-    def __init__(self, tk, schema_config_path):
+
+def is_manifest_current(manifest):
+    """
+    Checks that none of the folders and files of a schema manifest changed on disk.
+    
+    Adding or removing items in a folder changes its modification time, so
+    the manifest covers files added to the schema as well.
+    
+    :param manifest: List of (path, mtime, size) tuples, as returned by :func:`scan_schema`.
+    :returns: True if the manifest matches what is on disk, False otherwise.
+    """
+    for (path, mtime, size) in manifest:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if stat.st_mtime != mtime or stat.st_size != size:
+            return False
+    return True
+
+
+class SchemaCache(object):
+    """
+    Process wide cache of the schemas read by :func:`scan_schema`.
+    
+    A cached schema is used for as long as its manifest matches what is 
+    on disk, which only requires a stat per folder and metadata file rather
+    than listing the folders and reading the metadata files again.
+    """
+
+    def __init__(self):
         """
         Constructor
         """
-        self._tk = tk
-        
-        # access shotgun nodes by their entity_type
-        self._entity_nodes_by_type = {}
+        self._lock = threading.Lock()
+        self._schemas = {}
+
+    def get(self, schema_config_path, config_snapshot=None):
+        """
+        Returns the folder structure of a schema.
         
-        # maintain a list of all Step nodes for special introspection
-        self._step_fields = []
+        :param schema_config_path: Path to the schema folder.
+        :param config_snapshot: :class:`~sgtk.config_snapshot.ConfigSnapshot` to look 
+                                the schema up in before reading it from disk, or None.
+        :returns: Schema dictionary, see :func:`scan_schema`. The data is shared 
+                  and must not be modified.
+        """
+        with self._lock:
+            schema = self._schemas.get(schema_config_path)
         
-        # read skip files config
-        self._ignore_files = read_ignore_files(schema_config_path)
+        if schema is None or not is_manifest_current(schema["manifest"]):
+            schema = config_snapshot and config_snapshot.get_schema(schema_config_path)
+            if schema is None:
+                schema = scan_schema(schema_config_path)
+            with self._lock:
+                self._schemas[schema_config_path] = schema
         
-        # load schema
-        self._load_schema(schema_config_path)
+        return schema
 
+    def clear(self):
+        """
+        Removes all schemas from the cache.
+        """
+        with self._lock:
+            self._schemas = {}
 
-    ##########################################################################################
-    # public methods
 
-    def get_folder_objs_for_entity_type(self, entity_type):
+g_schema_cache = SchemaCache()
+
+
+class _SchemaReader(object):
+    """
+    Reads the folder structure of a schema from disk and
+    records the folders and metadata files it is read from.
+    """
+
+    def __init__(self, schema_config_path):
         """
-        Returns all the nodes representing a particular sg entity type
+        :param schema_config_path: Path to the schema folder.
         """
-        return self._entity_nodes_by_type.get(entity_type, [])
+        self._schema_config_path = schema_config_path
+        self._manifest = []
+        
+        ignore_file = os.path.join(schema_config_path, "ignore_files")
+        if os.path.exists(ignore_file):
+            self._add_to_manifest(ignore_file)
+        
+        # read skip files config
+        self._ignore_files = read_ignore_files(schema_config_path)
 
-    def get_task_step_nodes(self):
+    def read(self):
         """
-        Returns all step nodes in the configuration
+        Reads the schema.
+        
+        :returns: Schema dictionary, see :func:`scan_schema`.
         """
-        return self._step_fields
+        items_in_folder = self._list_folder(self._schema_config_path)
+        projects = [self._read_folder(path) 
+                    for path in self._get_sub_directories(self._schema_config_path, items_in_folder)]
+        return {"projects": projects, "manifest": self._manifest}
 
-    ####################################################################################
-    # utility methods
+    def _read_folder(self, full_path):
+        """
+        Recursively reads a folder of the schema.
+        
+        :param full_path: Path to the folder.
+        :returns: Folder dictionary, see :func:`scan_schema`.
+        """
+        items_in_folder = self._list_folder(full_path)
+        return {"path": full_path,
+                "metadata": self._read_metadata(full_path),
+                "children": [self._read_folder(path) 
+                             for path in self._get_sub_directories(full_path, items_in_folder)],
+                "symlinks": self._get_symlinks_in_folder(full_path, items_in_folder),
+                "files": self._get_files_in_folder(full_path, items_in_folder)}
+
+    def _add_to_manifest(self, path):
+        """
+        Records the modification time and size of a file or folder.
+        Should be called before reading it, so that changes made while 
+        reading it are detected.
+        
+        :param path: Path to the file or folder.
+        :raises: OSError if the path doesn't exist.
+        """
+        stat = os.stat(path)
+        self._manifest.append((path, stat.st_mtime, stat.st_size))
+
+    def _list_folder(self, parent_path):
+        """
+        Lists the items of a folder.
+        
+        :param parent_path: Path to the folder.
+        :returns: List of (file name, is_folder) tuples.
+        """
+        self._add_to_manifest(parent_path)
+        return [(file_name, os.path.isdir(os.path.join(parent_path, file_name))) 
+                for file_name in os.listdir(parent_path)]
 
-    def _get_sub_directories(self, parent_path):
+    def _get_sub_directories(self, parent_path, items_in_folder):
         """
         Returns all the directories for a given path
         """
         directory_paths = []
-        for file_name in os.listdir(parent_path):
+        for (file_name, is_folder) in items_in_folder:
             
             # check our ignore list
             if any(fnmatch.fnmatch(file_name, p) for p in self._ignore_files):
                 continue
             
-            full_path = os.path.join(parent_path, file_name)
-            if os.path.isdir(full_path):
-                directory_paths.append(full_path)
+            if is_folder:
+                directory_paths.append(os.path.join(parent_path, file_name))
                 
         return directory_paths
 
-    def _get_files_in_folder(self, parent_path):
+    def _get_files_in_folder(self, parent_path, items_in_folder):
         """
         Returns all the files for a given path except yml files
         Also ignores any files mentioned in the ignore files list
         """
         file_paths = []
-        items_in_folder = os.listdir(parent_path)
 
-        folders = [f for f in items_in_folder if os.path.isdir(os.path.join(parent_path, f))]
+        folders = [f for (f, is_folder) in items_in_folder if is_folder]
 
-        for file_name in items_in_folder:
+        for (file_name, is_folder) in items_in_folder:
 
             full_path = os.path.join(parent_path, file_name)
 
-            if not os.path.isfile(full_path):
+            if is_folder or not os.path.isfile(full_path):
                 # not a file path!
                 continue
 
@@ -140,11 +256,12 @@ class FolderConfiguration(object):
 
         return file_paths
 
-    def _get_symlinks_in_folder(self, parent_path):
+    def _get_symlinks_in_folder(self, parent_path, items_in_folder):
         """
         Returns all xxx.symlink.yml files in a location.
         
         :param parent_path: file system folder to scan
+        :param items_in_folder: items of the folder, as returned by :meth:`_list_folder`.
         :returns: list of (name, target_expression, full_metadata) where name is the name of the symlink 
                   and target_expression is a target expression to be passed into the folder creation. 
                   For example, if the file in the schema location is called "foo_bar.symlink.yml", 
@@ -154,14 +271,14 @@ class FolderConfiguration(object):
         
         data = []
         
-        items_in_folder = os.listdir(parent_path)
-        symlinks = [f for f in items_in_folder if f.endswith(SYMLINK_SUFFIX) ]
+        symlinks = [f for (f, _) in items_in_folder if f.endswith(SYMLINK_SUFFIX) ]
 
         for file_name in symlinks:
 
             full_path = os.path.join(parent_path, file_name)
 
             try:
+                self._add_to_manifest(full_path)
                 metadata = yaml_cache.g_yaml_cache.get(full_path, deepcopy_data=False)
             except Exception, error:
                 raise TankError("Cannot load config file '%s'. Error: %s" % (full_path, error))
@@ -179,7 +296,6 @@ class FolderConfiguration(object):
 
         return data
 
-
     def _read_metadata(self, full_path):
         """
         Reads metadata file.
@@ -190,6 +306,13 @@ class FolderConfiguration(object):
         metadata = None
         # check if there is a yml file with the same name
         yml_file = "%s.yml" % full_path
+        try:
+            self._add_to_manifest(yml_file)
+        except OSError:
+            # no metadata file. Creating one will change
+            # the modification time of the parent folder.
+            return None
+        
         try:
             metadata = yaml_cache.g_yaml_cache.get(yml_file, deepcopy_data=False)
         except TankUnreadableFileError:
@@ -199,37 +322,80 @@ class FolderConfiguration(object):
 
         return metadata
 
+
+class FolderConfiguration(object):
+    """
+    Class that constructs folder objects from the schema.
+    
+    The schema is read from disk once per process and cached for as long as 
+    it doesn't change, see :class:`SchemaCache`. Folder objects are constructed
+    for each configuration instance.
+    """
+
+    def __init__(self, tk, schema_config_path):
+        """
+        Constructor
+        """
+        self._tk = tk
+        
+        # access shotgun nodes by their entity_type
+        self._entity_nodes_by_type = {}
+        
+        # maintain a list of all Step nodes for special introspection
+        self._step_fields = []
+        
+        # load schema
+        schema = g_schema_cache.get(schema_config_path, tk.pipeline_configuration.get_config_snapshot())
+        self._load_schema(schema)
+
+
     ##########################################################################################
-    # internal stuff
+    # public methods
 
+    def get_folder_objs_for_entity_type(self, entity_type):
+        """
+        Returns all the nodes representing a particular sg entity type
+        """
+        return self._entity_nodes_by_type.get(entity_type, [])
 
-    def _load_schema(self, schema_config_path):
+    def get_task_step_nodes(self):
         """
-        Scan the config and build objects structure
+        Returns all step nodes in the configuration
         """
+        return self._step_fields
 
-        project_folders = self._get_sub_directories(schema_config_path)
+    ##########################################################################################
+    # internal stuff
+
+
+    def _load_schema(self, schema):
+        """
+        Build objects structure from the schema folders
+        
+        :param schema: Schema dictionary, see :func:`scan_schema`.
+        """
 
         # make some space in our obj/entity type mapping
         self._entity_nodes_by_type["Project"] = []
 
-        for project_folder in project_folders:
+        for project_folder in schema["projects"]:
 
             # read metadata to determine root path
-            metadata = self._read_metadata(project_folder)
+            project_path = project_folder["path"]
+            metadata = project_folder["metadata"]
 
             if metadata is None:
-                if os.path.basename(project_folder) == "project":
+                if os.path.basename(project_path) == "project":
                     # this is a project folder with no project.yml file specified
                     # in this case, just assume it is the primary storage 
                     metadata = {"type": "project", "root_name": constants.PRIMARY_STORAGE_NAME}
                 else:
-                    raise TankError("Project directory missing required yml file: %s.yml" % project_folder)
+                    raise TankError("Project directory missing required yml file: %s.yml" % project_path)
 
             if metadata.get("type") != "project":
-                raise TankError("Only items of type 'project' are allowed at the root level: %s" % project_folder)
+                raise TankError("Only items of type 'project' are allowed at the root level: %s" % project_path)
 
-            project_obj = Project.create(self._tk, project_folder, metadata)
+            project_obj = Project.create(self._tk, project_path, metadata)
 
             # store it in our lookup tables
             self._entity_nodes_by_type["Project"].append(project_obj)
@@ -238,16 +404,17 @@ class FolderConfiguration(object):
             self._process_config_r(project_obj, project_folder)
 
 
-    def _process_config_r(self, parent_node, parent_path):
+    def _process_config_r(self, parent_node, parent_folder):
         """
-        Recursively scan the file system and construct an object
+        Recursively process the schema folders and construct an object
         hierarchy.
 
         Factory method for Folder objects.
         """
-        for full_path in self._get_sub_directories(parent_path):
+        for child_folder in parent_folder["children"]:
+            full_path = child_folder["path"]
             # check for metadata (non-static folder)
-            metadata = self._read_metadata(full_path)
+            metadata = child_folder["metadata"]
             if metadata:
                 node_type = metadata.get("type", "undefined")
 
@@ -286,25 +453,13 @@ class FolderConfiguration(object):
                 cur_node = Static.create(self._tk, parent_node, full_path, {"type": "static"})
 
             # and process children
-            self._process_config_r(cur_node, full_path)
+            self._process_config_r(cur_node, child_folder)
 
         # process symlinks
-        for (path, target, metadata) in self._get_symlinks_in_folder(parent_path):
+        for (path, target, metadata) in parent_folder["symlinks"]:
             parent_node.add_symlink(path, target, metadata)
         
 
         # now process all files and add them to the parent_node token
-        for f in self._get_files_in_folder(parent_path):
+        for f in parent_folder["files"]:
             parent_node.add_file(f)
-
-
-
-
-
-
-
-
-
-
-
-
@@ -19,7 +19,7 @@ Known constraints:
 from . import constants
 from ..errors import TankError
 
-from ..path_cache import PathCache
+from ..path_cache import PathCache, SYNC_PAGE_SIZE
     
 class FolderIOReceiver(object):
     """
@@ -64,41 +64,58 @@ class FolderIOReceiver(object):
         
             # now run the path cache synchronization and see if there are any folders which 
             # should be created locally.
-            remote_items = []
+            folders = []
     
             # new items that were not locally available are returned
-            # as a list of dicts with keys id, type, name, configuration and path
+            # as dicts with keys id, type, name, configuration and path
             rd = path_cache.synchronize(full_sync)
                 
             # for each item we get back from the path cache synchronization,
             # issue a remote entity folder request and pass that down to 
             # the folder creation hook. This way, folders can be auto created
-            # across multiple locations if desirable.            
+            # across multiple locations if desirable. A full sync returns every
+            # folder of the project, so the hook is run one page of items at a time.
+            remote_items = []
             for i in rd:
                 remote_items.append( {"action": "remote_entity_folder",
                                       "path": i["path"],
                                       "metadata": i["metadata"],
                                       "entity": i["entity"] })
-        
-            if len(remote_items) > 0:
-                # execute the actual I/O
-                tk.execute_core_hook(constants.PROCESS_FOLDER_CREATION_HOOK_NAME, 
-                                     items=remote_items, 
-                                     preview_mode=False)
+                if len(remote_items) == SYNC_PAGE_SIZE:
+                    folders.extend(cls._create_remote_folders(tk, remote_items))
+                    remote_items = []
             
-            # return all folders that were computed
-            folders = []
-            for i in remote_items:
-                action = i.get("action")
-                if action in ["entity_folder", "create_file", "folder", "remote_entity_folder"]:
-                    folders.append( i["path"] )
-                elif action == "copy":
-                    folders.append( i["target_path"] )        
+            folders.extend(cls._create_remote_folders(tk, remote_items))
 
         finally:
             path_cache.close()
 
         return folders
+
+    @classmethod
+    def _create_remote_folders(cls, tk, remote_items):
+        """
+        Runs the folder creation hook for folders registered remotely.
+
+        :param tk: A tk API instance
+        :param remote_items: List of remote_entity_folder items.
+        :returns: A list of paths which were calculated to be created
+        """
+        if len(remote_items) > 0:
+            # execute the actual I/O
+            tk.execute_core_hook(constants.PROCESS_FOLDER_CREATION_HOOK_NAME, 
+                                 items=remote_items, 
+                                 preview_mode=False)
+        
+        # return all folders that were computed
+        folders = []
+        for i in remote_items:
+            action = i.get("action")
+            if action in ["entity_folder", "create_file", "folder", "remote_entity_folder"]:
+                folders.append( i["path"] )
+            elif action == "copy":
+                folders.append( i["target_path"] )
+        return folders
         
         
     def execute_folder_creation(self):
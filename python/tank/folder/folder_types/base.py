@@ -82,6 +82,24 @@ class Folder(object):
             return shotgun_data
         else:
             return self._parent.extract_shotgun_data_upwards(sg, shotgun_data)
+
+    def extract_shotgun_data_upwards_bulk(self, sg, shotgun_data_list):
+        """
+        Extract data from shotgun for a specific pathway upwards through the
+        schema, for several seeds at once.
+
+        This is subclassed by deriving classes which process Shotgun data.
+        For more information, see the Entity implementation.
+
+        :param sg: Shotgun API instance
+        :param shotgun_data_list: List of shotgun data dictionaries, or None
+                                  for items which should be skipped.
+        :returns: List of shotgun data dictionaries, in the same order.
+        """
+        if self._parent is None:
+            return shotgun_data_list
+        else:
+            return self._parent.extract_shotgun_data_upwards_bulk(sg, shotgun_data_list)
             
     def get_parents(self):
         """
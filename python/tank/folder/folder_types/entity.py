@@ -17,8 +17,13 @@ from ...util import shotgun_entity
 from .errors import EntityLinkTypeMismatch
 from .base import Folder
 from .expression_tokens import FilterExpressionToken
+from .expression_tokens import CurrentStepExpressionToken, CurrentTaskExpressionToken
 from .util import translate_filter_tokens, resolve_shotgun_filters
 
+# key of the shotgun data dictionary holding the records retrieved while
+# extracting shotgun data upwards, indexed by folder path and entity id
+PREFETCHED_ENTITIES_KEY = "prefetched_entities"
+
 
 class Entity(Folder):
     """
@@ -199,10 +204,31 @@ class Entity(Folder):
         if my_sg_data_key in sg_data:
             # we have a constraint!
             entity_id = sg_data[my_sg_data_key]["id"]
+
+            # the record may already have been retrieved when the
+            # shotgun data was extracted upwards.
+            prefetched = sg_data.get(PREFETCHED_ENTITIES_KEY, {}).get((self._full_path, entity_id))
+            if prefetched and self._can_use_prefetched_data():
+                return [prefetched]
+
             # add the id constraint to the filters
             resolved_filters["conditions"].append({ "path": "id", "relation": "is", "values": [entity_id] })
             # get data - can be None depending on external filters
 
+        # convert to a list - sets wont work with the SG API
+        fields_list = list(self.__get_folder_fields())
+        
+        # now find all the items (e.g. shots) matching this query
+        entities = self._tk.shotgun.find(self._entity_type, resolved_filters, fields_list)
+        
+        return entities
+
+    def __get_folder_fields(self):
+        """
+        Returns the shotgun fields needed to create folders for this object.
+
+        :returns: Set of shotgun field names.
+        """
         # figure out which fields to retrieve
         fields = self._entity_expression.get_shotgun_fields()
         
@@ -216,13 +242,31 @@ class Entity(Folder):
         for custom_field in self._get_additional_sg_fields():
             fields.add(custom_field)
 
-        # convert to a list - sets wont work with the SG API
-        fields_list = list(fields)
-        
-        # now find all the items (e.g. shots) matching this query
-        entities = self._tk.shotgun.find(self._entity_type, resolved_filters, fields_list)
-        
-        return entities
+        return fields
+
+    def _can_use_prefetched_data(self):
+        """
+        Checks if records retrieved while extracting shotgun data upwards can be
+        used to create the folders of this object.
+
+        This is the case when the filters of this object only link to the entities
+        of its parents, which the upwards extraction already resolved, or are
+        plain filters, which it already applied.
+
+        Can be subclassed for special cases.
+
+        :returns: True if prefetched records can be used, False otherwise.
+        """
+        for condition in self._filters["conditions"]:
+            if condition["path"].startswith("$FROM$"):
+                return False
+            value = condition["values"][0] if condition["values"] else None
+            if isinstance(value, FilterExpressionToken):
+                if condition["relation"] != "is":
+                    return False
+            elif isinstance(value, (CurrentStepExpressionToken, CurrentTaskExpressionToken)):
+                return False
+        return True
 
     def extract_shotgun_data_upwards(self, sg, shotgun_data):
         """
@@ -255,9 +299,28 @@ class Entity(Folder):
         to have a pathway where the same entity type exists multiple times. For example an 
         asset / sub asset relationship.
         """
-        
-        tokens = copy.deepcopy(shotgun_data)
-        
+        (tokens,) = self.extract_shotgun_data_upwards_bulk(sg, [shotgun_data])
+        if tokens is None:
+            raise EntityLinkTypeMismatch()
+        return tokens
+
+    def extract_shotgun_data_upwards_bulk(self, sg, shotgun_data_list):
+        """
+        Extracts the shotgun data necessary to create this object and all its parents
+        for several seeds at once. See :meth:`extract_shotgun_data_upwards` for details.
+
+        Each level of the hierarchy issues a single shotgun query for all the seeds.
+        The records retrieved are also stored in the returned dictionaries so that
+        folder creation doesn't need to query the same entities again.
+
+        :param sg: Shotgun API instance
+        :param shotgun_data_list: List of shotgun data dictionaries. Items can be None.
+        :returns: List of shotgun data dictionaries, in the same order. Items which
+                  do not satisfy the link path from this object up to the root are None.
+        :raises: :class:`TankError` if a seeded entity doesn't exist in Shotgun.
+        """
+        results = [copy.deepcopy(tokens) for tokens in shotgun_data_list]
+
         # If we don't have an entry in tokens for the current entity type, then we can't
         # extract any tokens. Used by #17726. Typically, we start with a "seed", and then go
         # upwards. For example, if the seed is a Shot id, we then scan upwards, look at the config
@@ -268,137 +331,181 @@ class Entity(Folder):
         # however, if we have a free-floating item in the hierarchy, this will not be 'seeded' 
         # by its children as we move upwards - for example a step.
         my_sg_data_key = FilterExpressionToken.sg_data_key_for_folder_obj(self)
-        if my_sg_data_key in tokens:
+        ids = set(tokens[my_sg_data_key]["id"] for tokens in results if tokens and my_sg_data_key in tokens)
+
+        if ids:
+
+            (link_map, fields_to_retrieve, additional_filters) = self.__get_upwards_query()
 
-            
-            link_map = {}
-            fields_to_retrieve = []
-            additional_filters = []
-            
-            # TODO: Support nested conditions
-            for condition in self._filters["conditions"]:
-                vals = condition["values"]
-                
-                # note the $FROM$ condition below - this is a bit of a hack to make sure we exclude
-                # the special $FROM$ step based culling filter that is commonly used. Because steps are 
-                # sort of free floating and not associated with an entity, removing them from the 
-                # resolve should be fine in most cases.
-                
-                # so - if at the shot level, we have defined the following filter:
-                # filters: [ { "path": "sg_sequence", "relation": "is", "values": [ "$sequence" ] } ]
-                # the $sequence will be represented by a Token object and we need to get a value for 
-                # this token. We fetch the id for this token and then, as we recurse upwards, and process
-                # the parent folder level (the sequence), this id will be the "seed" when we populate that
-                # level. 
-                
-                if vals[0] and isinstance(vals[0], FilterExpressionToken) and not condition["path"].startswith('$FROM$'):
-                    expr_token = vals[0]
-                    # we should get this field (eg. 'sg_sequence')
-                    fields_to_retrieve.append(condition["path"])
-                    # add to our map for later processing map['sg_sequence'] = 'Sequence'
-                    # note that for List fields, the key is EntityType.field
-                    link_map[ condition["path"] ] = expr_token 
-                
-                elif not condition["path"].startswith('$FROM$'):
-                    # this is a normal filter (we exclude the $FROM$ stuff since it is weird
-                    # and specific to steps.) So for example 'name must begin with X' - we want 
-                    # to include these in the query where we are looking for the object, to
-                    # ensure that assets with names starting with X are not created for an 
-                    # asset folder node which explicitly excludes these via its filters. 
-                    additional_filters.append(condition)
-            
-            # add some extra fields apart from the stuff in the config
-            if self._entity_type == "Project":
-                fields_to_retrieve.append("name")
-            elif self._entity_type == "Task":
-                fields_to_retrieve.append("content")
-            elif self._entity_type == "HumanUser":
-                fields_to_retrieve.append("login")
-            else:
-                fields_to_retrieve.append("code")
-            
             # TODO: AND the id query with this folder's query to make sure this path is
             # valid for the current entity. Throw error if not so driver code knows to 
             # stop processing. This would be needed in a setup where (for example) Asset
             # appears in several locations in the filesystem and that the filters are responsible
             # for determining which location to use for a particular asset.
-            my_id = tokens[ my_sg_data_key ]["id"]
-            additional_filters.append( {"path": "id", "relation": "is", "values": [my_id]})
-            
+            additional_filters.append({"path": "id", "relation": "in", "values": list(ids)})
+
             # append additional filter cruft
             filter_dict = { "logical_operator": "and", "conditions": additional_filters }
-            
+
             # carry out find
-            rec = sg.find_one(self._entity_type, filter_dict, fields_to_retrieve)
-            
-            # there are now two reasons why find_one did not return:
+            records = dict((rec["id"], rec) for rec in sg.find(self._entity_type, filter_dict, fields_to_retrieve))
+
+            # there are now two reasons why a record was not returned:
             # - the specified entity id does not exist or has been deleted
             # - there are filters which has filtered it out. For example imagine that you 
             #   have one folder structure for all assets starting with A and a second structure
             #   for the rest. This would be a filter condition (code does not start with A, and
             #   code starts with A respectively). In these cases, the object does exist but has been
             #   explicitly filtered out - which is not an error!
-            
-            if not rec:
-                
-                # check if it is a missing id or just a filtered out thing
-                if sg.find_one(self._entity_type, [["id", "is", my_id]]) is None:                
+            missing_ids = ids.difference(records)
+            if missing_ids:
+                # check if these are missing ids or just filtered out things
+                existing_ids = set(
+                    rec["id"] for rec in sg.find(self._entity_type, [["id", "in", list(missing_ids)]])
+                )
+                if missing_ids != existing_ids:
                     raise TankError("Could not find Shotgun %s with id %s as required by "
-                                    "the folder creation setup." % (self._entity_type, my_id))
-                else:
-                    raise EntityLinkTypeMismatch()
-            
-            # and append the 'name field' which is always needed.
-            name = None # used for error reporting
-            if self._entity_type == "Project":
-                name = rec["name"]
-                tokens[ my_sg_data_key ]["name"] = rec["name"]
-            elif self._entity_type == "Task":
-                name = rec["content"]
-                tokens[ my_sg_data_key ]["content"] = rec["content"]
-            elif self._entity_type == "HumanUser":
-                name = rec["login"]
-                tokens[ my_sg_data_key ]["login"] = rec["login"]
-            else:
-                name = rec["code"]
-                tokens[ my_sg_data_key ]["code"] = rec["code"]
-
-            # Step through our token key map and process
-            #
-            # This is on the form
-            # link_map['sg_sequence'] = link_obj
-            #
-            for field in link_map:
-                
-                # do some juggling to make sure we don't double process the 
-                # name fields.
-                value = rec[field]
-                link_obj = link_map[field]
-                
-                if value is None:
-                    # field was none! - cannot handle that!
-                    raise TankError("The %s %s has a required field %s that \ndoes not have a value "
-                                    "set in Shotgun. \nDouble check the values and try "
-                                    "again!\n" % (self._entity_type, name, field))
-    
-                if isinstance(value, dict):
-                    # If the value is a dict, assume it comes from a entity link.
-                    
-                    # now make sure that this link is actually relevant for us,
-                    # e.g. that it points to an entity of the right type.
-                    # this may be a problem whenever a link can link to more
-                    # than one type. See the EntityLinkTypeMismatch docs for example.
-                    if value["type"] != link_obj.get_entity_type():
+                                    "the folder creation setup." %
+                                    (self._entity_type, min(missing_ids - existing_ids)))
+
+            for (index, tokens) in enumerate(results):
+                if not tokens or my_sg_data_key not in tokens:
+                    continue
+
+                rec = records.get(tokens[my_sg_data_key]["id"])
+                try:
+                    if rec is None:
                         raise EntityLinkTypeMismatch()
+                    self.__process_upwards_record(tokens, rec, link_map)
+                except EntityLinkTypeMismatch:
+                    # the seed does not satisfy the link path up to the root.
+                    results[index] = None
 
-                # store it in our sg_data prefetch chunk
-                tokens[ link_obj.get_sg_data_key() ] = value
-                
         # now keep recursing upwards
         if self._parent is None:
-            return tokens
+            return results
         
         else:
-            return self._parent.extract_shotgun_data_upwards(sg, tokens)
+            return self._parent.extract_shotgun_data_upwards_bulk(sg, results)
+
+    def __get_upwards_query(self):
+        """
+        Returns the shotgun query needed to extract the data of this
+        object in :meth:`extract_shotgun_data_upwards_bulk`.
+
+        :returns: Tuple with a dictionary of link fields to :class:`FilterExpressionToken`,
+                  the list of fields to retrieve and the list of filter conditions.
+        """
+        link_map = {}
+        fields_to_retrieve = []
+        additional_filters = []
+        
+        # TODO: Support nested conditions
+        for condition in self._filters["conditions"]:
+            vals = condition["values"]
+            
+            # note the $FROM$ condition below - this is a bit of a hack to make sure we exclude
+            # the special $FROM$ step based culling filter that is commonly used. Because steps are 
+            # sort of free floating and not associated with an entity, removing them from the 
+            # resolve should be fine in most cases.
+            
+            # so - if at the shot level, we have defined the following filter:
+            # filters: [ { "path": "sg_sequence", "relation": "is", "values": [ "$sequence" ] } ]
+            # the $sequence will be represented by a Token object and we need to get a value for 
+            # this token. We fetch the id for this token and then, as we recurse upwards, and process
+            # the parent folder level (the sequence), this id will be the "seed" when we populate that
+            # level. 
+            
+            if vals[0] and isinstance(vals[0], FilterExpressionToken) and not condition["path"].startswith('$FROM$'):
+                expr_token = vals[0]
+                # we should get this field (eg. 'sg_sequence')
+                fields_to_retrieve.append(condition["path"])
+                # add to our map for later processing map['sg_sequence'] = 'Sequence'
+                # note that for List fields, the key is EntityType.field
+                link_map[ condition["path"] ] = expr_token 
+            
+            elif not condition["path"].startswith('$FROM$'):
+                # this is a normal filter (we exclude the $FROM$ stuff since it is weird
+                # and specific to steps.) So for example 'name must begin with X' - we want 
+                # to include these in the query where we are looking for the object, to
+                # ensure that assets with names starting with X are not created for an 
+                # asset folder node which explicitly excludes these via its filters. 
+                additional_filters.append(condition)
+        
+        # add some extra fields apart from the stuff in the config
+        if self._entity_type == "Project":
+            fields_to_retrieve.append("name")
+        elif self._entity_type == "Task":
+            fields_to_retrieve.append("content")
+        elif self._entity_type == "HumanUser":
+            fields_to_retrieve.append("login")
+        else:
+            fields_to_retrieve.append("code")
+
+        # and the fields needed to create the folder, so that
+        # folder creation can reuse the record.
+        if self._can_use_prefetched_data():
+            fields_to_retrieve.extend(self.__get_folder_fields())
+
+        return (link_map, list(set(fields_to_retrieve)), additional_filters)
+
+    def __process_upwards_record(self, tokens, rec, link_map):
+        """
+        Adds the data of a record retrieved by :meth:`extract_shotgun_data_upwards_bulk`
+        to a shotgun data dictionary.
+
+        :param tokens: Shotgun data dictionary to update.
+        :param rec: Shotgun record for this object's entity.
+        :param link_map: Dictionary of link fields to :class:`FilterExpressionToken`.
+        :raises: :class:`EntityLinkTypeMismatch` if a link points to an entity of the wrong type.
+        """
+        my_sg_data_key = FilterExpressionToken.sg_data_key_for_folder_obj(self)
+
+        # and append the 'name field' which is always needed.
+        name = None # used for error reporting
+        if self._entity_type == "Project":
+            name = rec["name"]
+            tokens[ my_sg_data_key ]["name"] = rec["name"]
+        elif self._entity_type == "Task":
+            name = rec["content"]
+            tokens[ my_sg_data_key ]["content"] = rec["content"]
+        elif self._entity_type == "HumanUser":
+            name = rec["login"]
+            tokens[ my_sg_data_key ]["login"] = rec["login"]
+        else:
+            name = rec["code"]
+            tokens[ my_sg_data_key ]["code"] = rec["code"]
+
+        # Step through our token key map and process
+        #
+        # This is on the form
+        # link_map['sg_sequence'] = link_obj
+        #
+        for field in link_map:
+            
+            # do some juggling to make sure we don't double process the 
+            # name fields.
+            value = rec[field]
+            link_obj = link_map[field]
+            
+            if value is None:
+                # field was none! - cannot handle that!
+                raise TankError("The %s %s has a required field %s that \ndoes not have a value "
+                                "set in Shotgun. \nDouble check the values and try "
+                                "again!\n" % (self._entity_type, name, field))
+
+            if isinstance(value, dict):
+                # If the value is a dict, assume it comes from a entity link.
+                
+                # now make sure that this link is actually relevant for us,
+                # e.g. that it points to an entity of the right type.
+                # this may be a problem whenever a link can link to more
+                # than one type. See the EntityLinkTypeMismatch docs for example.
+                if value["type"] != link_obj.get_entity_type():
+                    raise EntityLinkTypeMismatch()
 
+            # store it in our sg_data prefetch chunk
+            tokens[ link_obj.get_sg_data_key() ] = value
 
+        if self._can_use_prefetched_data():
+            tokens.setdefault(PREFETCHED_ENTITIES_KEY, {})[(self._full_path, rec["id"])] = rec
@@ -104,5 +104,14 @@ class UserWorkspace(Entity):
             self._user_initialized = True
         
         return Entity.create_folders(self, io_receiver, path, sg_data, is_primary, explicit_child_list, engine)
+
+    def _can_use_prefetched_data(self):
+        """
+        Subclassed since the filter on the current user is only added
+        when folders are created, after shotgun data has been extracted.
+
+        :returns: False
+        """
+        return False
         
 
@@ -0,0 +1,225 @@
+# Copyright (c) 2016 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Concurrent execution of the I/O requested by folder creation.
+"""
+
+from __future__ import with_statement
+
+import os
+import sys
+import errno
+import shutil
+import contextlib
+
+from .. import constants
+from .. import LogManager
+from ..util import thread_pool
+
+log = LogManager.get_logger(__name__)
+
+
+class FolderIOExecutor(object):
+    """
+    Carries out the items passed to the ``process_folder_creation`` core hook.
+
+    Folders are created one depth level at a time, all the folders of a level
+    being created concurrently, so that parents always exist before their children.
+    Files and symbolic links are then created concurrently once all folders exist.
+    On network file systems, the time taken grows with the depth of the folder
+    structure rather than with the number of items.
+
+    Permissions are set explicitly on everything created, rather than by
+    changing the process umask which would affect other threads.
+    """
+
+    def __init__(self, preview_mode, max_workers=None, folder_permissions=0777, file_permissions=0666):
+        """
+        :param preview_mode: If True, nothing is created on disk but the
+                             paths which would be created are still returned.
+        :param max_workers: Maximum number of I/O operations issued at the same time.
+                            Defaults to ``constants.FOLDER_IO_MAX_WORKERS``.
+        :param folder_permissions: Permissions of the folders created.
+        :param file_permissions: Permissions of the files created.
+        """
+        self._preview_mode = preview_mode
+        if max_workers is None:
+            max_workers = constants.FOLDER_IO_MAX_WORKERS
+        self._max_workers = max(1, max_workers)
+        self._folder_permissions = folder_permissions
+        self._file_permissions = file_permissions
+
+    def execute(self, items):
+        """
+        Carries out folder creation items.
+
+        See the ``process_folder_creation`` core hook for a description of the items.
+
+        :param items: List of item dictionaries.
+        :returns: List of the paths created, in the order of the items.
+        """
+        # index of the items which created something
+        created = set()
+
+        # folders, with duplicates removed, grouped by depth
+        folders_by_depth = {}
+        seen_folders = set()
+        # files and symbolic links, which are created once all folders exist
+        others = []
+
+        for (index, item) in enumerate(items):
+            action = item.get("action")
+
+            if action in ["entity_folder", "folder"]:
+                path = os.path.normpath(item.get("path"))
+                if path not in seen_folders:
+                    seen_folders.add(path)
+                    folders_by_depth.setdefault(path.count(os.sep), []).append((index, path))
+
+            elif action == "symlink":
+                # no windows support
+                if sys.platform != "win32":
+                    others.append(index)
+
+            elif action in ["copy", "create_file"]:
+                others.append(index)
+
+            # remote entity folders were already created on the shared storage
+            # by another user, so there is nothing to do for them.
+
+        for depth in sorted(folders_by_depth):
+            for (index, was_created) in self._map(self._process_folder, folders_by_depth[depth]):
+                if was_created:
+                    created.add(index)
+
+        others = [(index, items[index]) for index in others]
+        for (index, was_created) in self._map(self._process_item, others):
+            if was_created:
+                created.add(index)
+
+        paths = []
+        for index in sorted(created):
+            item = items[index]
+            paths.append(item["target_path"] if item.get("action") == "copy" else item["path"])
+
+        log.debug("Created %d of %d folder creation items." % (len(paths), len(items)))
+        return paths
+
+    def _process_folder(self, path):
+        """
+        Creates a folder whose parent is expected to exist.
+
+        :param path: Path to the folder.
+        :returns: True if the folder didn't exist, False otherwise.
+        """
+        if self._preview_mode:
+            return not os.path.exists(path)
+        return self._make_folder(path)
+
+    def _process_item(self, item):
+        """
+        Creates a file or a symbolic link.
+
+        :param item: Item dictionary.
+        :returns: True if the item didn't exist, False otherwise.
+        """
+        action = item.get("action")
+
+        if action == "symlink":
+            path = item.get("path")
+            if self._preview_mode:
+                # note use of lexists to check existance of symlink
+                # rather than what symlink is pointing at
+                return not os.path.lexists(path)
+            try:
+                os.symlink(item.get("target"), path)
+            except OSError, e:
+                if e.errno != errno.EEXIST:
+                    raise
+                return False
+            return True
+
+        elif action == "copy":
+            target_path = item.get("target_path")
+            if os.path.exists(target_path):
+                return False
+            if not self._preview_mode:
+                # do a standard file copy
+                shutil.copy(item.get("source_path"), target_path)
+                os.chmod(target_path, self._file_permissions)
+            return True
+
+        else:
+            # create a new file based on content
+            path = item.get("path")
+            if self._preview_mode:
+                return not os.path.exists(path)
+
+            parent_folder = os.path.dirname(path)
+            if not os.path.exists(parent_folder):
+                self._make_folder(parent_folder)
+            if os.path.exists(path):
+                return False
+            with open(path, "wb") as fh:
+                fh.write(item.get("content"))
+            os.chmod(path, self._file_permissions)
+            return True
+
+    def _make_folder(self, path):
+        """
+        Creates a folder, and its parents if they don't exist.
+
+        Rather than checking first if the folder exists, which
+        would cost an extra round trip, the creation is attempted
+        and an existing folder is reported by the file system.
+
+        :param path: Path to the folder.
+        :returns: True if the folder was created, False if it already existed.
+        """
+        try:
+            os.mkdir(path, self._folder_permissions)
+        except OSError, e:
+            if e.errno == errno.EEXIST:
+                return False
+            if e.errno != errno.ENOENT:
+                raise
+            # the parent is missing, which only happens for folders
+            # which are not folder creation items themselves.
+            self._make_folder(os.path.dirname(path))
+            try:
+                os.mkdir(path, self._folder_permissions)
+            except OSError, e:
+                if e.errno != errno.EEXIST:
+                    raise
+                return False
+
+        # mkdir permissions are subject to the umask.
+        os.chmod(path, self._folder_permissions)
+        return True
+
+    def _map(self, func, items):
+        """
+        Applies a function to a list of items on a pool of threads.
+
+        :param func: Callable taking a single item.
+        :param items: List of ``(index, item)`` tuples.
+        :returns: List of ``(index, result)`` tuples, in order of completion.
+        """
+        processed = []
+        # closing the results stops the workers when an item fails.
+        with contextlib.closing(
+            thread_pool.imap_unordered(lambda task: func(task[1]), items, self._max_workers)
+        ) as results:
+            for ((index, _), result, exc_info) in results:
+                if exc_info:
+                    raise exc_info[0], exc_info[1], exc_info[2]
+                processed.append((index, result))
+        return processed
@@ -15,7 +15,6 @@ Main entry points for folder creation.
 
 from .configuration import FolderConfiguration
 from .folder_io import FolderIOReceiver
-from .folder_types import EntityLinkTypeMismatch
 from ..errors import TankError
 
 
@@ -30,64 +29,117 @@ def create_single_folder_item(tk, config_obj, io_receiver, entity_type, entity_i
     :param sg_task_data: shotgun task id if this folder creation is associated with a particular task
     :param engine: Engine to create folders for / indicate second pass if not None.
     """
-    # TODO: Confirm this entity exists and is in this project
-    # Recurse over entire tree and find find all Entity folders of this type
-    folder_objects = config_obj.get_folder_objs_for_entity_type(entity_type)
+    create_folder_items(
+        tk,
+        config_obj,
+        io_receiver,
+        [{"type": entity_type, "id": entity_id, "sg_task_data": sg_task_data}],
+        engine
+    )
+
+
+def create_folder_items(tk, config_obj, io_receiver, items, engine):
+    """
+    Creates folders for a list of entities.
+
+    The folder configuration is walked once per entity type, and the Shotgun
+    data needed by all the entities is retrieved with one query per level
+    of the configuration rather than with queries for each entity.
+
+    :param config_obj: a FolderConfiguration object representing the folder configuration
+    :param io_receiver: a FolderIOReceiver representing the folder operation callbacks
+    :param items: List of dictionaries with keys type, id and sg_task_data, where
+                  sg_task_data is the shotgun task data if the folder creation is
+                  associated with a particular task.
+    :param engine: Engine to create folders for / indicate second pass if not None.
+    """
+    # shotgun data for each item, as a list of (folder object, data) tuples
+    items_data = [[] for _ in items]
+
+    entity_types = []
+    for item in items:
+        if item["type"] not in entity_types:
+            entity_types.append(item["type"])
+
+    for entity_type in entity_types:
+        indices = [index for (index, item) in enumerate(items) if item["type"] == entity_type]
+
+        # TODO: Confirm this entity exists and is in this project
+        # Recurse over entire tree and find find all Entity folders of this type
+        folder_objects = config_obj.get_folder_objs_for_entity_type(entity_type)
+
+        # now we have folder objects representing the entity type we are after.
+        # (for example there may be 3 SHOT nodes in the folder config tree)
+        # For each folder, find the list of entities needed to build the full path and
+        # ensure its parent folders exist. Then, create the folder for this entity with
+        # all its children.
+        for folder_obj in folder_objects:
+
+            # fill in the information we know about these entities now
+            entity_id_seeds = [
+                {
+                    entity_type: { "type": entity_type, "id": items[index]["id"] },
+                    "current_task_data": items[index]["sg_task_data"]
+                }
+                for index in indices
+            ]
+
+            # now go from the folder object, deep inside the hierarchy,
+            # up the tree and resolve all the entity ids that are required
+            # in order to create folders. Items whose seed entity id object
+            # does not satisfy the link path from folder_obj up to the root
+            # are returned as None.
+            shotgun_entity_data_list = folder_obj.extract_shotgun_data_upwards_bulk(tk.shotgun, entity_id_seeds)
+
+            for (index, shotgun_entity_data) in zip(indices, shotgun_entity_data_list):
+                if shotgun_entity_data is not None:
+                    items_data[index].append((folder_obj, shotgun_entity_data))
+
+    # create folders in the order the items were requested
+    for item_data in items_data:
+        for (folder_obj, shotgun_entity_data) in item_data:
+            _create_folders_for_folder_obj(io_receiver, folder_obj, shotgun_entity_data, engine)
+
+
+def _create_folders_for_folder_obj(io_receiver, folder_obj, shotgun_entity_data, engine):
+    """
+    Creates the folders of a folder object, its parents and its children.
+
+    :param io_receiver: a FolderIOReceiver representing the folder operation callbacks
+    :param folder_obj: Folder object to create folders for.
+    :param shotgun_entity_data: Shotgun data, as returned by ``extract_shotgun_data_upwards``.
+    :param engine: Engine to create folders for / indicate second pass if not None.
+    """
+    # now get all the parents, the list goes from the bottom up
+    # parents:
+    # [Entity /Project/sequences/Sequence/Shot, 
+    #  Entity /Project/sequences/Sequence, 
+    #  Static /Project/sequences, Project /Project ]
+    #
+    # the last element is now always the project object
+    folder_objects_to_recurse = [folder_obj] + folder_obj.get_parents()
     
-    # now we have folder objects representing the entity type we are after.
-    # (for example there may be 3 SHOT nodes in the folder config tree)
-    # For each folder, find the list of entities needed to build the full path and
-    # ensure its parent folders exist. Then, create the folder for this entity with
-    # all its children.
-    for folder_obj in folder_objects:
-        
-        # fill in the information we know about this entity now
-        entity_id_seed = { 
-            entity_type: { "type": entity_type, "id": entity_id },
-            "current_task_data": sg_task_data 
-        }
-        
-        # now go from the folder object, deep inside the hierarchy,
-        # up the tree and resolve all the entity ids that are required 
-        # in order to create folders.
-        try:
-            shotgun_entity_data = folder_obj.extract_shotgun_data_upwards(tk.shotgun, entity_id_seed)
-        except EntityLinkTypeMismatch:
-            # the seed entity id object does not satisfy the link
-            # path from folder_obj up to the root. 
-            continue
-        
-        # now get all the parents, the list goes from the bottom up
-        # parents:
-        # [Entity /Project/sequences/Sequence/Shot, 
-        #  Entity /Project/sequences/Sequence, 
-        #  Static /Project/sequences, Project /Project ]
-        #
-        # the last element is now always the project object
-        folder_objects_to_recurse = [folder_obj] + folder_obj.get_parents()
-        
-        # get the project object and take it out of the list
-        # we will use the project object to start the recursion down
-        project_folder = folder_objects_to_recurse.pop()
-        
-        # get the parent path of the project folder
-        storage_root_path = project_folder.get_storage_root()
-                
-        # now walk down, starting from the project level until we reach our entity 
-        # and create all the structure.
-        #
-        # we pass a list of folder objects to create, so that in the case an object has multiple
-        # children, the folder creation knows which object to create at that point.
-        #
-        # the shotgun_entity_data dictionary contains all the shotgun data needed in order to create
-        # all the folders down this particular recursion path
-        project_folder.create_folders(io_receiver, 
-                                      storage_root_path, 
-                                      shotgun_entity_data, 
-                                      True,
-                                      folder_objects_to_recurse,
-                                      engine)
-        
+    # get the project object and take it out of the list
+    # we will use the project object to start the recursion down
+    project_folder = folder_objects_to_recurse.pop()
+    
+    # get the parent path of the project folder
+    storage_root_path = project_folder.get_storage_root()
+            
+    # now walk down, starting from the project level until we reach our entity 
+    # and create all the structure.
+    #
+    # we pass a list of folder objects to create, so that in the case an object has multiple
+    # children, the folder creation knows which object to create at that point.
+    #
+    # the shotgun_entity_data dictionary contains all the shotgun data needed in order to create
+    # all the folders down this particular recursion path
+    project_folder.create_folders(io_receiver, 
+                                  storage_root_path, 
+                                  shotgun_entity_data, 
+                                  True,
+                                  folder_objects_to_recurse,
+                                  engine)
 
 
 def synchronize_folders(tk, full_sync):
@@ -195,15 +247,8 @@ def process_filesystem_structure(tk, entity_type, entity_ids, preview, engine):
     # create an object to receive all IO requests
     io_receiver = FolderIOReceiver(tk, preview, entity_type, entity_ids)
 
-    # now loop over all individual objects and create folders
-    for i in items:        
-        create_single_folder_item(tk, 
-                                  config, 
-                                  io_receiver, 
-                                  i["type"], 
-                                  i["id"], 
-                                  i["sg_task_data"],
-                                  engine)
+    # now create folders for all the individual objects
+    create_folder_items(tk, config, io_receiver, items, engine)
 
     folders_created = io_receiver.execute_folder_creation()
     
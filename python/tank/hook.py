@@ -20,6 +20,7 @@ import urlparse
 import threading
 import urllib
 from .util.loader import load_plugin
+from . import constants
 from . import LogManager
 from .errors import (
     TankError,
@@ -453,6 +454,8 @@ class _HooksCache(object):
         Construction
         """
         self._cache = {}
+        # final hook classes, indexed by the hook paths they were loaded from
+        self._chains = {}
         self._cache_lock = threading.Lock()
 
     def thread_exclusive(func):
@@ -482,6 +485,7 @@ class _HooksCache(object):
         Clear the hook cache
         """
         self._cache = {}
+        self._chains = {}
 
     @thread_exclusive
     def find(self, hook_path, hook_base_class):
@@ -512,6 +516,26 @@ class _HooksCache(object):
         if key not in self._cache:
             self._cache[key] = hook_class
 
+    @thread_exclusive
+    def find_chain(self, hook_paths):
+        """
+        Find the hook class loaded from an inheritance chain of hooks
+
+        :param hook_paths:      Tuple of paths to hooks, in inheritance order
+        :returns:               The Hook class if found, None if not
+        """
+        return self._chains.get(hook_paths)
+
+    @thread_exclusive
+    def add_chain(self, hook_paths, hook_class):
+        """
+        Add the hook class loaded from an inheritance chain of hooks
+
+        :param hook_paths:      Tuple of paths to hooks, in inheritance order
+        :param hook_class:      The Hook class loaded from the last hook of the chain
+        """
+        self._chains.setdefault(hook_paths, hook_class)
+
     @thread_exclusive
     def __len__(self):
         """
@@ -528,6 +552,19 @@ def clear_hooks_cache():
     """
     _hooks_cache.clear()
 
+def is_hook_dev_mode():
+    """
+    Checks if hooks are being developed, in which case resolved hook
+    paths and hook classes are validated against the file system
+    every time a hook is used.
+
+    Hook development mode is enabled by setting the ``SGTK_HOOK_DEV_MODE``
+    environment variable.
+
+    :returns: True if hook development mode is enabled.
+    """
+    return bool(os.environ.get(constants.HOOK_DEV_MODE_ENV_VAR))
+
 def execute_hook(hook_path, parent, **kwargs):
     """
     Executes a hook, old-school style.
@@ -624,6 +661,16 @@ def create_hook_instance(hook_paths, parent):
                    app, engine or core object.
     :returns: Instance of the hook.
     """
+    # the classes of chains which were already loaded can be used as is,
+    # unless hooks are being developed and may have changed on disk.
+    chain_key = tuple(hook_paths)
+    dev_mode = is_hook_dev_mode()
+    if not dev_mode:
+        hook_class = _hooks_cache.find_chain(chain_key)
+        if hook_class:
+            _current_hook_baseclass.value = hook_class
+            return hook_class(parent)
+
     # keep track of the current base class - this is used when loading hooks to dynamically
     # inherit from the correct base.
     _current_hook_baseclass.value = Hook
@@ -633,8 +680,11 @@ def create_hook_instance(hook_paths, parent):
         if not os.path.exists(hook_path):
             raise TankFileDoesNotExistError("Cannot execute hook '%s' - this file does not exist on disk!" % hook_path)
 
-        # look to see if we've already loaded this hook into the cache
-        found_hook_class = _hooks_cache.find(hook_path, _current_hook_baseclass.value)
+        # look to see if we've already loaded this hook into the cache. In
+        # development mode, hooks are always loaded again from disk.
+        found_hook_class = None
+        if not dev_mode:
+            found_hook_class = _hooks_cache.find(hook_path, _current_hook_baseclass.value)
         if not found_hook_class:
             # load the hook class from the hook file and cache it - this explicitly looks for a
             # single class from the hook file that is derived from the current base (or 'Hook' for
@@ -654,12 +704,15 @@ def create_hook_instance(hook_paths, parent):
                 alternate_base_classes=alternate_base_classes
             )
 
-            # add it to the cache...
-            _hooks_cache.add(hook_path, _current_hook_baseclass.value, loaded_hook_class)
+            if dev_mode:
+                found_hook_class = loaded_hook_class
+            else:
+                # add it to the cache...
+                _hooks_cache.add(hook_path, _current_hook_baseclass.value, loaded_hook_class)
 
-            # ...and find it again - this is to avoid different threads ending up using
-            # different instances of the loaded class.
-            found_hook_class = _hooks_cache.find(hook_path, _current_hook_baseclass.value)
+                # ...and find it again - this is to avoid different threads ending up using
+                # different instances of the loaded class.
+                found_hook_class = _hooks_cache.find(hook_path, _current_hook_baseclass.value)
 
         # keep track of the current base class:
         _current_hook_baseclass.value = found_hook_class
@@ -667,6 +720,8 @@ def create_hook_instance(hook_paths, parent):
     # all class construction done. _current_hook_baseclass contains
     # the last class we iterated over. This is the one we want to
     # instantiate.
+    if not dev_mode:
+        _hooks_cache.add_chain(chain_key, _current_hook_baseclass.value)
 
     # instantiate the class
     return _current_hook_baseclass.value(parent)
@@ -14,10 +14,18 @@ all Tank items in the file system are kept.
 
 """
 
+from __future__ import with_statement
+
 import collections
+import contextlib
+import shutil
+import socket
 import sqlite3
 import sys
 import os
+import threading
+import time
+import uuid
 
 # use api json to cover py 2.5
 # todo - replace with proper external library  
@@ -29,6 +37,8 @@ from . import constants
 from .errors import TankError
 from . import LogManager
 from .util.login import get_current_user
+from .util import filesystem
+from .util.local_file_storage import LocalFileStorageManager
 
 # Shotgun field definitions to store the path cache data
 SHOTGUN_ENTITY = "FilesystemLocation"
@@ -41,6 +51,19 @@ SG_ENTITY_TYPE_FIELD = "linked_entity_type"
 SG_ENTITY_NAME_FIELD = "code"
 SG_PIPELINE_CONFIG_FIELD = "pipeline_configuration"
 
+# maximum number of host parameters sqlite allows in a single statement
+SQLITE_MAX_VARIABLES = 999
+
+# number of FilesystemLocation records to request from Shotgun at a time
+SYNC_PAGE_SIZE = 500
+
+# number of FilesystemLocation records to create in Shotgun at a time
+UPLOAD_BATCH_SIZE = 500
+
+# number of seconds after which journaled records claimed by a process which
+# never completed their upload can be uploaded by another process
+UPLOAD_CLAIM_TIMEOUT = 600
+
 log = LogManager.get_logger(__name__)
 
 class PathCache(object):
@@ -49,6 +72,12 @@ class PathCache(object):
     
     NOTE! This uses sqlite and the db is typically hosted on an NFS storage.
     Ensure that the code is developed with the constraints that this entails in mind.
+
+    If the ``SGTK_PATH_CACHE_LOCAL_REPLICA`` environment variable is set and the
+    path cache is synchronized with Shotgun, lookups are instead served from a
+    replica of the path cache kept on local disk. The replica is refreshed from
+    the Shotgun event log by :meth:`synchronize`, while new mappings are still
+    registered in the shared path cache before being added to the replica.
     """
     
     def __init__(self, tk):
@@ -58,8 +87,11 @@ class PathCache(object):
         :param tk: Toolkit API instance
         """
         self._connection = None
+        self._shared_pool = None
         self._tk = tk
         self._sync_with_sg = tk.pipeline_configuration.get_shotgun_path_cache_enabled()
+        # identifies the journaled records this instance is uploading
+        self._upload_owner = "%s %s %s" % (socket.gethostname(), os.getpid(), uuid.uuid4().hex)
 
         if tk.pipeline_configuration.has_associated_data_roots():
             self._path_cache_disabled = False
@@ -78,80 +110,19 @@ class PathCache(object):
         # will ensure that there is a valid folder and file on
         # disk, created with all the right permissions etc.
         path_cache_file = self._get_path_cache_location()
-        
-        self._connection = sqlite3.connect(path_cache_file)
-        
-        # this is to handle unicode properly - make sure that sqlite returns 
-        # str objects for TEXT fields rather than unicode. Note that any unicode
-        # objects that are passed into the database will be automatically
-        # converted to UTF-8 strs, so this text_factory guarantees that any character
-        # representation will work for any language, as long as data is either input
-        # as UTF-8 (byte string) or unicode. And in the latter case, the returned data
-        # will always be unicode.
-        self._connection.text_factory = str
-        
-        c = self._connection.cursor()
-        try:
-        
-            # get a list of tables in the current database
-            ret = c.execute("SELECT name FROM main.sqlite_master WHERE type='table';")
-            table_names = [x[0] for x in ret.fetchall()]
-            
-            if len(table_names) == 0:
-                # we have a brand new database. Create all tables and indices
-                c.executescript("""
-                    CREATE TABLE path_cache (entity_type text, entity_id integer, entity_name text, root text, path text, primary_entity integer);
-                
-                    CREATE INDEX path_cache_entity ON path_cache(entity_type, entity_id);
-                
-                    CREATE INDEX path_cache_path ON path_cache(root, path, primary_entity);
-                
-                    CREATE UNIQUE INDEX path_cache_all ON path_cache(entity_type, entity_id, root, path, primary_entity);
-                    
-                    CREATE TABLE event_log_sync (last_id integer);
-                    
-                    CREATE TABLE shotgun_status (path_cache_id integer, shotgun_id integer);
-                    
-                    CREATE UNIQUE INDEX shotgun_status_id ON shotgun_status(path_cache_id);
-                    """)
-                self._connection.commit()
-                
-            else:
-                
-                # we have an existing database! Ensure it is up to date
-                if "event_log_sync" not in table_names:
-                    # this is a pre-0.15 setup where the path cache does not have event log sync
-                    c.executescript("CREATE TABLE event_log_sync (last_id integer);")
-                    self._connection.commit()
-                
-                if "shotgun_status" not in table_names:
-                    # this is a pre-0.15 setup where the path cache does not have the shotgun_status table
-                    c.executescript("""CREATE TABLE shotgun_status (path_cache_id integer, shotgun_id integer);
-                                       CREATE UNIQUE INDEX shotgun_status_id ON shotgun_status(path_cache_id);""")
-                    self._connection.commit()
 
-                
-                # now ensure that some key fields that have been added during the dev cycle are there
-                ret = c.execute("PRAGMA table_info(path_cache)")
-                field_names = [x[1] for x in ret.fetchall()]
-                
-                # check for primary entity field - this was added back in 0.12.x
-                if "primary_entity" not in field_names:
-                    c.executescript("""
-                        ALTER TABLE path_cache ADD COLUMN primary_entity integer;
-                        UPDATE path_cache SET primary_entity=1;
-        
-                        DROP INDEX IF EXISTS path_cache_path;
-                        CREATE INDEX IF NOT EXISTS path_cache_path ON path_cache(root, path, primary_entity);
-                        
-                        DROP INDEX IF EXISTS path_cache_all;
-                        CREATE UNIQUE INDEX IF NOT EXISTS path_cache_all ON path_cache(entity_type, entity_id, root, path, primary_entity);
-                        """)
-        
-                    self._connection.commit()
-        
-        finally:
-            c.close()
+        # connections are pooled per path cache file and per thread, so
+        # that we don't have to reconnect to the database and verify its
+        # schema each time a path cache object is created.
+        replica_file = self._get_replica_location(path_cache_file)
+        if replica_file:
+            # reads are served from a local copy of the shared path cache
+            self._shared_pool = _ConnectionPool.get_pool(path_cache_file)
+            self._seed_replica(replica_file)
+            self._pool = _ConnectionPool.get_pool(replica_file, wal=True)
+        else:
+            self._pool = _ConnectionPool.get_pool(path_cache_file)
+        self._connection = self._pool.acquire()
 
     def _get_path_cache_location(self):
         """
@@ -203,6 +174,92 @@ class PathCache(object):
 
         return path
 
+    def _get_replica_location(self, path_cache_file):
+        """
+        Returns the location of the local path cache replica, creating
+        its parent folder if needed.
+
+        :param path_cache_file: Path to the shared path cache file.
+        :returns: The path to the replica file or None if no replica should be used.
+        """
+        if not os.environ.get(constants.PATH_CACHE_REPLICA_ENV_VAR):
+            return None
+
+        if not self._sync_with_sg:
+            # the replica is kept up to date using the shotgun event log
+            log.debug("Path cache is not synchronized with Shotgun, not using a local replica.")
+            return None
+
+        cache_root = LocalFileStorageManager.get_configuration_root(
+            self._tk.shotgun_url,
+            self._tk.pipeline_configuration.get_project_id(),
+            self._tk.pipeline_configuration.get_plugin_id(),
+            self._tk.pipeline_configuration.get_shotgun_id(),
+            LocalFileStorageManager.CACHE
+        )
+        path = os.path.join(cache_root, "path_cache_replica.db")
+
+        if os.path.normpath(path) == os.path.normpath(path_cache_file):
+            # the path cache is already local
+            return None
+
+        filesystem.ensure_folder_exists(cache_root)
+        return path
+
+    def _seed_replica(self, replica_file):
+        """
+        Initializes a missing local replica with a copy of the shared path cache,
+        so that it can be brought up to date with an incremental sync.
+
+        :param replica_file: Path to the replica file.
+        """
+        if os.path.exists(replica_file) and os.path.getsize(replica_file) > 0:
+            return
+
+        log.debug("Creating local path cache replica %s..." % replica_file)
+
+        connection = self._shared_pool.acquire()
+        # copy to a temporary file and move it into place, so that
+        # other processes never pick up a partially written replica.
+        temp_file = "%s.%s.tmp" % (replica_file, os.getpid())
+        isolation_level = connection.isolation_level
+        connection.isolation_level = None
+        try:
+            # hold a shared lock while copying to make sure
+            # that no other process is writing to the database.
+            connection.execute("BEGIN")
+            try:
+                connection.execute("SELECT count(*) FROM event_log_sync").fetchall()
+                shutil.copyfile(self._shared_pool.path, temp_file)
+            finally:
+                connection.execute("ROLLBACK")
+        finally:
+            connection.isolation_level = isolation_level
+            self._shared_pool.release(connection)
+
+        try:
+            os.rename(temp_file, replica_file)
+        except OSError:
+            # another process created the replica first
+            os.remove(temp_file)
+
+    @contextlib.contextmanager
+    def _shared_database(self):
+        """
+        Context manager which redirects all database operations to the
+        shared path cache while in use. Only valid when using a local replica.
+        """
+        replica_pool = self._pool
+        replica_connection = self._connection
+        self._pool = self._shared_pool
+        self._connection = self._shared_pool.acquire()
+        try:
+            yield
+        finally:
+            self._shared_pool.release(self._connection)
+            self._pool = replica_pool
+            self._connection = replica_connection
+
     def _path_to_dbpath(self, relative_path):
         """
         converts a  relative path to a db path form
@@ -268,10 +325,28 @@ class PathCache(object):
     def close(self):
         """
         Close the database connection.
+
+        The underlying sqlite connection is pooled and will be reused by
+        other path cache instances created by the same thread.
         """
         if self._connection is not None:
-            self._connection.close()
+            self._pool.release(self._connection)
             self._connection = None
+
+    def get_modification_token(self):
+        """
+        Returns a token which changes whenever the path cache database is
+        modified, either by this process or by another one. Comparing tokens
+        makes it possible to detect if data derived from the path cache is
+        out of date.
+
+        This method can still be called once the path cache has been closed.
+
+        :returns: Hashable token or None if the path cache is disabled.
+        """
+        if self._path_cache_disabled:
+            return None
+        return self._pool.get_modification_token()
                 
     ############################################################################################
     # shotgun synchronization (SG data pushed into path cache database)
@@ -291,6 +366,8 @@ class PathCache(object):
                     - entity
                     - metadata 
                     - path
+                  After a full sync, an iterator reading the items from the path cache
+                  is returned instead, since all the records of the project are new.
         """
 
         if self._path_cache_disabled:
@@ -300,11 +377,31 @@ class PathCache(object):
         if not self._sync_with_sg:
             log.debug("Folder synchronization is turned off for this project.")
             return []
-                
+
+        return self._synchronize(full_sync)
+
+    def _synchronize(self, full_sync):
+        """
+        Synchronizes the database currently in use with Shotgun.
+        See :meth:`synchronize` for details.
+
+        :param full_sync: Boolean to indicate that a full sync should be carried out. 
+        :returns: A list of remote items which were detected, created remotely
+                  and not existing in the database.
+        """
         c = self._connection.cursor()
         
         try:
 
+            # first complete any interrupted upload, so that the records 
+            # don't get lost. Records still being uploaded by the process
+            # which created them are left alone. Our own event log entries
+            # will be replayed by the sync, so the sync marker is left alone.
+            try:
+                self._process_upload_journal(c, update_sync_marker=False)
+            except TankError, e:
+                log.warning("Could not upload pending path cache records to Shotgun: %s" % e)
+
             # check if we should do a full sync
             if full_sync:
                 return self._do_full_sync(c)
@@ -387,12 +484,7 @@ class PathCache(object):
                 log.debug("Path cache syncing not necessary - local folders already up to date!")
                 return []
             
-            elif num_deletions > 0:
-                # some stuff was deleted. fall back on full sync
-                log.debug("Deletions detected, doing full sync")
-                return self._do_full_sync(c)
-            
-            elif num_creations > 0:
+            elif num_creations > 0 or num_deletions > 0:
                 # we have a complete trail of increments. 
                 # note that we skip the current entity.
                 log.debug("Full event log history traced. Running incremental sync.")
@@ -405,11 +497,12 @@ class PathCache(object):
         finally:       
             c.close()
 
-    def _upload_cache_data_to_shotgun(self, data, event_log_desc):
+    def _upload_cache_data_to_shotgun(self, data, event_log_desc, batch_size=None):
         """
-        Takes a standard chunk of Shotgun data and uploads it to Shotgun
-        using a single batch statement. Then writes a single event log entry record
-        which binds the created path records. Returns the id of this event log record.
+        Takes a standard chunk of Shotgun data and uploads it to Shotgun.
+        The data is split into batches of at most batch_size records. Each batch is
+        uploaded using a single batch statement, followed by a single event log entry 
+        record which binds the created path records.
         
         data needs to be a list of dicts with the following keys:
         - entity - std sg entity dict with name, id and type
@@ -419,23 +512,63 @@ class PathCache(object):
         - path_cache_row_id - the path cache db row id for the entry
         
         :param data: List of dicts. See details above.
-        :param event_log_desc: Description to add to the event log entry created.
+        :param event_log_desc: Description to add to the event log entries created.
+        :param batch_size: Maximum number of records to upload in a single request.
+                           Defaults to ``UPLOAD_BATCH_SIZE``.
         :returns: A tuple with (event_log_id, sg_id_lookup)
-                  - event_log_id is the id for the event log entry which summarizes the 
+                  - event_log_id is the id for the last event log entry which summarizes the 
                     creation event.
                   - sg_id_lookup is a dictionary where the keys are path cache row ids 
                     and the values are the newly created corresponding shotgun ids. 
         """
+        batch_size = batch_size or UPLOAD_BATCH_SIZE
+        
+        # the user is the same for all the records
+        created_by = get_current_user(self._tk)
+        
+        event_log_id = None
+        sg_id_lookup = {}
+        
+        for start in range(0, len(data), batch_size):
+            chunk = data[start:start + batch_size]
+            if len(data) > batch_size:
+                log.debug("Uploading batch %d/%d..." % (start / batch_size + 1, 
+                                                        (len(data) + batch_size - 1) / batch_size))
+            created_ids = self._create_folder_entities(chunk, created_by)
+            event_log_id = self._create_folder_event([sg_id for (_, sg_id) in created_ids], 
+                                                     event_log_desc, 
+                                                     created_by)
+            sg_id_lookup.update(created_ids)
+        
+        return (event_log_id, sg_id_lookup)
+
+    def _get_pipeline_configuration_link(self):
+        """
+        Returns the pipeline configuration link dictionary.
 
+        :returns: None for an unmanaged pipeline configuration. Otherwise, a dictionary
+            with keys "type" and "id".
+        """
         if self._tk.pipeline_configuration.is_unmanaged():
             # no pipeline config for this one
-            pc_link = None
+            return None
         else:
-            pc_link = {
+            return {
                 "type": "PipelineConfiguration",
                 "id": self._tk.pipeline_configuration.get_shotgun_id()
             }
 
+    def _create_folder_entities(self, data, created_by):
+        """
+        Creates FilesystemLocation records in Shotgun using a single batch statement.
+        
+        :param data: List of dicts. See :meth:`_upload_cache_data_to_shotgun`.
+        :param created_by: Shotgun user entity dict, or None.
+        :returns: A list of (path_cache_row_id, shotgun_id) tuples in the order of data.
+        """
+        pc_link = self._get_pipeline_configuration_link()
+        project_link = self._get_project_link()
+
         sg_batch_data = []
         for d in data:
                             
@@ -447,8 +580,8 @@ class PathCache(object):
             
             req = {"request_type":"create", 
                    "entity_type": SHOTGUN_ENTITY, 
-                   "data": {"project": self._get_project_link(),
-                            "created_by": get_current_user(self._tk),
+                   "data": {"project": project_link,
+                            "created_by": created_by,
                             SG_ENTITY_FIELD: d["entity"],
                             SG_IS_PRIMARY_FIELD: d["primary"],
                             SG_PIPELINE_CONFIG_FIELD: pc_link,
@@ -470,38 +603,52 @@ class PathCache(object):
             raise TankError("Critical! Could not update Shotgun with folder "
                             "data. Please contact support. Error details: %s" % e)
         
-        # now create a dictionary where input path cache rowid (path_cache_row_id)
-        # is mapped to the shotgun ids that were just created
-        def _rowid_from_path(path):
-            for d in data:
-                if d["path"] == path:
-                    return d["path_cache_row_id"] 
-            raise TankError("Could not resolve row id for path! Please contact support! "
-                            "trying to resolve path '%s'. Source data set: %s" % (path, data))
-        
-        rowid_sgid_lookup = {}
-        for sg_obj in response:
-            sg_id = sg_obj["id"]
-            pc_row_id = _rowid_from_path( sg_obj[SG_PATH_FIELD]["local_path"] )
-            rowid_sgid_lookup[pc_row_id] = sg_id
-        
-        # now register the created ids in the event log
-        # this will later on be read by the synchronization            
-        # now, based on the entities we just created, assemble a metadata chunk that 
+        # now map each input path cache rowid (path_cache_row_id) to the 
+        # shotgun id that was just created. Batch results are returned in 
+        # the order of the requests, the paths are looked up as a fallback.
+        rowid_by_path = {}
+        for d in data:
+            rowid_by_path.setdefault(d["path"], d["path_cache_row_id"])
+        
+        created_ids = []
+        for (d, sg_obj) in zip(data, response):
+            path = sg_obj[SG_PATH_FIELD]["local_path"]
+            if path == d["path"]:
+                pc_row_id = d["path_cache_row_id"]
+            elif path in rowid_by_path:
+                pc_row_id = rowid_by_path[path]
+            else:
+                raise TankError("Could not resolve row id for path! Please contact support! "
+                                "trying to resolve path '%s'. Source data set: %s" % (path, data))
+            created_ids.append((pc_row_id, sg_obj["id"]))
+        
+        return created_ids
+
+    def _create_folder_event(self, sg_ids, event_log_desc, user):
+        """
+        Registers created FilesystemLocation ids in the event log.
+        This will later on be read by the synchronization.
+        
+        :param sg_ids: List of FilesystemLocation ids.
+        :param event_log_desc: Description to add to the event log entry.
+        :param user: Shotgun user entity dict, or None.
+        :returns: The id of the event log entry created.
+        """
+        # based on the entities we just created, assemble a metadata chunk that 
         # the sync calls can use later on.        
         meta = {}
         # the api version used is always useful to know
         meta["core_api_version"] = self._tk.version
         # shotgun ids created
-        meta["sg_folder_ids"] = [ x["id"] for x in response]
+        meta["sg_folder_ids"] = sg_ids
         
         sg_event_data = {}
         sg_event_data["event_type"] = "Toolkit_Folders_Create"
         sg_event_data["description"] = "Toolkit %s: %s" % (self._tk.version, event_log_desc)
         sg_event_data["project"] = self._get_project_link()
-        sg_event_data["entity"] = pc_link
+        sg_event_data["entity"] = self._get_pipeline_configuration_link()
         sg_event_data["meta"] = meta        
-        sg_event_data["user"] = get_current_user(self._tk)
+        sg_event_data["user"] = user
     
         try:
             log.debug("Creating event log entry %s" % sg_event_data)
@@ -511,7 +658,7 @@ class PathCache(object):
                             "history marker. Please contact support. Error details: %s" % e)            
         
         # return the event log id which represents this uploaded slab
-        return (response["id"], rowid_sgid_lookup)
+        return response["id"]
 
     def _get_project_link(self):
         """
@@ -532,9 +679,9 @@ class PathCache(object):
         """
         Ensure the local path cache is in sync with Shotgun.
         
-        Returns a list of remote items which were detected, created remotely
-        and not existing in this path cache. These are returned as a list of 
-        dictionaries, each containing keys:
+        Returns an iterator over the remote items which were detected, created 
+        remotely and not existing in this path cache. These are dictionaries, 
+        each containing keys:
             - entity
             - metadata 
             - path
@@ -580,7 +727,8 @@ class PathCache(object):
         
         Assumptions:
         - sg_data list always contains some entries
-        - sg_data list only contains Toolkit_Folders_Create records
+        - sg_data list only contains Toolkit_Folders_Create and 
+          Toolkit_Folders_Delete records
         
         This is a list of dicts ordered by id from low to high (old to new), 
         each with keys
@@ -614,21 +762,70 @@ class PathCache(object):
         max_event_log_id = max( [x["id"] for x in sg_data] )
         
         created_folder_ids = []
+        deleted_folder_ids = set()
         for d in sg_data:
             log.debug("Looking at event log entry %s" % d)
             if d["event_type"] == "Toolkit_Folders_Create":
                 # this is a creation request! Replay it on our database
                 created_folder_ids.extend( d["meta"]["sg_folder_ids"] )
+            elif d["event_type"] == "Toolkit_Folders_Delete":
+                # this is a deletion request! Shotgun never reuses ids, so
+                # we can simply remove these records from our database and
+                # ignore any creation of them earlier on in the event range.
+                deleted_folder_ids.update( d["meta"]["sg_folder_ids"] )
             else:
                 # should never come here
                 raise Exception("Unsupported event type '%s'" % d)
         log.debug("Event log analysis complete.")
         
+        created_folder_ids = [x for x in created_folder_ids if x not in deleted_folder_ids]
+        
+        num_removed = 0
+        if deleted_folder_ids:
+            log.debug("The following FilesystemLocation ids have been deleted: %s" % sorted(deleted_folder_ids))
+            num_removed = self._remove_folder_entities(cursor, sorted(deleted_folder_ids))
+        
         log.debug("The following FilesystemLocation ids need replaying: %s" % created_folder_ids)
         
         # run the actual sync - and at the end, inser the event_log_sync data marker
         # into the database to show where to start syncing from next time.
-        return self._replay_folder_entities(cursor, max_event_log_id, created_folder_ids)
+        return_data = self._replay_folder_entities(cursor, max_event_log_id, created_folder_ids)
+        
+        if num_removed:
+            self._pool.notify_modified()
+        
+        return return_data
+
+    def _remove_folder_entities(self, cursor, ids):
+        """
+        Removes the path cache records associated with a list of 
+        FilesystemLocation ids. Changes are not committed.
+
+        :param cursor: Sqlite database cursor
+        :param ids: List of FilesystemLocation ids to remove.
+        :returns: Number of path cache records removed.
+        """
+        num_removed = 0
+        
+        # sqlite limits the number of variables allowed in a single statement
+        for start in range(0, len(ids), SQLITE_MAX_VARIABLES):
+            chunk = ids[start:start + SQLITE_MAX_VARIABLES]
+            placeholders = ", ".join(["?"] * len(chunk))
+            
+            res = cursor.execute("SELECT path_cache_id FROM shotgun_status "
+                                 "WHERE shotgun_id IN (%s)" % placeholders, chunk)
+            row_ids = [x[0] for x in res]
+            
+            cursor.execute("DELETE FROM shotgun_status "
+                           "WHERE shotgun_id IN (%s)" % placeholders, chunk)
+            
+            if row_ids:
+                cursor.execute("DELETE FROM path_cache "
+                               "WHERE rowid IN (%s)" % ", ".join(["?"] * len(row_ids)), row_ids)
+                num_removed += cursor.rowcount
+        
+        log.debug("Removed %s records from the path cache." % num_removed)
+        return num_removed
 
 
     def _replay_folder_entities(self, cursor, max_event_log_id, ids=None):
@@ -652,28 +849,21 @@ class PathCache(object):
                     - entity
                     - metadata 
                     - path
+                  For a full sync, an iterator over these items is returned instead.
         
         """
         log.debug("Fetching already registered folders from Shotgun...")
         
-        sg_data = []
-        
         if ids is None:
             # get all folder data from shotgun
             log.debug(
                 "Doing a full sync, so getting all the FilesystemLocations for the current project..."
             )
-            sg_data = self._tk.shotgun.find(SHOTGUN_ENTITY, 
-                                  [["project", "is", self._get_project_link()]],
-                                  ["id",
-                                   SG_METADATA_FIELD, 
-                                   SG_IS_PRIMARY_FIELD, 
-                                   SG_ENTITY_ID_FIELD,
-                                   SG_PATH_FIELD,
-                                   SG_ENTITY_TYPE_FIELD, 
-                                   SG_ENTITY_NAME_FIELD],
-                                  [{"field_name": "id", "direction": "asc"},])
-        elif ids == []:
+            return self._replay_all_folder_entities(cursor, max_event_log_id)
+
+        sg_data = []
+        
+        if ids == []:
             # incremental sync but with no folders
             log.debug("No folders need to be replayed, won't fetch anything from Shotgun...")
         
@@ -687,102 +877,20 @@ class PathCache(object):
             
             id_in_filter = ["id", "in"]
             id_in_filter.extend(ids)
-            sg_data = self._tk.shotgun.find(SHOTGUN_ENTITY, 
-                                  [id_in_filter],
-                                  ["id",
-                                   SG_METADATA_FIELD, 
-                                   SG_IS_PRIMARY_FIELD, 
-                                   SG_ENTITY_ID_FIELD,
-                                   SG_PATH_FIELD,
-                                   SG_ENTITY_TYPE_FIELD, 
-                                   SG_ENTITY_NAME_FIELD],
-                                  [{"field_name": "id", "direction": "asc"},])
-        
-        log.debug("...Retrieved %s records." % len(sg_data))
-            
-        # now start a single transaction in which we do all our work
-        if ids is None:
-            # complete sync - clear our tables first
-            log.debug("Full sync - clearing local sqlite path cache tables...")
-            cursor.execute("DELETE FROM event_log_sync")
-            cursor.execute("DELETE FROM shotgun_status")
-            cursor.execute("DELETE FROM path_cache")
-            
+            sg_data = self._iter_folder_entities([id_in_filter])
+        
         return_data = []
+        num_records = 0
             
         for x in sg_data:
             
-            # get entity data from our entry            
-            entity = {"id":   x[SG_ENTITY_ID_FIELD],
-                      "name": x[SG_ENTITY_NAME_FIELD],
-                      "type": x[SG_ENTITY_TYPE_FIELD]}
-            is_primary = x[SG_IS_PRIMARY_FIELD]
-            
-            # note! If a local storage which is associated with a path is retired,
-            # parts of the entity data returned by shotgun will be omitted.
-            # 
-            # A valid, active path entry will be on the form:
-            #  {'id': 653,
-            #   'path': {'content_type': None,
-            #            'id': 2186,
-            #            'link_type': 'local',
-            #            'local_path': '/Volumes/xyz/proj1/sequences/aaa',
-            #            'local_path_linux': '/Volumes/xyz/proj1/sequences/aaa',
-            #            'local_path_mac': '/Volumes/xyz/proj1/sequences/aaa',
-            #            'local_path_windows': None,
-            #            'local_storage': {'id': 2,
-            #                              'name': 'primary',
-            #                              'type': 'LocalStorage'},
-            #            'name': '[primary] /sequences/aaa',
-            #            'type': 'Attachment',
-            #            'url': 'file:///Volumes/xyz/proj1/sequences/aaa'},
-            #   'type': 'FilesystemLocation'},
-            #
-            # With a retired storage, the returned data from the SG API is
-            #  {'id': 646,
-            #   'path': {'content_type': None,
-            #            'id': 2141,
-            #            'link_type': 'local',
-            #            'local_storage': None,
-            #            'name': '[primary] /sequences/aaa/missing',
-            #            'type': 'Attachment'},
-            #   'type': 'FilesystemLocation'},
-            #
+            num_records += 1
             
-            # no path at all - this is an anomaly but handle it gracefully regardless
-            if x[SG_PATH_FIELD] is None:
-                log.debug("No path associated with entry for %s. Skipping." % entity)
+            record = self._resolve_folder_entity(x)
+            if record is None:
                 continue
             
-            # retired storage case - see above for details
-            if x[SG_PATH_FIELD].get("local_storage") is None:
-                log.debug("The storage for the path for %s has been deleted. Skipping." % entity)
-                continue
-                
-            # get the local path from our attachment entity dict
-            sg_local_storage_os_map = {"linux2": "local_path_linux", 
-                                       "win32": "local_path_windows", 
-                                       "darwin": "local_path_mac" }
-            local_os_path_field = sg_local_storage_os_map[sys.platform]
-            local_os_path = x[SG_PATH_FIELD].get(local_os_path_field)
-
-            # if the storage is not correctly configured for an OS, it is possible
-            # that the path comes back as null. Skip such paths and report them in the log.
-            if local_os_path is None:
-                log.debug("No local os path associated with entry for %s. Skipping." % entity)
-                continue
-
-            # if the path cannot be split up into a root_name and a leaf path
-            # using the roots.yml file, log a warning and continue. This can happen
-            # if roots files and storage setups change half-way through a project,
-            # or if roots files are not in sync with the main storage definition
-            # in this case, we want to just warn and skip rather than raise
-            # an exception which will stop execution entirely.
-            try:
-                root_name, relative_path = self._separate_root(local_os_path)
-            except TankError, e:
-                log.debug("Could not resolve storages - skipping: %s" % e)
-                continue
+            (entity, is_primary, local_os_path) = record
             
             # all validation checks seem ok - go ahead and make the changes.
             new_rowid = self._add_db_mapping(cursor, local_os_path, entity, is_primary)
@@ -804,6 +912,8 @@ class PathCache(object):
                 # not necessarily an anomaly. It could also happen because a previos sync failed
                 # at some point half way through.
                 log.debug("Found existing record for '%s', %s. Skipping." % (local_os_path, entity))
+        
+        log.debug("...Retrieved %s records." % num_records)
             
         # lastly, id of this event log entry for purpose of future syncing
         # note - we don't maintain a list of event log entries but just a single
@@ -813,125 +923,548 @@ class PathCache(object):
         cursor.execute("INSERT INTO event_log_sync(last_id) VALUES(?)", (max_event_log_id, ))
             
         self._connection.commit()
+        if return_data:
+            self._pool.notify_modified()
 
         return return_data
 
-    ############################################################################################
-    # pre-insertion validation
-
-    def validate_mappings(self, data):
+    def _replay_all_folder_entities(self, cursor, max_event_log_id):
         """
-        Checks a series of path mappings to ensure that they don't conflict with
-        existing path cache data.
+        Replaces the contents of the path cache with all the FilesystemLocations
+        for the current project.
         
-        :param data: list of dictionaries. Each dictionary should contain 
-                     the following keys:
-                      - entity: a dictionary with keys name, id and type
-                      - path: a path on disk
-                      - primary: a boolean indicating if this is a primary entry
-                      - metadata: configuration metadata
+        Records are streamed from Shotgun one page at a time and bulk inserted
+        into a temporary staging table. The path cache table is then populated
+        from the staging table in a single statement, with its lookup indexes
+        dropped during the load and rebuilt at the end. Everything happens in a
+        single transaction, so concurrent readers either see the previous or the
+        fully synced state of the path cache.
+        
+        The records are processed with the same rules as :meth:`_add_db_mapping`:
+        duplicate records are skipped, secondary records that duplicate an
+        existing record for the same entity are skipped and conflicting primary
+        records raise an error.
+
+        :param cursor: Sqlite database cursor
+        :param max_event_log_id: max event log marker to write to the path
+                                 cache database after the sync.
+        :returns: An iterator over the remote items which were added to the path cache.
+                  See :meth:`_iter_synced_records`.
         """
-        for d in data:
-            self._validate_mapping(d["path"], d["entity"], d["primary"])
+        # the python sqlite module commits implicitly before DDL statements.
+        # Switch to manual transaction handling so that the index and staging
+        # table changes are part of the same transaction as the data.
+        isolation_level = self._connection.isolation_level
+        self._connection.isolation_level = None
+        
+        try:
+            cursor.execute("BEGIN")
+            try:
+                self._bulk_load_folder_entities(cursor, max_event_log_id)
+            except:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+        finally:
+            self._connection.isolation_level = isolation_level
         
+        self._pool.notify_modified()
         
-    def _validate_mapping(self, path, entity, is_primary):
+        return self._iter_synced_records()
+
+    def _iter_synced_records(self):
         """
-        Consistency checks happening prior to folder creation. May raise a TankError
-        if an inconsistency is detected.
-        
-        :param path: The path calculated
-        :param entity: Sg entity dict with keys id, type and name
-        :param is_primary: indicates that this is a primary mapping - each folder may have
-                           both primary and secondary entity associations - the secondary
-                           being more loosely tied to the path.
+        Generator returning the path cache records registered in Shotgun, in the
+        format returned by :meth:`synchronize`. The records are read from the 
+        database one page at a time, so that the memory used doesn't grow with
+        the size of the project.
+
+        :returns: Generator of dictionaries with keys entity, metadata and path.
         """
+        last_id = 0
         
-        # Make sure that there isn't already a record with the same
-        # name in the database and file system, but with a different id.
-        # We only do this for primary items - for secondary items, multiple items can exist
-        if is_primary:
-            entity_in_db = self.get_entity(path)
+        while True:
+            c = self._connection.cursor()
+            try:
+                rows = list(c.execute("""SELECT p.rowid, p.entity_type, p.entity_id, p.entity_name, 
+                                             p.root, p.path 
+                                      FROM path_cache AS p 
+                                      JOIN shotgun_status AS s ON s.path_cache_id = p.rowid 
+                                      WHERE p.rowid > ? 
+                                      ORDER BY p.rowid 
+                                      LIMIT ?""", (last_id, SYNC_PAGE_SIZE)))
+            finally:
+                c.close()
             
-            if entity_in_db is not None:
-                if entity_in_db["id"] != entity["id"] or entity_in_db["type"] != entity["type"]:
-                    
-                    # there is already a record in the database for this path,
-                    # but associated with another entity! Display an error message
-                    # and ask that the user investigates using special tank commands.
-                    #
-                    # Note! We are only comparing against the type and the id
-                    # not against the name. It should be perfectly valid to rename something
-                    # in shotgun and if folders are then recreated for that item, nothing happens
-                    # because there is already a folder which represents that item. (although now with 
-                    # an incorrect name)
+            if not rows:
+                return
+            
+            for (row_id, entity_type, entity_id, entity_name, root_name, db_path) in rows:
+                root_path = self._roots.get(root_name)
+                if not root_path:
+                    # The root name doesn't match a recognized name, so skip this entry
+                    continue
+                # convert to string, not unicode!
+                yield {"entity": {"type": str(entity_type), "id": entity_id, "name": str(entity_name)},
+                       "path": self._dbpath_to_path(root_path, db_path),
+                       "metadata": SG_METADATA_FIELD}
+            
+            last_id = rows[-1][0]
 
-                    msg  = "The path '%s' cannot be processed because it is already associated " % path
-                    msg += "with %s '%s' (id %s) in Shotgun. " % (entity_in_db["type"], entity_in_db["name"], entity_in_db["id"])
-                    msg += "You are now trying to associate it with %s '%s' (id %s). " % (entity["type"], entity["name"], entity["id"])
-                    msg += "If you want to unregister your previously created folders, you can run "
-                    msg += "the following command: 'tank unregister_folders %s' " % path
-                    raise TankError(msg)
-                
-        # Check 2. Check if a folder for this shot has already been created,
-        # but with another name. This can happen if someone
-        # - creates a shot AAA
-        # - creates folders on disk for Shot AAA
-        # - renamed the shot to BBB
-        # - tries to create folders. Now we don't want to create folders for BBB,
-        #   since we already have a location on disk for this shot. 
-        #
-        # note: this can also happen if the folder creation rules change.
-        #
-        # we only check for primary entities, doing the check for secondary
-        # would only be to carry out the same check twice.
-        if is_primary:
-            for p in self.get_paths(entity["type"], entity["id"], primary_only=False):
-                # so we got a path that matches our entity
-                if p != path and os.path.dirname(p) == os.path.dirname(path):
-                    # this path is identical to our path we are about to create except for the name. 
-                    # there is still a folder on disk. Abort folder creation
-                    # with a descriptive error message
-                    msg  = "The path '%s' cannot be created because another " % path
-                    msg += "path '%s' is already associated with %s %s. " % (p, entity["type"], entity["name"])
-                    msg += "This typically happens if an item in Shotgun is renamed or "
-                    msg += "if the path naming in the folder creation configuration "
-                    msg += "is changed. In order to continue you can either change "
-                    msg += "the %s back to its previous name or you can unregister " % entity["type"]
-                    msg += "the currently associated folders by running the following command: "
-
-                    # Steps are a special case. We need to tell the user to unregister the
-                    # conflicting path directly rather than by entity. The reason for this is
-                    # is two fold: running the unregister on the folder directly will properly
-                    # handle the underlying Task folders beneath the Step. Also, we have some
-                    # logic that assumes an entity being unregistered has a Project, and that
-                    # isn't the case for Step entities. All in all, this is the right thing for
-                    # a user to do to resolve the renamed Step entity's folder situation.
-                    if entity["type"] == "Step":
-                        msg += "'tank unregister_folders %s' and then try again." % p
-                    else:
-                        msg += "'tank %s %s unregister_folders' and then try again." % (
-                            entity["type"],
-                            entity["name"]
-                        )                    
-                    raise TankError(msg)
+    def _bulk_load_folder_entities(self, cursor, max_event_log_id):
+        """
+        Performs the inserts for :meth:`_replay_all_folder_entities`.
+        Expects to be executed inside a transaction.
 
+        :param cursor: Sqlite database cursor
+        :param max_event_log_id: max event log marker to write to the path
+                                 cache database.
+        """
+        # complete sync - clear our tables first
+        log.debug("Full sync - clearing local sqlite path cache tables...")
+        cursor.execute("DELETE FROM event_log_sync")
+        # note: the journal is saved after the first write, so that the write 
+        # lock is acquired straight away and concurrent syncs wait for each other.
+        # The records which haven't been uploaded yet are journaled again once
+        # the path cache has been reloaded.
+        cursor.execute("DROP TABLE IF EXISTS temp.journal_staging")
+        cursor.execute("""CREATE TEMP TABLE journal_staging AS 
+                          SELECT j.metadata, j.description, j.sent, 
+                                 p.entity_type, p.entity_id, p.entity_name, 
+                                 p.root, p.path, p.primary_entity 
+                          FROM upload_journal AS j 
+                          JOIN path_cache AS p ON p.rowid = j.path_cache_id 
+                          ORDER BY j.path_cache_id""")
+        cursor.execute("DELETE FROM upload_journal")
+        cursor.execute("DELETE FROM shotgun_status")
+        cursor.execute("DELETE FROM path_cache")
+        
+        # defer maintenance of the lookup indexes until all data has been
+        # inserted. The unique index is kept since it is used to skip duplicates.
+        cursor.execute("DROP INDEX IF EXISTS path_cache_entity")
+        cursor.execute("DROP INDEX IF EXISTS path_cache_path")
+        
+        cursor.execute("DROP TABLE IF EXISTS temp.sync_staging")
+        cursor.execute("""CREATE TEMP TABLE sync_staging (shotgun_id integer primary key, 
+                                                          entity_type text, 
+                                                          entity_id integer, 
+                                                          entity_name text, 
+                                                          root text, 
+                                                          path text, 
+                                                          primary_entity integer)""")
+        
+        num_records = 0
+        
+        for page in self._iter_folder_entity_pages([["project", "is", self._get_project_link()]]):
+            
+            num_records += len(page)
+            
+            rows = []
+            for x in page:
+                record = self._resolve_folder_entity(x)
+                if record is None:
+                    continue
+                
+                (entity, is_primary, local_os_path) = record
+                root_name, relative_path = self._separate_root(local_os_path)
+                db_path = self._path_to_dbpath(relative_path)
+                
+                rows.append((x["id"], 
+                             entity["type"], 
+                             entity["id"], 
+                             entity["name"], 
+                             root_name, 
+                             db_path, 
+                             is_primary))
+            
+            cursor.executemany("INSERT INTO sync_staging(shotgun_id, entity_type, entity_id, entity_name, "
+                               "root, path, primary_entity) VALUES(?, ?, ?, ?, ?, ?, ?)", rows)
+        
+        log.debug("...Retrieved %s records." % num_records)
+        
+        # now insert all records in shotgun order. The unique index on
+        # the path cache table ensures that duplicates are skipped.
+        cursor.execute("""INSERT OR IGNORE INTO path_cache(entity_type, 
+                                                           entity_id, 
+                                                           entity_name, 
+                                                           root, 
+                                                           path, 
+                                                           primary_entity)
+                          SELECT entity_type, entity_id, entity_name, root, path, primary_entity
+                          FROM sync_staging ORDER BY shotgun_id""")
+        
+        log.debug("Rebuilding path cache indices...")
+        cursor.execute("CREATE INDEX path_cache_entity ON path_cache(entity_type, entity_id)")
+        cursor.execute("CREATE INDEX path_cache_path ON path_cache(root, path, primary_entity)")
+        
+        # only one primary entity is allowed per path
+        res = list(cursor.execute("""SELECT root, path FROM path_cache 
+                                     WHERE primary_entity = 1 
+                                     GROUP BY root, path 
+                                     HAVING count(*) > 1 
+                                     LIMIT 1"""))
+        if res:
+            raise TankError("Database concurrency problems: The path '%s' in storage '%s' is "
+                            "associated with more than one Shotgun entity. Please re-run "
+                            "folder creation to try again." % (res[0][1], res[0][0]))
+        
+        # a secondary record is redundant if the same path was 
+        # already registered as the primary path for the entity
+        cursor.execute("""DELETE FROM path_cache 
+                          WHERE primary_entity = 0 AND EXISTS 
+                          (SELECT 1 FROM path_cache AS p 
+                           WHERE p.entity_type = path_cache.entity_type 
+                           AND p.entity_id = path_cache.entity_id 
+                           AND p.root = path_cache.root 
+                           AND p.path = path_cache.path 
+                           AND p.primary_entity = 1 
+                           AND p.rowid < path_cache.rowid)""")
+        
+        # because these records came from shotgun, insert records in the
+        # shotgun_status table to indicate that they exist in sg. For duplicate
+        # records, the first shotgun record is associated with the path cache entry.
+        cursor.execute("""INSERT OR IGNORE INTO shotgun_status(path_cache_id, shotgun_id) 
+                          SELECT p.rowid, s.shotgun_id 
+                          FROM sync_staging AS s 
+                          JOIN path_cache AS p 
+                          ON p.entity_type = s.entity_type 
+                          AND p.entity_id = s.entity_id 
+                          AND p.root = s.root 
+                          AND p.path = s.path 
+                          AND p.primary_entity = s.primary_entity 
+                          ORDER BY s.shotgun_id""")
+        
+        # records without a shotgun_status entry were skipped
+        skipped_ids = set(x[0] for x in cursor.execute(
+            "SELECT shotgun_id FROM sync_staging "
+            "WHERE shotgun_id NOT IN (SELECT shotgun_id FROM shotgun_status)"
+        ))
+        if skipped_ids:
+            log.debug("Found existing records for FilesystemLocations %s. Skipping." % sorted(skipped_ids))
+        
+        cursor.execute("DROP TABLE temp.sync_staging")
+        
+        self._restore_upload_journal(cursor)
+        
+        # lastly, id of this event log entry for purpose of future syncing
+        log.debug("Inserting path cache marker %s in the sqlite db" % max_event_log_id)
+        cursor.execute("INSERT INTO event_log_sync(last_id) VALUES(?)", (max_event_log_id, ))
 
+    def _restore_upload_journal(self, cursor):
+        """
+        Adds the journaled records saved by :meth:`_bulk_load_folder_entities`
+        back to the path cache and to the upload journal.
 
-    ############################################################################################
-    # database insertion methods
+        Records which are in Shotgun already and were never sent by the upload
+        journal are not journaled again. Primary records conflicting with a 
+        record from Shotgun are dropped. Claims are not restored, since the 
+        path cache ids of the records change: their upload is resumed by the
+        next synchronization.
 
-    def add_mappings(self, data, entity_type, entity_ids):
+        :param cursor: Sqlite database cursor
         """
-        Adds a collection of mappings to the path cache in case they are not 
-        already there. 
+        rows = list(cursor.execute("""SELECT metadata, description, sent, entity_type, entity_id, 
+                                           entity_name, root, path, primary_entity 
+                                    FROM temp.journal_staging ORDER BY rowid"""))
+        cursor.execute("DROP TABLE temp.journal_staging")
         
-        :param data: list of dictionaries. Each dictionary contains 
-                     the following keys:
-                      - entity: a dictionary with keys name, id and type
-                      - path: a path on disk
-                      - primary: a boolean indicating if this is a primary entry
-                      - metadata: folder configuration metadata
+        for (metadata, desc, sent, et, eid, en, root_name, db_path, primary) in rows:
+            
+            res = list(cursor.execute("SELECT entity_type, entity_id FROM path_cache "
+                                      "WHERE root = ? AND path = ? AND primary_entity = 1", 
+                                      (root_name, db_path)))
+            if primary and res and res[0] != (et, eid):
+                log.warning("Path '%s %s' is associated with %s %s in Shotgun. The record "
+                            "for %s %s won't be uploaded." % (root_name, db_path, 
+                                                             res[0][0], res[0][1], et, eid))
+                continue
+            if not primary and (et, eid) in res:
+                # redundant with the primary record of the entity
+                continue
+            
+            cursor.execute("INSERT OR IGNORE INTO path_cache(entity_type, entity_id, entity_name, "
+                           "root, path, primary_entity) VALUES(?, ?, ?, ?, ?, ?)", 
+                           (et, eid, en, root_name, db_path, primary))
+            res = list(cursor.execute("SELECT p.rowid, s.shotgun_id FROM path_cache AS p "
+                                      "LEFT JOIN shotgun_status AS s ON s.path_cache_id = p.rowid "
+                                      "WHERE p.entity_type = ? AND p.entity_id = ? AND p.root = ? "
+                                      "AND p.path = ? AND p.primary_entity = ?", 
+                                      (et, eid, root_name, db_path, primary)))
+            (row_id, sg_id) = res[0]
+            if sg_id and not sent:
+                # uploaded by another process
+                continue
+            
+            cursor.execute("INSERT INTO upload_journal(path_cache_id, metadata, description, sent) "
+                           "VALUES(?, ?, ?, ?)", (row_id, metadata, desc, sent))
+        
+        if rows:
+            log.debug("Journaled %d path cache records again for upload." % len(rows))
+
+    def _iter_folder_entity_pages(self, filters):
+        """
+        Generator which fetches FilesystemLocation records from Shotgun 
+        one page at a time, in ascending id order.
+        
+        Pages are requested by id rather than by page number, so that each
+        query is cheap on the server regardless of how many records precede it.
+
+        :param filters: Shotgun filters to apply.
+        :returns: Generator yielding lists of FilesystemLocation records.
+        """
+        last_id = 0
+        
+        while True:
+            page = self._tk.shotgun.find(SHOTGUN_ENTITY, 
+                                         filters + [["id", "greater_than", last_id]],
+                                         ["id",
+                                          SG_METADATA_FIELD, 
+                                          SG_IS_PRIMARY_FIELD, 
+                                          SG_ENTITY_ID_FIELD,
+                                          SG_PATH_FIELD,
+                                          SG_ENTITY_TYPE_FIELD, 
+                                          SG_ENTITY_NAME_FIELD],
+                                         [{"field_name": "id", "direction": "asc"}],
+                                         limit=SYNC_PAGE_SIZE)
+            if page:
+                yield page
+            
+            if len(page) < SYNC_PAGE_SIZE:
+                break
+            
+            last_id = page[-1]["id"]
+
+    def _iter_folder_entities(self, filters):
+        """
+        Generator which fetches FilesystemLocation records from Shotgun,
+        in ascending id order.
+
+        :param filters: Shotgun filters to apply.
+        :returns: Generator yielding FilesystemLocation records.
+        """
+        for page in self._iter_folder_entity_pages(filters):
+            for x in page:
+                yield x
+
+    def _resolve_folder_entity(self, sg_record):
+        """
+        Extracts the path cache data from a FilesystemLocation record.
+
+        :param sg_record: FilesystemLocation record returned by Shotgun.
+        :returns: Tuple with (entity, is_primary, local_os_path) or None if
+                  the record cannot be used on this machine.
+        """
+        # get entity data from our entry            
+        entity = {"id":   sg_record[SG_ENTITY_ID_FIELD],
+                  "name": sg_record[SG_ENTITY_NAME_FIELD],
+                  "type": sg_record[SG_ENTITY_TYPE_FIELD]}
+        is_primary = sg_record[SG_IS_PRIMARY_FIELD]
+        
+        # note! If a local storage which is associated with a path is retired,
+        # parts of the entity data returned by shotgun will be omitted.
+        # 
+        # A valid, active path entry will be on the form:
+        #  {'id': 653,
+        #   'path': {'content_type': None,
+        #            'id': 2186,
+        #            'link_type': 'local',
+        #            'local_path': '/Volumes/xyz/proj1/sequences/aaa',
+        #            'local_path_linux': '/Volumes/xyz/proj1/sequences/aaa',
+        #            'local_path_mac': '/Volumes/xyz/proj1/sequences/aaa',
+        #            'local_path_windows': None,
+        #            'local_storage': {'id': 2,
+        #                              'name': 'primary',
+        #                              'type': 'LocalStorage'},
+        #            'name': '[primary] /sequences/aaa',
+        #            'type': 'Attachment',
+        #            'url': 'file:///Volumes/xyz/proj1/sequences/aaa'},
+        #   'type': 'FilesystemLocation'},
+        #
+        # With a retired storage, the returned data from the SG API is
+        #  {'id': 646,
+        #   'path': {'content_type': None,
+        #            'id': 2141,
+        #            'link_type': 'local',
+        #            'local_storage': None,
+        #            'name': '[primary] /sequences/aaa/missing',
+        #            'type': 'Attachment'},
+        #   'type': 'FilesystemLocation'},
+        #
+        
+        # no path at all - this is an anomaly but handle it gracefully regardless
+        if sg_record[SG_PATH_FIELD] is None:
+            log.debug("No path associated with entry for %s. Skipping." % entity)
+            return None
+        
+        # retired storage case - see above for details
+        if sg_record[SG_PATH_FIELD].get("local_storage") is None:
+            log.debug("The storage for the path for %s has been deleted. Skipping." % entity)
+            return None
+            
+        # get the local path from our attachment entity dict
+        sg_local_storage_os_map = {"linux2": "local_path_linux", 
+                                   "win32": "local_path_windows", 
+                                   "darwin": "local_path_mac" }
+        local_os_path_field = sg_local_storage_os_map[sys.platform]
+        local_os_path = sg_record[SG_PATH_FIELD].get(local_os_path_field)
+
+        # if the storage is not correctly configured for an OS, it is possible
+        # that the path comes back as null. Skip such paths and report them in the log.
+        if local_os_path is None:
+            log.debug("No local os path associated with entry for %s. Skipping." % entity)
+            return None
+
+        # if the path cannot be split up into a root_name and a leaf path
+        # using the roots.yml file, log a warning and continue. This can happen
+        # if roots files and storage setups change half-way through a project,
+        # or if roots files are not in sync with the main storage definition
+        # in this case, we want to just warn and skip rather than raise
+        # an exception which will stop execution entirely.
+        try:
+            self._separate_root(local_os_path)
+        except TankError, e:
+            log.debug("Could not resolve storages - skipping: %s" % e)
+            return None
+        
+        return (entity, is_primary, local_os_path)
+
+    ############################################################################################
+    # pre-insertion validation
+
+    def validate_mappings(self, data):
+        """
+        Checks a series of path mappings to ensure that they don't conflict with
+        existing path cache data.
+        
+        The existing records for all the mappings are retrieved at once, by
+        joining the mappings against the path cache table.
+        
+        :param data: list of dictionaries. Each dictionary should contain 
+                     the following keys:
+                      - entity: a dictionary with keys name, id and type
+                      - path: a path on disk
+                      - primary: a boolean indicating if this is a primary entry
+                      - metadata: configuration metadata
+        """
+        if self._path_cache_disabled:
+            # no entries because we don't have a path cache
+            return
+
+        # only primary mappings are validated. For secondary
+        # mappings, multiple items can exist for a path.
+        data = [d for d in data if d["primary"]]
+        if not data:
+            return
+
+        c = self._connection.cursor()
+        try:
+            self._load_new_mappings(c, data, ignore_invalid_paths=True)
+            db_entities = self._get_db_entities_for_new_mappings(c)
+            db_paths = self._get_db_paths_for_new_mappings(c)
+        finally:
+            # this also ends the transaction the temporary table was loaded in.
+            self._drop_new_mappings(c)
+            c.close()
+
+        for (idx, d) in enumerate(data):
+            entity = d["entity"]
+            self._validate_mapping(
+                d["path"],
+                entity,
+                self._get_single_entity(d["path"], db_entities.get(idx, [])),
+                db_paths.get((entity["type"], entity["id"]), [])
+            )
+        
+        
+    def _validate_mapping(self, path, entity, entity_in_db, paths_in_db):
+        """
+        Consistency checks happening prior to folder creation. May raise a TankError
+        if an inconsistency is detected.
+        
+        :param path: The path calculated for a primary mapping
+        :param entity: Sg entity dict with keys id, type and name
+        :param entity_in_db: Sg entity dict the path is currently associated with
+                             in the path cache, None if not registered.
+        :param paths_in_db: Paths currently associated with the entity in the path cache.
+        """
+        
+        # Make sure that there isn't already a record with the same
+        # name in the database and file system, but with a different id.
+        if entity_in_db is not None:
+            if entity_in_db["id"] != entity["id"] or entity_in_db["type"] != entity["type"]:
+                
+                # there is already a record in the database for this path,
+                # but associated with another entity! Display an error message
+                # and ask that the user investigates using special tank commands.
+                #
+                # Note! We are only comparing against the type and the id
+                # not against the name. It should be perfectly valid to rename something
+                # in shotgun and if folders are then recreated for that item, nothing happens
+                # because there is already a folder which represents that item. (although now with 
+                # an incorrect name)
+
+                msg  = "The path '%s' cannot be processed because it is already associated " % path
+                msg += "with %s '%s' (id %s) in Shotgun. " % (entity_in_db["type"], entity_in_db["name"], entity_in_db["id"])
+                msg += "You are now trying to associate it with %s '%s' (id %s). " % (entity["type"], entity["name"], entity["id"])
+                msg += "If you want to unregister your previously created folders, you can run "
+                msg += "the following command: 'tank unregister_folders %s' " % path
+                raise TankError(msg)
+            
+        # Check 2. Check if a folder for this shot has already been created,
+        # but with another name. This can happen if someone
+        # - creates a shot AAA
+        # - creates folders on disk for Shot AAA
+        # - renamed the shot to BBB
+        # - tries to create folders. Now we don't want to create folders for BBB,
+        #   since we already have a location on disk for this shot. 
+        #
+        # note: this can also happen if the folder creation rules change.
+        for p in paths_in_db:
+            # so we got a path that matches our entity
+            if p != path and os.path.dirname(p) == os.path.dirname(path):
+                # this path is identical to our path we are about to create except for the name. 
+                # there is still a folder on disk. Abort folder creation
+                # with a descriptive error message
+                msg  = "The path '%s' cannot be created because another " % path
+                msg += "path '%s' is already associated with %s %s. " % (p, entity["type"], entity["name"])
+                msg += "This typically happens if an item in Shotgun is renamed or "
+                msg += "if the path naming in the folder creation configuration "
+                msg += "is changed. In order to continue you can either change "
+                msg += "the %s back to its previous name or you can unregister " % entity["type"]
+                msg += "the currently associated folders by running the following command: "
+
+                # Steps are a special case. We need to tell the user to unregister the
+                # conflicting path directly rather than by entity. The reason for this is
+                # is two fold: running the unregister on the folder directly will properly
+                # handle the underlying Task folders beneath the Step. Also, we have some
+                # logic that assumes an entity being unregistered has a Project, and that
+                # isn't the case for Step entities. All in all, this is the right thing for
+                # a user to do to resolve the renamed Step entity's folder situation.
+                if entity["type"] == "Step":
+                    msg += "'tank unregister_folders %s' and then try again." % p
+                else:
+                    msg += "'tank %s %s unregister_folders' and then try again." % (
+                        entity["type"],
+                        entity["name"]
+                    )                    
+                raise TankError(msg)
+
+
+
+    ############################################################################################
+    # database insertion methods
+
+    def add_mappings(self, data, entity_type, entity_ids):
+        """
+        Adds a collection of mappings to the path cache in case they are not 
+        already there. 
+        
+        :param data: list of dictionaries. Each dictionary contains 
+                     the following keys:
+                      - entity: a dictionary with keys name, id and type
+                      - path: a path on disk
+                      - primary: a boolean indicating if this is a primary entry
+                      - metadata: folder configuration metadata
                       
         :param entity_type: sg entity type for the original high level folder creation 
                             request that represents this series of mappings
@@ -943,13 +1476,34 @@ class PathCache(object):
             raise TankError("You are currently running a configuration which does not have any "
                             "capabilities of storing path entry lookups. There is no path cache "
                             "file defined for this project.")
-        
+
+        if self._shared_pool is None:
+            self._add_mappings(data, entity_type, entity_ids)
+            return
+
+        with self._shared_database():
+            # the shared path cache sync marker is moved past the event
+            # created for these mappings, so make sure it has caught up first.
+            self._synchronize(full_sync=False)
+            sg_id_lookup = self._add_mappings(data, entity_type, entity_ids)
+
+        self._add_replica_mappings(data, sg_id_lookup)
+
+    def _add_mappings(self, data, entity_type, entity_ids):
+        """
+        Adds a collection of mappings to the database currently in use.
+        See :meth:`add_mappings` for details.
+
+        :returns: Dictionary where the keys are database row ids and the 
+                  values are the corresponding shotgun ids.
+        """
+        sg_id_lookup = {}
         c = self._connection.cursor()
         try:
             data_for_sg = []
             
-            for d in data:
-                new_rowid = self._add_db_mapping(c, d["path"], d["entity"], d["primary"]) 
+            new_rowids = self._add_db_mappings(c, [(d["path"], d["entity"], d["primary"]) for d in data])
+            for (d, new_rowid) in zip(data, new_rowids):
                 if new_rowid:
                     # this entry wasn't already in the db. So add it to the list to
                     # potentially upload to SG later on
@@ -967,32 +1521,534 @@ class PathCache(object):
                 entity_ids = ", ".join([str(x) for x in entity_ids])
                 desc = ("Created folders on disk for %ss with id: %s" % (entity_type, entity_ids))
 
-                # now push to shotgun
-                (event_log_id, sg_id_lookup) = self._upload_cache_data_to_shotgun(data_for_sg, desc)
-                # store insertion marker in the db
-                c.execute("DELETE FROM event_log_sync")
-                c.execute("INSERT INTO event_log_sync(last_id) VALUES(?)", (event_log_id, ))
-                # and indicate in the path cache that all these records have been pushed
-                for (pc_row_id, sg_id) in sg_id_lookup.items():
-                    c.execute("INSERT INTO shotgun_status(path_cache_id, shotgun_id) "
-                              "VALUES(?, ?)", (pc_row_id, sg_id) )
-                    
+                # record the new entries in the upload journal as part of the 
+                # same transaction, claimed for upload by this process. Should
+                # the upload be interrupted, it will be resumed by the next 
+                # synchronization.
+                claimed_at = time.time()
+                c.executemany("INSERT INTO upload_journal(path_cache_id, metadata, description, sent, "
+                              "claimed_by, claimed_at) VALUES(?, ?, ?, 0, ?, ?)", 
+                              [(d["path_cache_row_id"], json.dumps(d["metadata"]), desc, 
+                                self._upload_owner, claimed_at) for d in data_for_sg])
 
         except:
-            # error processing shotgun. Make sure we roll back the sqlite path cache
+            # error validating the data. Make sure we roll back the sqlite path cache
             # transaction
             self._connection.rollback()
             raise
         
         else:
-            # Shotgun insert complete! Now we can commit path cache transaction
             self._connection.commit()
+            if data_for_sg:
+                self._pool.notify_modified()
         
         finally:
+            self._drop_new_mappings(c)
             c.close()
 
+        if self._sync_with_sg and len(data_for_sg) > 0:
+            # now push to shotgun
+            c = self._connection.cursor()
+            try:
+                sg_id_lookup = self._process_upload_journal(c, update_sync_marker=True)
+            finally:
+                c.close()
+
+        return sg_id_lookup
 
+    def _process_upload_journal(self, cursor, update_sync_marker, batch_size=None):
+        """
+        Uploads the records of the upload journal to Shotgun.
+        
+        Records are uploaded in batches of at most batch_size records. Each batch is 
+        committed to the database as soon as it has been uploaded, so that an interrupted
+        upload resumes where it stopped. Records are flagged before being sent, and records
+        which were sent previously are looked up in Shotgun rather than created again.
+        
+        Each batch is claimed by this instance before being sent, so that concurrent
+        processes never upload the same records. Records claimed by another process
+        are skipped, unless their claim is older than ``UPLOAD_CLAIM_TIMEOUT`` seconds,
+        meaning the process never completed their upload. Claims are released when
+        the upload fails.
+        
+        :param cursor: Sqlite database cursor
+        :param update_sync_marker: If True, the event log sync marker is moved 
+                                   to the event log entry of each batch.
+        :param batch_size: Maximum number of records to upload in a single request.
+                           Defaults to ``UPLOAD_BATCH_SIZE``.
+        :returns: Dictionary where the keys are path cache row ids and the values
+                  are the corresponding shotgun ids.
+        :raises: :class:`TankError` if a batch could not be uploaded. The records 
+                 which haven't been uploaded remain in the journal.
+        """
+        sg_id_lookup = {}
+        
+        pending = [d for d in self._get_upload_journal(cursor) if self._can_claim(d)]
+        if not pending:
+            return sg_id_lookup
+        
+        log.debug("Uploading %d journaled path cache records to Shotgun..." % len(pending))
+        batch_size = batch_size or UPLOAD_BATCH_SIZE
+        
+        try:
+            # the user is the same for all the records
+            created_by = get_current_user(self._tk)
+        except:
+            self._release_upload_journal(cursor)
+            raise
+        
+        # records are grouped by event log entry description
+        batches = []
+        for d in pending:
+            if batches and batches[-1][-1]["description"] == d["description"] and len(batches[-1]) < batch_size:
+                batches[-1].append(d)
+            else:
+                batches.append([d])
+        
+        for (batch_idx, batch) in enumerate(batches):
+            
+            log.debug("Uploading batch %d/%d..." % (batch_idx + 1, len(batches)))
+            
+            try:
+                # claim and flag the records before sending them
+                batch = self._claim_upload_journal(cursor, batch)
+                if not batch:
+                    continue
+                
+                # records sent previously may have been created before the
+                # upload got interrupted
+                created_ids = self._find_folder_entities([d for d in batch if d["sent"]])
+                found_row_ids = set([row_id for (row_id, _) in created_ids])
+                data_for_sg = [d for d in batch if d["path_cache_row_id"] not in found_row_ids]
+                if data_for_sg:
+                    created_ids.extend(self._create_folder_entities(data_for_sg, created_by))
+                
+                event_log_id = self._create_folder_event([sg_id for (_, sg_id) in created_ids], 
+                                                         batch[0]["description"], 
+                                                         created_by)
+                
+                if update_sync_marker:
+                    # store insertion marker in the db
+                    cursor.execute("DELETE FROM event_log_sync")
+                    cursor.execute("INSERT INTO event_log_sync(last_id) VALUES(?)", (event_log_id, ))
+                # and indicate in the path cache that all these records have been pushed.
+                # Records journaled again by a full sync in the meantime are no longer
+                # claimed and their path cache ids may have been reused, so they are
+                # left to the next synchronization.
+                owned_ids = []
+                for (row_id, sg_id) in created_ids:
+                    cursor.execute("DELETE FROM upload_journal WHERE path_cache_id = ? AND claimed_by = ?",
+                                   (row_id, self._upload_owner))
+                    if cursor.rowcount:
+                        owned_ids.append((row_id, sg_id))
+                cursor.executemany("INSERT OR IGNORE INTO shotgun_status(path_cache_id, shotgun_id) "
+                                   "VALUES(?, ?)", owned_ids)
+                created_ids = owned_ids
+            
+            except:
+                self._connection.rollback()
+                self._release_upload_journal(cursor)
+                raise
+            
+            else:
+                self._connection.commit()
+            
+            sg_id_lookup.update(created_ids)
+        
+        return sg_id_lookup
 
+    def _can_claim(self, data):
+        """
+        Checks if a journaled record can be uploaded by this instance.
+
+        :param data: Journaled record dict. See :meth:`_get_upload_journal`.
+        :returns: True if the record is not claimed, claimed by this instance 
+                  or if its claim is stale.
+        """
+        return (data["claimed_by"] is None or 
+                data["claimed_by"] == self._upload_owner or
+                data["claimed_at"] < time.time() - UPLOAD_CLAIM_TIMEOUT)
+
+    def _claim_upload_journal(self, cursor, batch):
+        """
+        Claims a batch of journaled records for upload and flags them as sent.
+
+        The claim is committed straight away. Records claimed by another 
+        process in the meantime are left out.
+
+        :param cursor: Sqlite database cursor
+        :param batch: List of journaled record dicts. See :meth:`_get_upload_journal`.
+        :returns: List of the records claimed.
+        """
+        now = time.time()
+        cursor.executemany("UPDATE upload_journal SET sent = 1, claimed_by = ?, claimed_at = ? "
+                           "WHERE path_cache_id = ? AND (claimed_by IS NULL OR claimed_by = ? "
+                           "OR claimed_at < ?)",
+                           [(self._upload_owner, now, d["path_cache_row_id"], self._upload_owner, 
+                             now - UPLOAD_CLAIM_TIMEOUT) for d in batch])
+        res = cursor.execute("SELECT path_cache_id FROM upload_journal WHERE claimed_by = ?", 
+                             (self._upload_owner, ))
+        claimed_row_ids = set([x[0] for x in res])
+        self._connection.commit()
+        return [d for d in batch if d["path_cache_row_id"] in claimed_row_ids]
+
+    def _release_upload_journal(self, cursor):
+        """
+        Releases the claims of this instance on journaled records, so that 
+        their upload can be resumed straight away by another process.
+
+        :param cursor: Sqlite database cursor
+        """
+        try:
+            cursor.execute("UPDATE upload_journal SET claimed_by = NULL, claimed_at = NULL "
+                           "WHERE claimed_by = ?", (self._upload_owner, ))
+            self._connection.commit()
+        except sqlite3.Error, e:
+            # the claims will go stale instead
+            log.debug("Could not release claimed path cache records: %s" % e)
+            self._connection.rollback()
+
+    def _get_upload_journal(self, cursor):
+        """
+        Returns the records of the upload journal, in the order they were added.
+        Records whose root is not recognized are removed from the journal.
+
+        :param cursor: Sqlite database cursor
+        :returns: List of dicts with keys entity, path, primary, metadata, 
+                  path_cache_row_id, description, sent, claimed_by and claimed_at.
+        """
+        res = cursor.execute("""SELECT j.path_cache_id, j.metadata, j.description, j.sent, 
+                                       j.claimed_by, j.claimed_at, p.entity_type, p.entity_id, p.entity_name, 
+                                       p.root, p.path, p.primary_entity
+                                FROM upload_journal AS j
+                                JOIN path_cache AS p ON p.rowid = j.path_cache_id
+                                ORDER BY j.path_cache_id""")
+        
+        pending = []
+        invalid_row_ids = []
+        for (row_id, metadata, desc, sent, claimed_by, claimed_at, 
+             et, eid, en, root_name, db_path, primary) in list(res):
+            root_path = self._roots.get(root_name)
+            if not root_path:
+                # The root name doesn't match a recognized name, so skip this entry
+                log.warning("Path '%s %s' doesn't have a valid root and won't "
+                            "be uploaded to Shotgun." % (root_name, db_path))
+                invalid_row_ids.append((row_id, ))
+                continue
+            
+            # convert to string, not unicode!
+            pending.append({"entity": {"type": str(et), "id": eid, "name": str(en)},
+                            "path": self._dbpath_to_path(root_path, db_path),
+                            "primary": bool(primary),
+                            "metadata": json.loads(metadata),
+                            "path_cache_row_id": row_id,
+                            "description": desc,
+                            "sent": bool(sent),
+                            "claimed_by": claimed_by,
+                            "claimed_at": claimed_at})
+        
+        if invalid_row_ids:
+            cursor.executemany("DELETE FROM upload_journal WHERE path_cache_id = ?", invalid_row_ids)
+            self._connection.commit()
+        
+        return pending
+
+    def _find_folder_entities(self, data):
+        """
+        Looks up the FilesystemLocation records which already exist in Shotgun 
+        for a list of path cache records.
+
+        :param data: List of dicts. See :meth:`_upload_cache_data_to_shotgun`.
+        :returns: A list of (path_cache_row_id, shotgun_id) tuples for the records found.
+        """
+        if not data:
+            return []
+        
+        id_in_filter = [SG_ENTITY_ID_FIELD, "in"]
+        id_in_filter.extend(sorted(set([d["entity"]["id"] for d in data])))
+        
+        sg_ids = {}
+        for x in self._iter_folder_entities([["project", "is", self._get_project_link()], id_in_filter]):
+            record = self._resolve_folder_entity(x)
+            if record is None:
+                continue
+            (entity, is_primary, local_os_path) = record
+            sg_ids.setdefault((local_os_path, entity["type"], entity["id"], bool(is_primary)), x["id"])
+        
+        created_ids = []
+        for d in data:
+            key = (d["path"], d["entity"]["type"], d["entity"]["id"], d["primary"])
+            if key in sg_ids:
+                created_ids.append((d["path_cache_row_id"], sg_ids[key]))
+        
+        log.debug("Found %d of %d previously sent records in Shotgun." % (len(created_ids), len(data)))
+        return created_ids
+
+    def _add_replica_mappings(self, data, sg_id_lookup):
+        """
+        Adds mappings which have just been registered in the shared 
+        path cache to the local replica, so that they can be looked up
+        right away rather than after the next sync.
+
+        :param data: list of dictionaries passed to :meth:`add_mappings`.
+        :param sg_id_lookup: Dictionary where the keys are shared path cache
+                             row ids and the values are the corresponding shotgun ids.
+        """
+        # mappings which already existed don't have a row id
+        data = [d for d in data if "path_cache_row_id" in d]
+        if not data:
+            return
+
+        c = self._connection.cursor()
+        try:
+            new_rowids = self._add_db_mappings(c, [(d["path"], d["entity"], d["primary"]) for d in data])
+            status_rows = []
+            for (d, new_rowid) in zip(data, new_rowids):
+                sg_id = sg_id_lookup.get(d["path_cache_row_id"])
+                if new_rowid and sg_id:
+                    status_rows.append((new_rowid, sg_id))
+            c.executemany("INSERT INTO shotgun_status(path_cache_id, shotgun_id) "
+                          "VALUES(?, ?)", status_rows)
+        except TankError, e:
+            # the replica is out of sync with the shared path cache. It
+            # will be corrected by the next full sync.
+            self._connection.rollback()
+            log.warning("Could not update local path cache replica: %s" % e)
+        else:
+            self._connection.commit()
+            self._pool.notify_modified()
+        finally:
+            self._drop_new_mappings(c)
+            c.close()
+
+    def _add_db_mappings(self, cursor, mappings):
+        """
+        Adds associations to the database, following the same rules as
+        :meth:`_add_db_mapping`.
+
+        Rather than looking up each mapping separately, the mappings are loaded into
+        a temporary table and joined against the path cache, and the new records are
+        inserted with a single statement. Mappings are processed in order, so that a
+        mapping sees the ones which were added before it.
+
+        Note that since the python sqlite module commits any pending transaction
+        before creating the temporary table, this needs to be the first change made
+        in the transaction.
+
+        :param cursor: database cursor to use
+        :param mappings: list of (path, entity, primary) tuples, where entity is a
+                         shotgun entity dict with keys type, id and name.
+        :returns: list with, for each mapping, None if nothing was added to the db,
+                  otherwise the ROWID of the new row.
+        :raises: :class:`TankError` if a mapping conflicts with an existing association.
+        """
+        if not mappings:
+            return []
+
+        db_paths = self._load_new_mappings(cursor, mappings)
+        entities_in_db = self._get_db_entities_for_new_mappings(cursor)
+        paths_in_db = self._get_db_paths_for_new_mappings(cursor)
+
+        # primary entities registered by earlier mappings, indexed by root and db path
+        added_entities = {}
+        new_rows = []
+
+        for (idx, (path, entity, primary)) in enumerate(mappings):
+            (root_name, db_path) = db_paths[idx]
+            entity_key = (entity["type"], entity["id"])
+
+            if primary:
+                # the primary entity must be unique: path/id/type
+                # note that secondary entities are not considered
+                curr_entity = self._get_single_entity(path, entities_in_db.get(idx, []))
+                if curr_entity is None:
+                    curr_entity = added_entities.get((root_name, db_path))
+
+                if curr_entity is not None:
+                    # this path is already registered. Ensure it is connected to
+                    # our entity!
+                    #
+                    # Note! We are only comparing against the type and the id
+                    # not against the name. It should be perfectly valid to rename something
+                    # in shotgun and if folders are then recreated for that item, nothing happens
+                    # because there is already a folder which repreents that item. (although now with
+                    # an incorrect name)
+                    #
+                    # also note that we have already done this once as part of the validation checks -
+                    # this time round, we are doing it more as an integrity check.
+                    #
+                    if curr_entity["type"] != entity["type"] or curr_entity["id"] != entity["id"]:
+                        raise TankError("Database concurrency problems: The path '%s' is "
+                                        "already associated with Shotgun entity %s. Please re-run "
+                                        "folder creation to try again." % (path, str(curr_entity) ))
+                    # the entry that exists in the db matches what we are trying to insert so skip it
+                    continue
+
+                added_entities[(root_name, db_path)] = entity
+
+            elif path in paths_in_db.get(entity_key, []):
+                # secondary entity
+                # in this case, it is okay with more than one record for a path
+                # but we don't want to insert the exact same record over and over again
+                continue
+
+            paths_in_db.setdefault(entity_key, []).append(
+                self._dbpath_to_path(self._roots[root_name], db_path)
+            )
+            new_rows.append(idx)
+
+        # note: the INSERT OR IGNORE INTO checks if we already have a
+        # record in the db for this combination - if we do, the insert
+        # is ignored. This is to avoid reported realtime issues when two
+        # processes are doing an incremental sync at the same time,
+        # download new data from shotgun and then attempts to insert it.
+        cursor.executemany("""INSERT OR IGNORE INTO path_cache(entity_type,
+                                                               entity_id,
+                                                               entity_name,
+                                                               root,
+                                                               path,
+                                                               primary_entity)
+                              SELECT entity_type, entity_id, entity_name, root, path, primary_entity
+                              FROM new_mappings WHERE idx = ?""",
+                           [(idx,) for idx in new_rows])
+
+        # now look up the row ids of the records
+        rowids = {}
+        res = cursor.execute("""SELECT n.idx, p.rowid
+                                FROM new_mappings AS n
+                                JOIN path_cache AS p
+                                ON p.entity_type = n.entity_type
+                                AND p.entity_id = n.entity_id
+                                AND p.root = n.root
+                                AND p.path = n.path
+                                AND p.primary_entity = n.primary_entity""")
+        for (idx, rowid) in res:
+            rowids[idx] = rowid
+
+        new_rowids = [None] * len(mappings)
+        for idx in new_rows:
+            new_rowids[idx] = rowids.get(idx)
+        return new_rowids
+
+    def _load_new_mappings(self, cursor, mappings, ignore_invalid_paths=False):
+        """
+        Loads mappings into the ``new_mappings`` temporary table, so that they can
+        be checked against the path cache with joins. Rows are indexed by their
+        position in the list of mappings.
+
+        :param cursor: database cursor to use
+        :param mappings: list of (path, entity, primary) tuples or list of
+                         dictionaries with keys path, entity and primary.
+        :param ignore_invalid_paths: If False, a :class:`TankError` is raised for paths which
+                                     don't belong to any of the project roots. Otherwise they
+                                     are loaded without root and path, and won't match anything.
+        :returns: list of (root name, db path) tuples for each mapping.
+        """
+        cursor.execute("DROP TABLE IF EXISTS temp.new_mappings")
+        cursor.execute("""CREATE TEMP TABLE new_mappings (idx integer primary key,
+                                                          entity_type text,
+                                                          entity_id integer,
+                                                          entity_name text,
+                                                          root text,
+                                                          path text,
+                                                          primary_entity integer)""")
+        db_paths = []
+        rows = []
+        for (idx, mapping) in enumerate(mappings):
+            if isinstance(mapping, dict):
+                (path, entity, primary) = (mapping["path"], mapping["entity"], mapping["primary"])
+            else:
+                (path, entity, primary) = mapping
+
+            try:
+                (root_name, relative_path) = self._separate_root(path)
+                db_path = self._path_to_dbpath(relative_path)
+            except TankError:
+                if not ignore_invalid_paths:
+                    raise
+                (root_name, db_path) = (None, None)
+
+            db_paths.append((root_name, db_path))
+            rows.append((idx, entity["type"], entity["id"], entity["name"], root_name, db_path, primary))
+
+        cursor.executemany("INSERT INTO new_mappings(idx, entity_type, entity_id, entity_name, "
+                           "root, path, primary_entity) VALUES(?, ?, ?, ?, ?, ?, ?)", rows)
+        return db_paths
+
+    def _drop_new_mappings(self, cursor):
+        """
+        Drops the ``new_mappings`` temporary table. Note that the python
+        sqlite module commits any pending transaction before doing so.
+
+        :param cursor: database cursor to use
+        """
+        cursor.execute("DROP TABLE IF EXISTS temp.new_mappings")
+
+    def _get_db_entities_for_new_mappings(self, cursor):
+        """
+        Looks up the primary entities currently associated with the paths
+        of the primary mappings in the ``new_mappings`` temporary table.
+
+        :param cursor: database cursor to use
+        :returns: Dictionary of lists of shotgun entity dicts, indexed by mapping index.
+        """
+        entities = {}
+        res = cursor.execute("""SELECT n.idx, p.entity_type, p.entity_id, p.entity_name
+                                FROM new_mappings AS n
+                                JOIN path_cache AS p
+                                ON p.path = n.path
+                                AND p.root = n.root
+                                AND p.primary_entity = 1
+                                WHERE n.primary_entity = 1""")
+        for (idx, entity_type, entity_id, entity_name) in res:
+            # convert to string, not unicode!
+            entities.setdefault(idx, []).append(
+                {"type": str(entity_type), "id": entity_id, "name": str(entity_name)}
+            )
+        return entities
+
+    def _get_db_paths_for_new_mappings(self, cursor):
+        """
+        Looks up the paths currently associated with the entities
+        of the mappings in the ``new_mappings`` temporary table.
+
+        :param cursor: database cursor to use
+        :returns: Dictionary of lists of paths, indexed by (entity type, entity id).
+        """
+        paths = {}
+        # CROSS JOIN makes sqlite loop over the new entities and look each of them
+        # up through the path_cache_entity index, rather than scanning path_cache.
+        res = cursor.execute("""SELECT p.entity_type, p.entity_id, p.root, p.path
+                                FROM (SELECT DISTINCT entity_type, entity_id FROM new_mappings) AS n
+                                CROSS JOIN path_cache AS p
+                                ON p.entity_type = n.entity_type AND p.entity_id = n.entity_id
+                                ORDER BY p.rowid""")
+        for (entity_type, entity_id, root_name, relative_path) in res:
+            root_path = self._roots.get(root_name)
+            if not root_path:
+                # The root name doesn't match a recognized name, so skip this entry
+                continue
+            paths.setdefault((entity_type, entity_id), []).append(
+                self._dbpath_to_path(root_path, relative_path)
+            )
+        return paths
+
+    def _get_single_entity(self, path, entities):
+        """
+        Returns the primary entity associated with a path.
+
+        :param path: a path on disk
+        :param entities: list of primary entities associated with the path in the database.
+        :returns: Shotgun entity dict or None.
+        :raises: :class:`TankError` if more than one primary entity is associated with the path.
+        """
+        if len(entities) > 1:
+            # never supposed to happen!
+            raise TankError("More than one entry in path database for %s!" % path)
+        elif len(entities) == 1:
+            return entities[0]
+        else:
+            return None
 
     def _add_db_mapping(self, cursor, path, entity, primary):
         """
@@ -1307,7 +2363,103 @@ class PathCache(object):
             matches.append( {"type": type_str, "id": d[1], "name": name_str } )
 
         return matches
-    
+
+    def get_entities_for_path_hierarchy(self, path):
+        """
+        Returns the primary and secondary entities for a path and all its parent
+        folders, up to the storage root the path belongs to.
+
+        This is equivalent to calling :meth:`get_entity` and :meth:`get_secondary_entities`
+        for each level of the hierarchy but resolves all levels using a single
+        database query.
+
+        :param path: a path on disk
+        :returns: list of tuples (level path, primary entity, secondary entities), one
+                  for each level in the hierarchy, starting with the given path and
+                  walking upwards. The primary entity is a shotgun entity dict or None
+                  and the secondary entities are a list of shotgun entity dicts.
+        """
+        if self._path_cache_disabled:
+            # no entries because we don't have a path cache
+            return []
+
+        # first compute all the levels we want to look up
+        root_paths = [x.lower() for x in self._roots.values()]
+        level_paths = []
+        curr_path = path
+        while True:
+            level_paths.append(curr_path)
+
+            if curr_path.lower() in root_paths:
+                #TODO this could fail with windows path variations
+                # we have reached a root!
+                break
+
+            # and continue with parent path
+            parent_path = os.path.abspath(os.path.join(curr_path, ".."))
+            if curr_path == parent_path:
+                # We're at the disk root, probably a degenerate path
+                break
+            curr_path = parent_path
+
+        # now resolve their db representation
+        db_keys = {}
+        for level_path in level_paths:
+            try:
+                root_name, relative_path = self._separate_root(level_path)
+            except TankError:
+                # fail gracefully if path is not a valid path
+                # eg. doesn't belong to the project
+                continue
+            db_keys[level_path] = (root_name, self._path_to_dbpath(relative_path))
+
+        primary_entities = collections.defaultdict(list)
+        secondary_entities = collections.defaultdict(list)
+
+        # group the db paths per root so that each lookup uses the path_cache_path index
+        db_paths = collections.defaultdict(set)
+        for (root_name, db_path) in db_keys.values():
+            db_paths[root_name].add(db_path)
+
+        data = []
+        if db_paths:
+            c = self._connection.cursor()
+            try:
+                for (root_name, root_db_paths) in db_paths.items():
+                    root_db_paths = list(root_db_paths)
+                    res = c.execute(
+                        "SELECT root, path, entity_type, entity_id, entity_name, primary_entity "
+                        "FROM path_cache WHERE root = ? AND path IN (%s) "
+                        "ORDER BY rowid" % ",".join("?" * len(root_db_paths)),
+                        [root_name] + root_db_paths
+                    )
+                    data.extend(res)
+            finally:
+                c.close()
+
+            for (root_name, db_path, entity_type, entity_id, entity_name, primary) in data:
+                # convert to string, not unicode!
+                entity = {"type": str(entity_type), "id": entity_id, "name": str(entity_name)}
+                if primary == 1:
+                    primary_entities[(root_name, db_path)].append(entity)
+                elif primary == 0:
+                    secondary_entities[(root_name, db_path)].append(entity)
+
+        hierarchy = []
+        for level_path in level_paths:
+            db_key = db_keys.get(level_path)
+            primary = primary_entities.get(db_key, [])
+            if len(primary) > 1:
+                # never supposed to happen!
+                raise TankError("More than one entry in path database for %s!" % level_path)
+            hierarchy.append((
+                level_path,
+                primary[0] if primary else None,
+                secondary_entities.get(db_key, [])
+            ))
+
+        return hierarchy
+
 
     def ensure_all_entries_are_in_shotgun(self):
         """
@@ -1444,13 +2596,262 @@ class PathCache(object):
         if len(sg_valid_records) > 0:
             log.info("")
             log.info("Step 5 - Uploading path entries to shotgun.")
-            sg_batches = [ sg_valid_records[x:x+SG_BATCH_SIZE] for x in xrange(0, len(pc_data), SG_BATCH_SIZE)]
+            log.info("Uploading %d records to Shotgun..." % len(sg_valid_records))
             event_log_description = "Path cache migration."
-            for batch_idx, curr_batch in enumerate(sg_batches):
-                log.info("Uploading batch %d/%d to Shotgun..." % (batch_idx+1, len(sg_batches)))
-                self._upload_cache_data_to_shotgun(curr_batch, event_log_description)
+            self._upload_cache_data_to_shotgun(sg_valid_records, event_log_description, SG_BATCH_SIZE)
             
         
         log.info("")
         log.info("Migration complete. %s records created in Shotgun" % len(sg_valid_records))
-     
+
+
+class _ConnectionPool(object):
+    """
+    Pool of sqlite connections to a single path cache database file.
+
+    Sqlite connections cannot be shared across threads, so the pool
+    holds one connection per thread. Connections are kept open once
+    created, meaning that subsequent path cache instances don't pay
+    for the connection setup and that sqlite's cache of prepared
+    statements is reused across them. The schema of the database is
+    verified once per process, or again if the database file on disk
+    is replaced.
+    """
+
+    # lock to protect the pool registry
+    _pools_lock = threading.Lock()
+    # registry of pools keyed by path cache file
+    _pools = {}
+
+    @classmethod
+    def get_pool(cls, path, wal=False):
+        """
+        Returns the pool for a path cache file.
+
+        :param path: Path to the path cache database file.
+        :param wal: Use write-ahead logging for the database. This is
+                    only suitable for databases on local disk.
+        :returns: :class:`_ConnectionPool` instance
+        """
+        path = os.path.normpath(path)
+        with cls._pools_lock:
+            pool = cls._pools.get(path)
+            if pool is None:
+                pool = cls(path, wal)
+                cls._pools[path] = pool
+            return pool
+
+    def __init__(self, path, wal=False):
+        """
+        :param path: Path to the path cache database file.
+        :param wal: Use write-ahead logging for the database.
+        """
+        self._path = path
+        self._wal = wal
+        self._lock = threading.Lock()
+        self._thread_data = threading.local()
+        # identity of the file on disk the schema was verified for
+        self._file_id = None
+        # incremented every time the file on disk changes identity,
+        # so that threads know their connection needs recreating.
+        self._generation = 0
+        # incremented every time the database is modified by this process
+        self._modification_count = 0
+
+    @property
+    def path(self):
+        """
+        Path to the database file.
+        """
+        return self._path
+
+    def acquire(self):
+        """
+        Returns the calling thread's connection to the database, creating it
+        if necessary.
+
+        Connections handed out by this method should be handed back using
+        :meth:`release` when no longer needed.
+
+        :returns: sqlite3 connection
+        """
+        # the file may have been deleted and recreated since we last looked
+        # at it, in which case connections need recreating and the schema
+        # needs verifying again. Note that an empty file means a brand new
+        # database, which may have reused the identity of a deleted one.
+        st = os.stat(self._path)
+        file_id = (st.st_dev, st.st_ino)
+        file_changed = file_id != self._file_id
+        verify_schema = file_changed or st.st_size == 0
+
+        data = self._thread_data
+        connection = getattr(data, "connection", None)
+        if connection is not None and (file_changed or data.generation != self._generation):
+            # any path cache still holding on to the previous
+            # connection will close it when releasing it.
+            connection = None
+
+        if connection is None:
+            connection = sqlite3.connect(self._path)
+            # this is to handle unicode properly - make sure that sqlite returns
+            # str objects for TEXT fields rather than unicode. Note that any unicode
+            # objects that are passed into the database will be automatically
+            # converted to UTF-8 strs, so this text_factory guarantees that any character
+            # representation will work for any language, as long as data is either input
+            # as UTF-8 (byte string) or unicode. And in the latter case, the returned data
+            # will always be unicode.
+            connection.text_factory = str
+            if self._wal:
+                # readers and writers don't block each other in wal mode
+                connection.execute("PRAGMA journal_mode=WAL").fetchall()
+
+        if verify_schema:
+            with self._lock:
+                self._init_schema(connection)
+                if file_id != self._file_id:
+                    self._file_id = file_id
+                    self._generation += 1
+
+        if getattr(data, "connection", None) is not connection:
+            data.connection = connection
+            data.users = 0
+        data.generation = self._generation
+        data.users += 1
+        return connection
+
+    def release(self, connection):
+        """
+        Hands back a connection previously returned by :meth:`acquire`.
+
+        Once the last user of the connection in the current thread has
+        released it, any transaction which was left pending is rolled back,
+        mirroring what used to happen when connections were closed.
+
+        :param connection: sqlite3 connection to release.
+        """
+        data = self._thread_data
+        if getattr(data, "connection", None) is not connection:
+            # connection has been replaced since it was handed out
+            connection.close()
+            return
+
+        data.users -= 1
+        if data.users <= 0:
+            data.users = 0
+            connection.rollback()
+
+    def notify_modified(self):
+        """
+        Records that the contents of the database have been modified.
+        """
+        with self._lock:
+            self._modification_count += 1
+
+    def get_modification_token(self):
+        """
+        Returns a token which changes whenever the database is modified.
+
+        Changes made by this process are tracked explicitly, changes made
+        by other processes are detected using the modification time, size
+        and identity of the database file, as well as its write-ahead log.
+
+        :returns: Hashable token
+        """
+        file_states = []
+        paths = [self._path]
+        if self._wal:
+            paths.append("%s-wal" % self._path)
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                # file has been removed
+                file_states.append(None)
+            else:
+                file_states.append((st.st_ino, st.st_size, st.st_mtime))
+        return (self._modification_count, tuple(file_states))
+
+    def _init_schema(self, connection):
+        """
+        Creates or upgrades the tables of the database.
+
+        :param connection: sqlite3 connection to use.
+        """
+        c = connection.cursor()
+        try:
+        
+            # get a list of tables in the current database
+            ret = c.execute("SELECT name FROM main.sqlite_master WHERE type='table';")
+            table_names = [x[0] for x in ret.fetchall()]
+            
+            if len(table_names) == 0:
+                # we have a brand new database. Create all tables and indices
+                c.executescript("""
+                    CREATE TABLE path_cache (entity_type text, entity_id integer, entity_name text, root text, path text, primary_entity integer);
+                
+                    CREATE INDEX path_cache_entity ON path_cache(entity_type, entity_id);
+                
+                    CREATE INDEX path_cache_path ON path_cache(root, path, primary_entity);
+                
+                    CREATE UNIQUE INDEX path_cache_all ON path_cache(entity_type, entity_id, root, path, primary_entity);
+                    
+                    CREATE TABLE event_log_sync (last_id integer);
+                    
+                    CREATE TABLE shotgun_status (path_cache_id integer, shotgun_id integer);
+                    
+                    CREATE UNIQUE INDEX shotgun_status_id ON shotgun_status(path_cache_id);
+                    
+                    CREATE TABLE upload_journal (path_cache_id integer primary key, metadata text, description text, sent integer, claimed_by text, claimed_at real);
+                    """)
+                connection.commit()
+                
+            else:
+                
+                # we have an existing database! Ensure it is up to date
+                if "event_log_sync" not in table_names:
+                    # this is a pre-0.15 setup where the path cache does not have event log sync
+                    c.executescript("CREATE TABLE event_log_sync (last_id integer);")
+                    connection.commit()
+                
+                if "shotgun_status" not in table_names:
+                    # this is a pre-0.15 setup where the path cache does not have the shotgun_status table
+                    c.executescript("""CREATE TABLE shotgun_status (path_cache_id integer, shotgun_id integer);
+                                       CREATE UNIQUE INDEX shotgun_status_id ON shotgun_status(path_cache_id);""")
+                    connection.commit()
+
+                if "upload_journal" not in table_names:
+                    # this is a setup where new records are not journaled before being uploaded
+                    c.executescript("CREATE TABLE upload_journal (path_cache_id integer primary key, "
+                                    "metadata text, description text, sent integer, "
+                                    "claimed_by text, claimed_at real);")
+                    connection.commit()
+                else:
+                    ret = c.execute("PRAGMA table_info(upload_journal)")
+                    if "claimed_by" not in [x[1] for x in ret.fetchall()]:
+                        # journal created before records were claimed for upload
+                        c.executescript("ALTER TABLE upload_journal ADD COLUMN claimed_by text;"
+                                        "ALTER TABLE upload_journal ADD COLUMN claimed_at real;")
+                        connection.commit()
+
+                
+                # now ensure that some key fields that have been added during the dev cycle are there
+                ret = c.execute("PRAGMA table_info(path_cache)")
+                field_names = [x[1] for x in ret.fetchall()]
+                
+                # check for primary entity field - this was added back in 0.12.x
+                if "primary_entity" not in field_names:
+                    c.executescript("""
+                        ALTER TABLE path_cache ADD COLUMN primary_entity integer;
+                        UPDATE path_cache SET primary_entity=1;
+        
+                        DROP INDEX IF EXISTS path_cache_path;
+                        CREATE INDEX IF NOT EXISTS path_cache_path ON path_cache(root, path, primary_entity);
+                        
+                        DROP INDEX IF EXISTS path_cache_all;
+                        CREATE UNIQUE INDEX IF NOT EXISTS path_cache_all ON path_cache(entity_type, entity_id, root, path, primary_entity);
+                        """)
+        
+                    connection.commit()
+        
+        finally:
+            c.close()
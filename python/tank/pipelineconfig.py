@@ -27,6 +27,7 @@ from .util import ShotgunPath
 from . import hook
 from . import pipelineconfig_utils
 from . import template_includes
+from .config_snapshot import ConfigSnapshot
 from . import LogManager
 
 from .descriptor import Descriptor, create_descriptor, descriptor_uri_to_dict
@@ -81,7 +82,12 @@ class PipelineConfiguration(object):
                                                                               our_associated_api_version, 
                                                                               self.get_install_location()))            
 
-        self._roots = pipelineconfig_utils.get_roots_metadata(self._pc_root)
+        # resolved configuration data written by the cache_yaml command
+        self._config_snapshot = ConfigSnapshot.load(self._pc_root)
+
+        self._roots = self._config_snapshot and self._config_snapshot.get_roots()
+        if self._roots is None:
+            self._roots = pipelineconfig_utils.get_roots_metadata(self._pc_root)
 
         # get the project tank disk name (Project.tank_name),
         # stored in the pipeline config metadata file.
@@ -187,7 +193,7 @@ class PipelineConfiguration(object):
     
         fh = open(cfg_yml, "rt")
         try:
-            data = yaml.load(fh)
+            data = yaml_cache.load_yaml(fh)
             if data is None:
                 raise Exception("File contains no data!")
         except Exception, e:
@@ -274,6 +280,16 @@ class PipelineConfiguration(object):
         log.debug("Read %s items from yaml cache %s" % (len(cache_items), cache_file))
 
 
+    def get_config_snapshot(self):
+        """
+        Returns the snapshot of the resolved configuration data, written
+        by the ``tank cache_yaml`` command.
+
+        :returns: :class:`~sgtk.config_snapshot.ConfigSnapshot` or None if
+                  the configuration has no snapshot.
+        """
+        return self._config_snapshot
+
     ########################################################################################
     # general access and properties
 
@@ -862,6 +878,11 @@ class PipelineConfiguration(object):
             constants.CONTENT_TEMPLATES_FILE,
         )
 
+        if self._config_snapshot:
+            data = self._config_snapshot.get_templates()
+            if data is not None:
+                return data
+
         try:
             data = yaml_cache.g_yaml_cache.get(templates_file, deepcopy_data=False)
             data = template_includes.process_includes(templates_file, data)
@@ -17,6 +17,7 @@ import os
 import re
 import sys
 import imp
+import copy
 import uuid
 from .. import hook
 from ..errors import TankError, TankNoDefaultValueError
@@ -52,6 +53,14 @@ class TankBundle(object):
         self.__environment = env
         self.__log = log
 
+        # resolved setting values, indexed by (key, default)
+        self.__resolved_settings = {}
+        self.__resolved_settings_hits = 0
+        self.__resolved_settings_misses = 0
+
+        # resolved hook paths, indexed by (setting, expression, engine name)
+        self.__resolved_hook_paths = {}
+
         # emit an engine started event
         tk.execute_core_hook(constants.TANK_BUNDLE_INIT_HOOK_NAME, bundle=self)
         
@@ -77,6 +86,18 @@ class TankBundle(object):
         do not use in any app code. 
         """
         return self.__settings
+
+    @property
+    def settings_cache_stats(self):
+        """
+        Internal method - not part of Tank's public interface.
+
+        Statistics of the cache of resolved setting values since the settings
+        or the context last changed.
+
+        :returns: Tuple with the number of cache hits and misses.
+        """
+        return (self.__resolved_settings_hits, self.__resolved_settings_misses)
     
     ##########################################################################################
     # methods used by internal classes, not part of the public interface
@@ -443,7 +464,31 @@ class TankBundle(object):
         :param default: default value to return
         :returns: Value from the environment configuration
         """
-        return self.__resolve_setting_value(self.__settings, key, default)
+        cache_key = (key, default)
+        try:
+            value = self.__resolved_settings[cache_key]
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable default, the value can't be cached.
+            return self.__resolve_setting_value(self.__settings, key, default)
+        else:
+            self.__resolved_settings_hits += 1
+            return _copy_setting_value(value)
+
+        self.__resolved_settings_misses += 1
+        (value, schema) = self.__get_setting_value(self.__settings, key, default)
+        if value and schema:
+            # values computed by hooks may change between calls,
+            # only cache the settings which don't use any.
+            cacheable = not _contains_hook_value(value)
+            value = self.__post_process_settings_r(key, value, schema)
+        else:
+            cacheable = True
+
+        if cacheable:
+            self.__resolved_settings[cache_key] = _copy_setting_value(value)
+        return value
             
     def get_template(self, key):
         """
@@ -643,6 +688,7 @@ class TankBundle(object):
         :param new_context: The new context to associate with the bundle.
         """
         self.__context = new_context
+        self.__clear_resolved_settings()
 
     def _set_settings(self, settings):
         """
@@ -651,6 +697,32 @@ class TankBundle(object):
         :param settings:    The new settings dict to store.
         """
         self.__settings = settings
+        self.__clear_resolved_settings()
+
+    def _log_settings_cache_stats(self):
+        """
+        Logs the hit rate of the settings cache. Called when the cache is
+        cleared and when the bundle is destroyed.
+        """
+        (hits, misses) = self.settings_cache_stats
+        lookups = hits + misses
+        if lookups:
+            self.__log.debug(
+                "Resolved settings cache for %r: %d lookups, %d%% hit rate." % (
+                    self, lookups, 100 * hits / lookups
+                )
+            )
+
+    def __clear_resolved_settings(self):
+        """
+        Clears the caches of resolved setting values and hook paths and
+        logs the hit rate of the settings cache.
+        """
+        self._log_settings_cache_stats()
+        self.__resolved_settings = {}
+        self.__resolved_settings_hits = 0
+        self.__resolved_settings_misses = 0
+        self.__resolved_hook_paths = {}
 
     def __resolve_hook_path(self, settings_name, hook_expression):
         """
@@ -831,6 +903,29 @@ class TankBundle(object):
         :param hook_expression: The path expression to a hook.
         :returns: List of paths to hooks files.
         """
+        # the resolution depends on the file system and on the engine
+        # when {engine_name} tokens are used. Expressions referring to
+        # environment variables are always resolved again.
+        cacheable = not hook.is_hook_dev_mode() and "{$" not in (hook_expression or "")
+        if cacheable:
+            cache_key = (settings_name, hook_expression, self._get_engine_name())
+            resolved_hook_paths = self.__resolved_hook_paths.get(cache_key)
+            if resolved_hook_paths is not None:
+                return list(resolved_hook_paths)
+
+        resolved_hook_paths = self.__resolve_hook_expression_uncached(settings_name, hook_expression)
+        if cacheable:
+            self.__resolved_hook_paths[cache_key] = list(resolved_hook_paths)
+        return resolved_hook_paths
+
+    def __resolve_hook_expression_uncached(self, settings_name, hook_expression):
+        """
+        Resolves a hook expression into a list of paths, without caching.
+
+        :param settings_name: Name of the hook setting, if any. See :meth:`__resolve_hook_expression`.
+        :param hook_expression: The path expression to a hook.
+        :returns: List of paths to hooks files.
+        """
         # split up the config value into distinct items
         unresolved_hook_paths = hook_expression.split(":")
 
@@ -950,7 +1045,25 @@ class TankBundle(object):
         :param key: setting name
         :param default: a default value to use for the setting
         """
+        (value, schema) = self.__get_setting_value(settings, key, default)
+
+        # We have a value of some kind and a schema. Allow the post
+        # processing code to further resolve the value.
+        if value and schema:
+            value = self.__post_process_settings_r(key, value, schema)
+
+        return value
+
+    def __get_setting_value(self, settings, key, default):
+        """
+        Get a setting value, before post-processing.
 
+        :param settings: the settings dictionary source
+        :param key: setting name
+        :param default: a default value to use for the setting
+        :returns: Tuple with the value and the schema of the setting,
+                  or None if the setting is not in the schema.
+        """
         # The post processing code requires the schema to introspect the
         # setting's types, defaults, etc. An old use case exists whereby the key
         # does not exist in the config schema so we need to account for that.
@@ -970,12 +1083,7 @@ class TankBundle(object):
             # default value
             value = default
 
-        # We have a value of some kind and a schema. Allow the post
-        # processing code to further resolve the value.
-        if value and schema:
-            value = self.__post_process_settings_r(key, value, schema)
-
-        return value
+        return (value, schema)
 
     def _get_engine_name(self):
         """Returns the bundle's engine name if available. None otherwise.
@@ -997,6 +1105,35 @@ class TankBundle(object):
 
         return engine_name
 
+def _contains_hook_value(value):
+    """
+    Checks if a setting value holds values computed by a hook, e.g. ``hook:foo_bar``.
+
+    :param value: Setting value, before post-processing.
+    :returns: True if the value, or any of the values it holds, is computed by a hook.
+    """
+    if isinstance(value, basestring):
+        return value.startswith("hook:")
+    elif isinstance(value, dict):
+        return any(_contains_hook_value(x) for x in value.itervalues())
+    elif isinstance(value, list):
+        return any(_contains_hook_value(x) for x in value)
+    return False
+
+
+def _copy_setting_value(value):
+    """
+    Copies a resolved setting value, so that changes made by the caller
+    don't affect the cached value.
+
+    :param value: Resolved setting value.
+    :returns: A copy of lists and dictionaries, other values as is.
+    """
+    if isinstance(value, (list, dict)):
+        return copy.deepcopy(value)
+    return value
+
+
 def resolve_default_value(schema, default=None, engine_name=None,
     raise_if_missing=False):
     """
@@ -694,6 +694,7 @@ class Engine(TankBundle):
             self.__destroy_apps()
 
             self.log_debug("Destroying %s" % self)
+            self._log_settings_cache_stats()
             self.destroy_engine()
 
             # finally remove the current engine reference
@@ -2411,6 +2412,7 @@ class Engine(TankBundle):
         for app in self.__applications.values():
             app._destroy_frameworks()
             self.log_debug("Destroying %s" % app)
+            app._log_settings_cache_stats()
             app.destroy_app()
 
     def __register_reload_command(self):
@@ -66,13 +66,8 @@ class Environment(object):
     def _refresh(self):
         """Refreshes the environment data from disk
         """
-        try:
-            data = self.__load_data(self._env_path)
-        except TankUnreadableFileError:
-            raise TankError("Unable to load environment file: %s" % self._env_path)
+        self._env_data = self._load_env_data()
 
-        self._env_data = environment_includes.process_includes(self._env_path, data, self.__context)
-        
         if not self._env_data:
             raise TankError('No data in env file: %s' % (self._env_path))
 
@@ -104,6 +99,19 @@ class Environment(object):
         self.__framework_locations = {}
         self.__extract_locations()
 
+    def _load_env_data(self):
+        """
+        Loads the environment data from disk and resolves its includes.
+
+        :returns: Dictionary with the environment data.
+        """
+        try:
+            data = self.__load_data(self._env_path)
+        except TankUnreadableFileError:
+            raise TankError("Unable to load environment file: %s" % self._env_path)
+
+        return environment_includes.process_includes(self._env_path, data, self.__context)
+
     def __is_item_disabled(self, settings):
         """
         handles the checks to see if an item is disabled
@@ -197,7 +205,7 @@ class Environment(object):
         """
         loads the main data from disk, raw form
         """
-        return g_yaml_cache.get(path)
+        return g_yaml_cache.get(path, copy_on_write=True)
 
     ##########################################################################################
     # Properties
@@ -509,8 +517,22 @@ class InstalledEnvironment(Environment):
                         context-based include file resolve will be
                         skipped.
         """
-        super(InstalledEnvironment, self).__init__(env_path, context)
+        # set before initializing the environment, which loads its data.
         self.__pipeline_config = pipeline_config
+        super(InstalledEnvironment, self).__init__(env_path, context)
+
+    def _load_env_data(self):
+        """
+        Returns the environment data from the pipeline configuration
+        snapshot if available, loads it from disk otherwise.
+
+        :returns: Dictionary with the environment data.
+        """
+        snapshot = self.__pipeline_config.get_config_snapshot()
+        data = snapshot and snapshot.get_environment(self._env_path)
+        if data is not None:
+            return data
+        return super(InstalledEnvironment, self)._load_env_data()
 
     def get_framework_descriptor(self, framework_name):
         """
@@ -586,6 +608,17 @@ class WritableEnvironment(InstalledEnvironment):
         self.set_yaml_preserve_mode(True)
         super(WritableEnvironment, self).__init__(env_path, pipeline_config, context)
 
+    def _load_env_data(self):
+        """
+        Loads the environment data from disk and resolves its includes.
+
+        Writable environments always read their data from disk, since
+        they are refreshed right after being updated.
+
+        :returns: Dictionary with the environment data.
+        """
+        return Environment._load_env_data(self)
+
     def __load_writable_yaml(self, path):
         """
         Loads yaml data from disk.
@@ -63,6 +63,7 @@ class Framework(TankBundle):
                 fw._destroy_framework()
         # and destroy self
         self.log_debug("Destroying %s" % self)
+        self._log_settings_cache_stats()
         self.destroy_framework()
 
     ##########################################################################################
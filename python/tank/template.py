@@ -18,9 +18,9 @@ import re
 import sys
 
 from . import templatekey
-from .errors import TankError
+from .errors import TankError, TankAmbiguousTemplateFieldsError
 from . import constants
-from .template_path_parser import TemplatePathParser
+from .template_path_parser import TemplatePathParser, TemplatePathRegex
 
 class Template(object):
     """
@@ -104,6 +104,9 @@ class Template(object):
         self._prefix = ''
         self._static_tokens = []
 
+        # regular expressions used to parse paths, compiled on demand
+        self._path_regexes = {}
+
     def __repr__(self):
         class_name = self.__class__.__name__
         if self.name:
@@ -459,13 +462,19 @@ class Template(object):
         path_parser = None
         fields = None
 
-        for ordered_keys, static_tokens in zip(self._ordered_keys, self._static_tokens):
-            path_parser = TemplatePathParser(ordered_keys, static_tokens)
+        for index, (ordered_keys, static_tokens) in enumerate(zip(self._ordered_keys, self._static_tokens)):
+            path_regex = self._path_regexes.get(index)
+            if path_regex is None:
+                path_regex = TemplatePathRegex(ordered_keys, static_tokens)
+                self._path_regexes[index] = path_regex
+            path_parser = TemplatePathParser(ordered_keys, static_tokens, path_regex)
             fields = path_parser.parse_path(input_path, skip_keys)
             if fields != None:
                 break
 
         if fields is None:
+            if path_parser.ambiguous:
+                raise TankAmbiguousTemplateFieldsError("Template %s: %s" % (str(self), path_parser.last_error))
             raise TankError("Template %s: %s" % (str(self), path_parser.last_error))
 
         return fields
@@ -656,6 +665,138 @@ def split_path(input_path):
     cur_path = cur_path.replace("\\", "/")
     return cur_path.split("/")
 
+
+class TemplateIndex(object):
+    """
+    Precompiled lookup structure used to quickly find the templates that
+    may match a given path.
+
+    Validating a path against a template is expensive, so rather than
+    validating every template for every lookup, template path variations
+    are dispatched on their leading static token (the storage root followed
+    by any static folders at the start of the definition). For an absolute
+    input path, only templates where that leading token is a prefix of the
+    path can possibly match, and each of those is further filtered using the
+    same in-order static token scan that the template parser carries out
+    before attempting to resolve any key values. Only the remaining handful
+    of candidates are then fully validated.
+
+    Templates which cannot be dispatched this way (template strings and
+    templates without a leading static token) are always validated.
+    """
+
+    def __init__(self, templates):
+        """
+        :param templates: Dictionary of form {template name: template object}
+        """
+        # keep a shallow copy so that we can detect if the templates
+        # dictionary has been replaced or modified since the index was built.
+        self._snapshot = dict(templates)
+
+        # templates in the order they are iterated over in the dictionary.
+        # candidates are always returned in this order to keep any
+        # results and error messages stable.
+        self._ordered_templates = list(templates.values())
+
+        # leading token lengths -> {leading token: [(template position, static tokens), ...]}
+        self._prefix_table = {}
+        # positions of templates that always need to be validated
+        self._unindexed = []
+
+        for position, template in enumerate(self._ordered_templates):
+            variations = self._get_indexable_variations(template)
+            if variations is None:
+                self._unindexed.append(position)
+                continue
+            for static_tokens in variations:
+                leading_token = static_tokens[0]
+                tokens_by_prefix = self._prefix_table.setdefault(len(leading_token), {})
+                tokens_by_prefix.setdefault(leading_token, []).append((position, static_tokens))
+
+        self._prefix_lengths = sorted(self._prefix_table.keys(), reverse=True)
+
+    def _get_indexable_variations(self, template):
+        """
+        Returns the static tokens for each of the definition variations of
+        the given template if it can be dispatched on a leading static token.
+
+        :param template: :class:`Template` to inspect
+        :returns: List of static token lists or None if the template cannot be indexed.
+        """
+        if not isinstance(template, TemplatePath):
+            return None
+
+        variations = []
+        for definition, static_tokens in zip(template._definitions, template._static_tokens):
+            expanded_definition = os.path.join(template._prefix, definition) if definition else template._prefix
+            if (not static_tokens or
+                    not os.path.isabs(static_tokens[0]) or
+                    expanded_definition.startswith("{")):
+                # the definition doesn't start with an absolute static
+                # token so there is nothing to dispatch on
+                return None
+            variations.append(static_tokens)
+        return variations
+
+    def is_current(self, templates):
+        """
+        Checks if this index was built from the given templates.
+
+        :param templates: Dictionary of form {template name: template object}
+        :returns: True if the index is up to date, False otherwise.
+        """
+        # dictionary comparison checks both names and template
+        # object identities so this catches replaced templates
+        return self._snapshot == templates
+
+    def get_candidates(self, path):
+        """
+        Returns the templates which may match the given path.
+
+        All templates which are able to validate the path are guaranteed to
+        be part of the returned list, however returned templates may still fail
+        validation.
+
+        :param path: Path to find candidates for
+        :returns: List of :class:`Template` objects
+        """
+        # all token comparisons are done case insensitively
+        # on a normalized path, same as the template parser does.
+        lower_path = os.path.normpath(path).lower()
+
+        if not os.path.isabs(lower_path):
+            # a relative path may resolve a key before the leading token
+            # so we cannot make any assumptions about it.
+            return list(self._ordered_templates)
+
+        positions = set(self._unindexed)
+        for prefix_length in self._prefix_lengths:
+            entries = self._prefix_table[prefix_length].get(lower_path[:prefix_length])
+            if not entries:
+                continue
+            for (position, static_tokens) in entries:
+                if position not in positions and self._tokens_in_path(static_tokens, lower_path):
+                    positions.add(position)
+
+        return [self._ordered_templates[position] for position in sorted(positions)]
+
+    def _tokens_in_path(self, static_tokens, lower_path):
+        """
+        Checks that all the static tokens can be found in order in the path.
+
+        :param static_tokens: List of lower case static tokens
+        :param lower_path: Normalized lower case path
+        :returns: True if all tokens are found, False otherwise.
+        """
+        start_pos = 0
+        for token in static_tokens:
+            token_pos = lower_path.find(token, start_pos)
+            if token_pos < 0:
+                return False
+            start_pos = token_pos + len(token)
+        return True
+
+
 def read_templates(pipeline_configuration):
     """
     Creates templates and keys based on contents of templates file.
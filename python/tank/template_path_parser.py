@@ -13,7 +13,10 @@ Parsing of template paths into values for specified keys using a list of static
 """
 
 import os
+import re
+
 from .errors import TankError
+from .templatekey import StringKey, IntegerKey, SequenceKey
 
 class TemplatePathParser(object):
     """
@@ -46,19 +49,24 @@ class TemplatePathParser(object):
             self.fully_resolved = fully_resolved
             self.last_error = last_error    
     
-    def __init__(self, ordered_keys, static_tokens):
+    def __init__(self, ordered_keys, static_tokens, path_regex=None):
         """
         Construction
                                 
         :param ordered_keys:    Template key objects in order that they appear in the
                                 template definition.
         :param static_tokens:   Pieces of the definition that don't represent Template Keys.
+        :param path_regex:      Optional :class:`TemplatePathRegex` compiled for the same 
+                                keys and static tokens, used to parse paths without
+                                going through the recursive resolver when possible.
         """
         self.ordered_keys = ordered_keys
         self.static_tokens = static_tokens
+        self.path_regex = path_regex
         self.fields = {}
         self.input_path = None
         self.last_error = "Unable to parse path" 
+        self.ambiguous = False
 
     def parse_path(self, input_path, skip_keys):
         """
@@ -105,6 +113,14 @@ class TemplatePathParser(object):
                 # template with no keys - in this case not matching 
                 # the input path. Return for no match.
                 return None        
+
+        # try to resolve the fields in a single pass. If the path can't be
+        # resolved that way, fall back on the recursive search below, which
+        # also takes care of reporting errors.
+        if self.path_regex:
+            fields = self.path_regex.match(input_path, lower_path, skip_keys)
+            if fields is not None:
+                return fields
             
         # find all occurances of all tokens in the path.  This will 
         # produce a list of lists, one list of positions for each token.
@@ -222,12 +238,14 @@ class TemplatePathParser(object):
                     # found more than one valid value so value is ambiguous!
                     self.last_error = ("Ambiguous values found for key '%s' could be any of: '%s'" 
                                        % (key.name, "', '".join([v.value for v in resolved_possible_values])))
+                    self.ambiguous = True
                     return None
                 else:
                     # didn't find any fully resolved values so we have multiple 
                     # non-fully resolved values which also means the value is ambiguous!
                     self.last_error = ("Ambiguous values found for key '%s' could be any of: '%s'" 
                                        % (key.name, "', '".join([v.value for v in possible_values])))
+                    self.ambiguous = True
                     return None
 
             # if key isn't a skip key then add it to the fields dictionary:            
@@ -358,4 +376,261 @@ class TemplatePathParser(object):
                                                                     fully_resolved, 
                                                                     last_error))
             
-        return possible_values
\ No newline at end of file
+        return possible_values
+
+
+class TemplatePathRegex(object):
+    """
+    Regular expressions matching paths for a set of keys and static tokens,
+    used by :class:`TemplatePathParser` to resolve fields in a single pass.
+
+    Each key is matched by a character class which covers all of its valid
+    values. If that class doesn't contain the first character of the static
+    token following the key, the key value has to end at the first occurrence
+    of that character, meaning that there is at most one way to split a path
+    into key values. Keys and static tokens are laid out in the same way as
+    the recursive resolver of :class:`TemplatePathParser` does, so that both
+    find the same values. When a character class can't be established for a
+    key, no regular expressions are compiled and the recursive resolver is
+    always used.
+    """
+
+    # character classes covering the valid characters for StringKey filters.
+    # Non-ascii utf-8 bytes are all included since they may be part of
+    # alphanumeric unicode characters.
+    _FILTER_CHAR_CLASSES = {
+        "alphanumeric": r"[a-zA-Z0-9\x80-\xff]",
+        "alpha": r"[a-zA-Z\x80-\xff]",
+    }
+
+    # integer values may be padded with whitespace
+    _INTEGER_CHAR_CLASS = r"[\s0-9]"
+
+    # maximum number of key values to keep in the cache of converted values
+    _MAX_CACHED_VALUES = 10000
+
+    def __init__(self, ordered_keys, static_tokens):
+        """
+        Construction
+
+        :param ordered_keys:    Template key objects in order that they appear in the
+                                template definition.
+        :param static_tokens:   Pieces of the definition that don't represent Template Keys.
+        """
+        self.ordered_keys = ordered_keys
+        self.static_tokens = static_tokens
+        self._key_names = [key.name for key in ordered_keys]
+
+        # the same values typically come up again and again when parsing
+        # paths, so keep the result of converting them for each key.
+        self._values = {}
+
+        # the recursive resolver looks for occurrences of tokens one after the
+        # other, skipping over the ones overlapping a previous occurrence. This
+        # only matters for tokens that can overlap themselves, so keep track
+        # of how many tokens need checking.
+        self._num_tokens_to_check = 0
+        for (index, token) in enumerate(static_tokens):
+            if self._can_overlap(token):
+                self._num_tokens_to_check = index + 1
+
+        # regular expressions for paths starting with the first 
+        # static token and for paths starting with a key
+        self._layouts = []
+
+        num_keys = len(ordered_keys)
+        num_tokens = len(static_tokens)
+        if not num_keys:
+            return
+
+        layouts = []
+        if num_keys >= num_tokens - 1:
+            regex = self._compile(static_tokens[0], static_tokens[1:])
+            if regex is None:
+                return
+            # first static token precedes the first key
+            layouts.append((regex, True))
+        if num_keys >= num_tokens:
+            regex = self._compile("", static_tokens)
+            if regex is None:
+                return
+            layouts.append((regex, False))
+
+        self._layouts = layouts
+
+    def _can_overlap(self, token):
+        """
+        Checks if two occurrences of a static token can overlap.
+
+        :param token: Static token.
+        :returns: True if the token starts with one of its suffixes.
+        """
+        return any(token.startswith(token[i:]) for i in range(1, len(token)))
+
+    def _get_char_class(self, key):
+        """
+        Returns a regular expression character class which matches
+        all the characters allowed in the values of a key.
+
+        :param key: Template key object.
+        :returns: Regular expression string.
+        """
+        if key.choices:
+            chars = set()
+            for choice in key.choices:
+                if isinstance(choice, unicode):
+                    # can't reliably express these as bytes
+                    chars = None
+                    break
+                choice = str(choice)
+                chars.update(choice.lower())
+                chars.update(choice.upper())
+            if chars:
+                chars.discard(os.path.sep)
+                return "[%s]" % "".join(re.escape(c) for c in sorted(chars))
+
+        elif isinstance(key, StringKey) and key.filter_by in self._FILTER_CHAR_CLASSES:
+            return self._FILTER_CHAR_CLASSES[key.filter_by]
+
+        elif isinstance(key, IntegerKey) and not isinstance(key, SequenceKey):
+            return self._INTEGER_CHAR_CLASS
+
+        # anything goes apart from path separators
+        return "[^%s]" % re.escape(os.path.sep)
+
+    def _compile(self, leading_token, tokens):
+        """
+        Compiles a regular expression for a layout of keys and static tokens.
+
+        :param leading_token: Static token the path starts with. Empty if the
+                              path starts with a key.
+        :param tokens: Static tokens following each key.
+        :returns: Compiled regular expression or None if the layout can't be
+                  matched unambiguously.
+        """
+        pattern = re.escape(leading_token)
+        closing = ""
+        for index, key in enumerate(self.ordered_keys):
+            char_class = self._get_char_class(key)
+            token = tokens[index] if index < len(tokens) else ""
+
+            if token and re.match(char_class, token[0], re.IGNORECASE):
+                # the end of the key value can't be determined
+                return None
+
+            pattern += "(%s+)" % char_class
+            if not token:
+                # the key value extends to the end of the path and 
+                # any remaining keys are left unresolved.
+                break
+
+            pattern += re.escape(token)
+            if index + 1 < len(self.ordered_keys):
+                # the path may end after a static token, 
+                # leaving the remaining keys unresolved
+                pattern += r"(?:\Z|"
+                closing += ")"
+
+        return re.compile(pattern + r"\Z" + closing, re.IGNORECASE)
+
+    def match(self, input_path, lower_path, skip_keys):
+        """
+        Resolves the fields for a path.
+
+        :param input_path:  Normalized path to parse.
+        :param lower_path:  Lower case version of the path.
+        :param skip_keys:   List of keys for whom we do not need to find values.
+        :returns: Dictionary of fields mapping key names to their values, or None
+                  if the fields couldn't be resolved in a single pass.
+        """
+        if not self._layouts:
+            return None
+
+        # skipped keys aren't validated, so can contain any character and
+        # character classes only cover str paths.
+        if not isinstance(input_path, str):
+            return None
+        for key_name in skip_keys:
+            if key_name in self._key_names:
+                return None
+
+        matches = []
+        for (regex, leading_token) in self._layouts:
+            match = regex.match(input_path)
+            if match:
+                matches.append((match, leading_token))
+
+        if len(matches) != 1:
+            # no match or ambiguous layouts
+            return None
+        (match, leading_token) = matches[0]
+
+        str_values = match.groups()
+        if None in str_values:
+            # the path ended before all keys were resolved. Whether this is
+            # valid depends on where the remaining static tokens can be found,
+            # so leave it to the recursive resolver.
+            return None
+
+        if self._num_tokens_to_check and \
+           not self._token_positions_valid(match, str_values, leading_token, lower_path):
+            return None
+
+        fields = {}
+        resolved_values = {}
+        for (index, str_value) in enumerate(str_values):
+
+            key_name = self._key_names[index]
+
+            # can't have two different values for the same key
+            if resolved_values.setdefault(key_name, str_value) != str_value:
+                return None
+
+            try:
+                value = self._values[(index, str_value)]
+            except KeyError:
+                key = self.ordered_keys[index]
+                if key.length is not None and len(str_value) < key.length:
+                    return None
+                try:
+                    value = key.value_from_str(str_value)
+                except TankError:
+                    return None
+                if len(self._values) >= self._MAX_CACHED_VALUES:
+                    self._values.clear()
+                self._values[(index, str_value)] = value
+
+            if value is not None:
+                fields[key_name] = value
+
+        return fields
+
+    def _token_positions_valid(self, match, str_values, leading_token, lower_path):
+        """
+        Checks that the recursive resolver would find static tokens
+        at the positions they were matched at.
+
+        :param match: Regular expression match object.
+        :param str_values: Values matched for each key.
+        :param leading_token: True if the first static token precedes the first key.
+        :param lower_path: Lower case version of the path.
+        :returns: True if the static tokens positions are valid.
+        """
+        # replay the search of TemplatePathParser.parse_path
+        start_pos = 0
+        for index in range(self._num_tokens_to_check):
+            token = self.static_tokens[index]
+            # index of the key preceding the token
+            key_index = index - 1 if leading_token else index
+
+            token_pos = lower_path.find(token, start_pos)
+            # the first occurrence of a token is where the search for the next token starts
+            start_pos = token_pos + len(token)
+
+            position = match.end(key_index + 1) if key_index >= 0 else 0
+            while 0 <= token_pos < position:
+                token_pos = lower_path.find(token, token_pos + len(token))
+            if token_pos != position:
+                return False
+
+        return True
@@ -0,0 +1,226 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Scanning of the file system for paths matching a template.
+"""
+
+from __future__ import with_statement
+
+import os
+import glob
+import fnmatch
+import contextlib
+
+from . import constants
+from .errors import TankError, TankAmbiguousTemplateFieldsError
+from .template import TemplatePath
+from .util import thread_pool
+from . import LogManager
+
+log = LogManager.get_logger(__name__)
+
+
+class TemplatePathScanner(object):
+    """
+    Finds the paths on disk matching a glob pattern built from a :class:`TemplatePath`.
+
+    Rather than letting :mod:`glob` walk the pattern one directory at a time, the
+    scanner walks the pattern level by level. All directories found at a level are
+    listed concurrently, so that the time taken by a scan grows with the depth of the
+    template and the latency of the file system rather than with the number of
+    folders. Before descending into a folder, it is validated against the parent
+    templates of the scanned template so that folders which can't possibly hold
+    matching paths are never listed.
+    """
+
+    def __init__(self, template, max_workers=None):
+        """
+        :param template: :class:`TemplatePath` the glob patterns are built from.
+        :param max_workers: Maximum number of directories listed at the same time.
+                            Defaults to ``constants.TEMPLATE_SCAN_MAX_WORKERS``.
+        """
+        self._template = template
+        if max_workers is None:
+            max_workers = constants.TEMPLATE_SCAN_MAX_WORKERS
+        self._max_workers = max(1, max_workers)
+        # parent templates, indexed by the number of folders they span below the root
+        self._parent_templates = self._get_parent_templates(template)
+        # number of path components for each variation of the template
+        self._definition_lengths = set(
+            len([x for x in definition.split(os.sep) if x]) for definition in template._definitions
+        )
+
+    def scan(self, glob_str):
+        """
+        Yields the paths matching a glob pattern, as they are found.
+
+        Matches are the same as for ``glob.iglob(glob_str)``, minus the paths
+        whose folders don't validate against any of the parent templates.
+        The paths are not validated against the template itself.
+
+        :param glob_str: Glob pattern built from the template, e.g. by ``_apply_fields``.
+        :returns: Generator of matching paths.
+        """
+        root_path = self._template.root_path
+        relative_path = glob_str[len(root_path):]
+        if not glob_str.startswith(root_path) or \
+           (relative_path and not relative_path.startswith(os.sep) and not root_path.endswith(os.sep)):
+            # not built from this template, nothing we can prune.
+            for path in glob.iglob(glob_str):
+                yield path
+            return
+
+        # the root path is taken literally, only the part built
+        # from the template definition is treated as a pattern.
+        patterns = [x for x in relative_path.split(os.sep) if x]
+        if not patterns:
+            if os.path.lexists(glob_str):
+                yield glob_str
+            return
+
+        # key values containing a path separator shift the folders
+        # away from their parent template, don't prune in this case.
+        prune = len(patterns) in self._definition_lengths
+
+        paths = [root_path]
+        for (depth, pattern) in enumerate(patterns, 1):
+            is_leaf = depth == len(patterns)
+
+            if glob.has_magic(pattern):
+                # list all folders found so far at once.
+                matches = self._iter_matching_children(paths, pattern)
+            elif is_leaf:
+                # the path must exist.
+                candidates = [os.path.join(path, pattern) for path in paths]
+                matches = (
+                    [path] for (path, exists) in self._map(os.path.lexists, candidates) if exists
+                )
+            else:
+                # the next listing will tell if the folder exists.
+                matches = [[os.path.join(path, pattern) for path in paths]]
+
+            if is_leaf:
+                # yield paths as soon as their folder has been listed.
+                for child_paths in matches:
+                    for path in child_paths:
+                        yield path
+                return
+
+            paths = []
+            for child_paths in matches:
+                if prune:
+                    child_paths = [path for path in child_paths if self._is_valid_folder(path, depth)]
+                paths.extend(child_paths)
+            if not paths:
+                return
+
+    def _iter_matching_children(self, paths, pattern):
+        """
+        Lists folders concurrently and yields the paths of their children
+        whose name matches a pattern.
+
+        :param paths: Paths of the folders to list.
+        :param pattern: Glob pattern for a single path component.
+        :returns: Generator of lists of child paths, one list per folder.
+        """
+        for (path, names) in self._map(_list_folder, paths):
+            if pattern[0] != ".":
+                # same as glob, hidden files are only matched explicitly.
+                names = [name for name in names if name[0] != "."]
+            yield [os.path.join(path, name) for name in fnmatch.filter(names, pattern)]
+
+    def _map(self, func, items):
+        """
+        Applies a function to a list of items on a pool of threads.
+
+        :param func: Callable taking a single item.
+        :param items: List of items.
+        :returns: Generator of ``(item, result)`` tuples, in order of completion.
+        """
+        # closing the results when the caller stops iterating stops the
+        # workers, so that they don't keep hitting the file system for nothing.
+        with contextlib.closing(thread_pool.imap_unordered(func, items, self._max_workers)) as results:
+            for (item, result, exc_info) in results:
+                if exc_info:
+                    raise exc_info[0], exc_info[1], exc_info[2]
+                yield (item, result)
+
+    def _is_valid_folder(self, path, depth):
+        """
+        Checks if a folder can be part of a path matching the template.
+
+        :param path: Path to the folder.
+        :param depth: Number of folders between the root and the path.
+        :returns: False if none of the parent templates spanning the same
+                  number of folders is valid for the path.
+        """
+        parent_templates = self._parent_templates.get(depth)
+        if not parent_templates:
+            return True
+
+        for parent_template in parent_templates:
+            try:
+                parent_template.get_fields(path)
+            except TankAmbiguousTemplateFieldsError:
+                # the remainder of the path may lift the ambiguity.
+                return True
+            except TankError:
+                pass
+            else:
+                return True
+        log.debug("Not scanning %s which doesn't match any of %s" % (path, parent_templates))
+        return False
+
+    def _get_parent_templates(self, template):
+        """
+        Builds the parent templates of all the variations of a template.
+
+        Unlike :meth:`TemplatePath.parent`, which is based on the most inclusive
+        variation only, optional keys are taken into account so that no folder
+        holding matching paths gets pruned.
+
+        :param template: :class:`TemplatePath` to get the parents of.
+        :returns: Dictionary mapping a number of folders to the list of templates
+                  spanning that many folders below the root.
+        """
+        parent_templates = {}
+        definitions = set()
+        for definition in template._definitions:
+            tokens = [x for x in definition.split(os.sep) if x]
+            for depth in range(1, len(tokens)):
+                parent_definition = os.path.join(*tokens[:depth])
+                if parent_definition in definitions or "{" not in tokens[depth - 1]:
+                    # already known, or no key in the last folder. In the latter
+                    # case, the folder name is a literal in the glob pattern.
+                    continue
+                definitions.add(parent_definition)
+                parent_templates.setdefault(depth, []).append(
+                    TemplatePath(
+                        parent_definition,
+                        template.keys,
+                        template.root_path,
+                        per_platform_roots=template._per_platform_roots
+                    )
+                )
+        return parent_templates
+
+
+def _list_folder(path):
+    """
+    Lists the content of a folder.
+
+    :param path: Path to the folder.
+    :returns: List of names, empty if the folder can't be listed.
+    """
+    try:
+        return os.listdir(path)
+    except os.error:
+        return []
@@ -13,13 +13,22 @@ Methods for loading and managing plugins, e.g. Apps, Engines, Hooks etc.
 
 """
 
+from __future__ import with_statement
+
+import os
 import sys
 import imp
+import uuid
+import marshal
+import hashlib
 import traceback
 import inspect
 
 from ..errors import TankError
+from .. import constants
 from .. import LogManager
+from . import filesystem
+from .local_file_storage import LocalFileStorageManager
 
 log = LogManager.get_logger(__name__)
 
@@ -47,12 +56,10 @@ def load_plugin(plugin_file, valid_base_class, alternate_base_classes=None):
 
     # construct a uuid and use this as the module name to ensure
     # that each import is unique
-    import uuid
     module_uid = uuid.uuid4().hex
     module = None
     try:
-        imp.acquire_lock()
-        module = imp.load_source(module_uid, plugin_file)
+        module = _load_source(module_uid, plugin_file)
     except Exception:
         # log the full callstack to make sure that whatever the
         # calling code is doing, this error is logged to help
@@ -67,8 +74,6 @@ def load_plugin(plugin_file, valid_base_class, alternate_base_classes=None):
         message += "Traceback (most recent call last):\n"
         message += "\n".join( traceback.format_tb(exc_traceback))
         raise TankLoadPluginError(message)
-    finally:
-        imp.release_lock()
 
     # cool, now validate the module
     found_classes = list()
@@ -123,3 +128,83 @@ def load_plugin(plugin_file, valid_base_class, alternate_base_classes=None):
 
     # return the class that was found.
     return found_classes[0]
+
+
+def _load_source(module_name, plugin_file):
+    """
+    Loads a python file as a new module, like ``imp.load_source`` does.
+
+    The code of the file is taken from the bytecode cache when possible, and
+    the module is executed without holding the global import lock so that
+    plugins can be loaded by several threads at the same time.
+
+    :param module_name: Name of the module to create.
+    :param plugin_file: Path to the python file to load.
+    :returns: The loaded module.
+    """
+    code = _get_code(plugin_file)
+
+    module = imp.new_module(module_name)
+    module.__file__ = plugin_file
+    sys.modules[module_name] = module
+    try:
+        exec code in module.__dict__
+    except:
+        del sys.modules[module_name]
+        raise
+    return module
+
+
+def _get_code(plugin_file):
+    """
+    Returns the code object of a python file.
+
+    Compiled code is stored in the bytecode cache, in a file indexed by a hash
+    of the python version and the path of the file. The hash of the content
+    the code was compiled from is stored alongside it, so that the code is only
+    compiled again if the file changes and the cache holds a single entry per
+    file. Unlike the ``.pyc`` files python writes next to the sources, this
+    works for read only locations such as shared bundle caches.
+
+    :param plugin_file: Path to the python file.
+    :returns: Code object.
+    """
+    # read the file like python does when importing it, with universal newlines.
+    with open(plugin_file, "rU") as fh:
+        source = fh.read()
+
+    path_digest = hashlib.sha1(imp.get_magic())
+    path_digest.update(plugin_file.encode("utf-8") if isinstance(plugin_file, unicode) else plugin_file)
+    source_digest = hashlib.sha1(source).hexdigest()
+    cache_path = os.path.join(
+        LocalFileStorageManager.get_global_root(LocalFileStorageManager.CACHE),
+        constants.BYTECODE_CACHE_FOLDER,
+        "%s.pyc" % path_digest.hexdigest()
+    )
+
+    try:
+        with open(cache_path, "rb") as fh:
+            if marshal.load(fh) == source_digest:
+                return marshal.load(fh)
+    except (IOError, EOFError, ValueError, TypeError):
+        # not cached yet, or corrupt.
+        pass
+
+    code = compile(source, plugin_file, "exec")
+
+    temp_path = "%s.%s" % (cache_path, uuid.uuid4().hex)
+    try:
+        filesystem.ensure_folder_exists(os.path.dirname(cache_path))
+        with open(temp_path, "wb") as fh:
+            marshal.dump(source_digest, fh)
+            marshal.dump(code, fh)
+        # other processes either see a complete file or no file at all.
+        if os.name == "nt" and os.path.exists(cache_path):
+            os.remove(cache_path)
+        os.rename(temp_path, cache_path)
+    except Exception, e:
+        log.debug("Could not cache the compiled code of %s: %s" % (plugin_file, e))
+        if os.path.exists(temp_path):
+            filesystem.safe_delete_file(temp_path)
+
+    return code
@@ -24,6 +24,7 @@ import pprint
 import time
 import threading
 import tempfile
+import shutil
 
 # use api json to cover py 2.5
 from tank_vendor import shotgun_api3
@@ -41,6 +42,9 @@ from .metrics import log_user_attribute_metric
 
 log = LogManager.get_logger(__name__)
 
+# size of the chunks written to disk when downloading files
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
 
 def __get_api_core_config_location():
     """
@@ -242,6 +246,9 @@ def download_url(sg, url, location, use_url_extension=False):
                                    contents. The newly constructed full path name
                                    will be returned.
 
+    The payload is streamed to a temporary file next to ``location`` which is then
+    renamed, so the file at ``location`` is never partially written.
+
     :returns: Full filepath to the downloaded file. This may have been altered from
               the input ``location`` if ``use_url_extension`` is True and a file extension
               could be determined from the resolved url.
@@ -282,16 +289,30 @@ def download_url(sg, url, location, use_url_extension=False):
             if url_ext:
                 location = "%s%s" % (location, url_ext)
             
-        f = open(location, "wb")
+        temp_location = "%s.%s.part" % (location, uuid.uuid4().hex)
         try:
-            f.write(response.read())
+            with open(temp_location, "wb") as f:
+                shutil.copyfileobj(response, f, DOWNLOAD_CHUNK_SIZE)
+            _replace_file(temp_location, location)
         finally:
-            f.close()
+            filesystem.safe_delete_file(temp_location)
     except Exception, e:
         raise TankError("Could not download contents of url '%s'. Error reported: %s" % (url, e))
 
     return location
 
+def _replace_file(src, dst):
+    """
+    Renames a file, replacing the destination if it exists.
+
+    :param src: Path to the file to rename.
+    :param dst: New path of the file.
+    """
+    if sys.platform == "win32" and os.path.exists(dst):
+        # windows can't rename over an existing file
+        os.remove(dst)
+    os.rename(src, dst)
+
 def __setup_sg_auth_and_proxy(sg):
     """
     Borrowed from the Shotgun Python API, setup urllib2 with a cookie for authentication on
@@ -326,6 +347,12 @@ def download_and_unpack_attachment(sg, attachment_id, target, retries=5):
     Downloads the given attachment from Shotgun, assumes it is a zip file
     and attempts to unpack it into the given location.
 
+    The attachment is streamed to a temporary file rather than held in memory,
+    and unpacked into a staging folder next to the target. If the target doesn't
+    exist yet, the staging folder is then renamed into place, so that other
+    processes never see a partially unpacked target. Otherwise the target is
+    left untouched.
+
     :param sg: Shotgun API instance
     :param attachment_id: Attachment to download
     :param target: Folder to unpack zip to. if not created, the method will
@@ -339,17 +366,19 @@ def download_and_unpack_attachment(sg, attachment_id, target, retries=5):
     attempt = 0
     done = False
 
+    # the staging folder must be on the same file system
+    # as the target for the final rename to be atomic.
+    target = target.rstrip(os.sep)
+    target_parent = os.path.dirname(target)
+
     while not done and attempt < retries:
 
         zip_tmp = os.path.join(tempfile.gettempdir(), "%s_tank.zip" % uuid.uuid4().hex)
+        staging_folder = "%s.%s.tmp" % (target, uuid.uuid4().hex)
         try:
             time_before = time.time()
-            log.debug("Downloading attachment id %s..." % attachment_id)
-            bundle_content = sg.download_attachment(attachment_id)
-
-            log.debug("Download complete. Saving into %s" % zip_tmp)
-            with open(zip_tmp, "wb") as fh:
-                fh.write(bundle_content)
+            log.debug("Downloading attachment id %s into %s..." % (attachment_id, zip_tmp))
+            sg.download_attachment(attachment_id, file_path=zip_tmp)
 
             file_size = os.path.getsize(zip_tmp)
 
@@ -361,9 +390,12 @@ def download_and_unpack_attachment(sg, attachment_id, target, retries=5):
             log_user_attribute_metric("Tk attachment download speed", "%4f Mbit/s" % broadband_speed_mibps)
 
 
-            log.debug("Unpacking %s bytes to %s..." % (file_size, target))
-            filesystem.ensure_folder_exists(target)
-            unzip_file(zip_tmp, target)
+            log.debug("Unpacking %s bytes to %s..." % (file_size, staging_folder))
+            if target_parent:
+                filesystem.ensure_folder_exists(target_parent)
+            filesystem.ensure_folder_exists(staging_folder)
+            unzip_file(zip_tmp, staging_folder)
+            _move_staged_folder(staging_folder, target)
 
         except Exception, e:
             log.warning(
@@ -375,8 +407,10 @@ def download_and_unpack_attachment(sg, attachment_id, target, retries=5):
         else:
             done = True
         finally:
-            # remove zip file
+            # remove zip file and anything left over in the staging area
             filesystem.safe_delete_file(zip_tmp)
+            if os.path.exists(staging_folder):
+                shutil.rmtree(staging_folder, ignore_errors=True)
 
     if not done:
         # we were not successful
@@ -387,6 +421,38 @@ def download_and_unpack_attachment(sg, attachment_id, target, retries=5):
     else:
         log.debug("Attachment download and unpack complete.")
 
+def _move_staged_folder(staging_folder, target):
+    """
+    Moves the content of a staging folder into its final location.
+
+    If the target doesn't exist, or is empty, the staging folder is atomically
+    renamed. If another process created the target in the meantime, its content
+    is kept and the staging folder is discarded, since the target may already
+    be in use.
+
+    :param staging_folder: Folder to move.
+    :param target: Final location of the folder.
+    """
+    if os.path.isdir(target) and not os.listdir(target):
+        try:
+            os.rmdir(target)
+        except OSError:
+            # someone else is populating it.
+            pass
+
+    if os.path.exists(target):
+        log.debug("%s was created by another process, discarding %s." % (target, staging_folder))
+        return
+
+    try:
+        os.rename(staging_folder, target)
+    except OSError:
+        if not os.path.exists(target):
+            raise
+        # another process moved the same content in place first.
+        log.debug("%s was created by another process, discarding %s." % (target, staging_folder))
+
+
 
     
 def get_associated_sg_base_url():
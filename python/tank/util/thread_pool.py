@@ -0,0 +1,81 @@
+# Copyright (c) 2016 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Helpers to carry out blocking operations, like file system or network I/O,
+on a pool of threads.
+"""
+
+import sys
+import threading
+import Queue
+
+
+def imap_unordered(func, items, max_workers):
+    """
+    Applies a function to a list of items on a pool of threads.
+
+    Results are yielded to the calling thread as they complete. Errors raised
+    by the function are returned rather than raised, so that the caller can
+    decide whether to carry on. Workers stop picking up new items once the
+    generator is closed, e.g. when the caller stops iterating because of an
+    error. With a single worker, items are processed by the calling thread.
+
+    :param func: Callable taking a single item.
+    :param items: List of items.
+    :param max_workers: Maximum number of threads to use.
+    :returns: Generator of ``(item, result, exc_info)`` tuples, in order of
+              completion. ``exc_info`` is None if the function succeeded, the
+              ``sys.exc_info()`` tuple of the error it raised otherwise.
+    """
+    num_workers = min(max_workers, len(items))
+    if num_workers <= 1:
+        for item in items:
+            yield _apply(func, item)
+        return
+
+    tasks = Queue.Queue()
+    for item in items:
+        tasks.put(item)
+    results = Queue.Queue()
+    stopped = threading.Event()
+
+    def worker():
+        while not stopped.isSet():
+            try:
+                item = tasks.get_nowait()
+            except Queue.Empty:
+                return
+            results.put(_apply(func, item))
+
+    for _ in range(num_workers):
+        thread = threading.Thread(target=worker)
+        thread.setDaemon(True)
+        thread.start()
+
+    try:
+        for _ in range(len(items)):
+            yield results.get()
+    finally:
+        stopped.set()
+
+
+def _apply(func, item):
+    """
+    Applies a function to an item.
+
+    :param func: Callable taking a single item.
+    :param item: Item to process.
+    :returns: ``(item, result, exc_info)`` tuple. See :meth:`imap_unordered`.
+    """
+    try:
+        return (item, func(item), None)
+    except Exception:
+        return (item, None, sys.exc_info())
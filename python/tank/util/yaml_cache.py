@@ -26,6 +26,274 @@ from ..errors import (
     TankFileDoesNotExistError,
 )
 
+# the libyaml based loader builds the same data as the pure python
+# one, considerably faster. It is only available if PyYAML was built
+# with libyaml support.
+_YamlLoader = getattr(yaml, "CLoader", yaml.Loader)
+
+
+def load_yaml(stream):
+    """
+    Parses yaml data, using the libyaml based loader when available.
+
+    :param stream: File handle or string holding the yaml data.
+    :returns: The parsed data.
+    """
+    return yaml.load(stream, Loader=_YamlLoader)
+
+
+def _make_view(value):
+    """
+    Wraps a dictionary or a list into a copy-on-write view.
+
+    :param value: Value to wrap.
+    :returns: :class:`CopyOnWriteDict` or :class:`CopyOnWriteList` for plain
+              dictionaries and lists, the value itself otherwise.
+    """
+    value_type = type(value)
+    if value_type is dict:
+        return CopyOnWriteDict(value)
+    if value_type is list:
+        return CopyOnWriteList(value)
+    return value
+
+
+def _thaw(value):
+    """
+    Builds a deep copy of a value made of plain dictionaries and lists.
+
+    :param value: Value to copy, possibly containing copy-on-write views.
+    :returns: The copied value.
+    """
+    if isinstance(value, dict):
+        return dict((key, _thaw(item)) for (key, item) in dict.iteritems(value))
+    if isinstance(value, list):
+        return [_thaw(item) for item in list.__iter__(value)]
+    return copy.deepcopy(value)
+
+
+class CopyOnWriteDict(dict):
+    """
+    Copy-on-write view of a dictionary held by the yaml cache.
+
+    All views of a yaml file share the data loaded by the cache. A view starts
+    as a shallow copy of the dictionary it wraps, so it can be changed freely
+    without affecting the cache. Nested dictionaries and lists are wrapped into
+    views of their own as they are accessed, rather than being copied upfront
+    like :func:`copy.deepcopy` would do.
+
+    Views can be used like regular dictionaries, with the exception of
+    operations reading the dictionary from C without going through its methods,
+    for example ``dict(view)`` or ``json.dumps(view)``. These see the nested
+    containers shared with the cache, which must not be modified.
+    ``copy.deepcopy(view)`` returns plain dictionaries and lists.
+    """
+
+    __slots__ = ("_source", "_shared_ids")
+
+    def __init__(self, source):
+        """
+        :param source: Dictionary to wrap.
+        """
+        dict.__init__(self, source)
+        # keeps the shared containers alive, so their ids can't be reused.
+        self._source = source
+        self._shared_ids = None
+
+    def _is_shared(self, value):
+        """
+        Checks if a value is a container shared with the cache.
+
+        :param value: Value held by the view.
+        :returns: True if the value needs to be wrapped before being handed out.
+        """
+        if type(value) not in (dict, list):
+            return False
+        if self._shared_ids is None:
+            self._shared_ids = set(id(x) for x in self._source.itervalues() if type(x) in (dict, list))
+        return id(value) in self._shared_ids
+
+    def _get_view(self, key):
+        """
+        Returns the value for a key, wrapping it into a view if it is shared.
+
+        :param key: Key of the value.
+        :returns: The value.
+        """
+        value = dict.__getitem__(self, key)
+        if self._is_shared(value):
+            value = _make_view(value)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def _wrap_all(self):
+        """
+        Wraps all the shared values into views.
+        """
+        for key in dict.keys(self):
+            self._get_view(key)
+
+    def __getitem__(self, key):
+        return self._get_view(key)
+
+    def get(self, key, default=None):
+        if key in self:
+            return self._get_view(key)
+        return default
+
+    def pop(self, key, *args):
+        if key in self:
+            value = self._get_view(key)
+            dict.__delitem__(self, key)
+            return value
+        return dict.pop(self, key, *args)
+
+    def popitem(self):
+        (key, value) = dict.popitem(self)
+        return (key, _make_view(value) if self._is_shared(value) else value)
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self._get_view(key)
+        dict.__setitem__(self, key, default)
+        return default
+
+    def items(self):
+        return [(key, self._get_view(key)) for key in dict.keys(self)]
+
+    def iteritems(self):
+        for key in dict.keys(self):
+            yield (key, self._get_view(key))
+
+    def values(self):
+        return [self._get_view(key) for key in dict.keys(self)]
+
+    def itervalues(self):
+        for key in dict.keys(self):
+            yield self._get_view(key)
+
+    def viewitems(self):
+        self._wrap_all()
+        return dict.viewitems(self)
+
+    def viewvalues(self):
+        self._wrap_all()
+        return dict.viewvalues(self)
+
+    def copy(self):
+        return dict(self.iteritems())
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        return _thaw(self)
+
+    def __reduce_ex__(self, protocol):
+        # pickles as a plain dictionary.
+        return (dict, (_thaw(self),))
+
+
+class CopyOnWriteList(list):
+    """
+    Copy-on-write view of a list held by the yaml cache.
+
+    See :class:`CopyOnWriteDict` for details.
+    """
+
+    __slots__ = ("_source", "_shared_ids")
+
+    def __init__(self, source):
+        """
+        :param source: List to wrap.
+        """
+        list.__init__(self, source)
+        # keeps the shared containers alive, so their ids can't be reused.
+        self._source = source
+        self._shared_ids = None
+
+    def _is_shared(self, value):
+        """
+        Checks if a value is a container shared with the cache.
+
+        :param value: Value held by the view.
+        :returns: True if the value needs to be wrapped before being handed out.
+        """
+        if type(value) not in (dict, list):
+            return False
+        if self._shared_ids is None:
+            self._shared_ids = set(id(x) for x in self._source if type(x) in (dict, list))
+        return id(value) in self._shared_ids
+
+    def _get_view(self, index):
+        """
+        Returns the value at an index, wrapping it into a view if it is shared.
+
+        :param index: Index of the value.
+        :returns: The value.
+        """
+        value = list.__getitem__(self, index)
+        if self._is_shared(value):
+            value = _make_view(value)
+            list.__setitem__(self, index, value)
+        return value
+
+    def _wrap_all(self):
+        """
+        Wraps all the shared values into views.
+        """
+        for index in xrange(list.__len__(self)):
+            self._get_view(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            self._wrap_all()
+            return list.__getitem__(self, index)
+        return self._get_view(index)
+
+    def __getslice__(self, start, stop):
+        self._wrap_all()
+        return list.__getslice__(self, start, stop)
+
+    def __iter__(self):
+        index = 0
+        while index < list.__len__(self):
+            yield self._get_view(index)
+            index += 1
+
+    def __reversed__(self):
+        self._wrap_all()
+        return list.__reversed__(self)
+
+    def __add__(self, other):
+        self._wrap_all()
+        return list.__add__(self, other)
+
+    def __radd__(self, other):
+        self._wrap_all()
+        return list(other) + list.__getslice__(self, 0, list.__len__(self))
+
+    def __mul__(self, count):
+        self._wrap_all()
+        return list.__mul__(self, count)
+
+    __rmul__ = __mul__
+
+    def pop(self, *args):
+        value = list.pop(self, *args)
+        return _make_view(value) if self._is_shared(value) else value
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return _thaw(self)
+
+    def __reduce_ex__(self, protocol):
+        # pickles as a plain list.
+        return (list, (_thaw(self),))
+
+
 class CacheItem(object):
     """
     Represents a single item in the global yaml cache.
@@ -157,7 +425,7 @@ class YamlCache(object):
             if path in self._cache:
                 del self._cache[path]
 
-    def get(self, path, deepcopy_data=True):
+    def get(self, path, deepcopy_data=True, copy_on_write=False):
         """
         Retrieve the yaml data for the specified path.  If it's not already
         in the cache of the cached version is out of date then this will load
@@ -165,6 +433,10 @@ class YamlCache(object):
         
         :param path:            The path of the yaml file to load.
         :param deepcopy_data:   Return deepcopy of data. Default is True.
+        :param copy_on_write:   Return a copy-on-write view of the data rather
+                                than a deepcopy. Views share the cached data until
+                                they are modified, see :class:`CopyOnWriteDict`.
+                                Takes precedence over deepcopy_data.
         :returns:               The raw yaml data loaded from the file.
         """
         # Adding a new CacheItem to the cache will cause the file mtime
@@ -175,9 +447,11 @@ class YamlCache(object):
         # the existing cached data.
         item = self._add(CacheItem(path))
 
-        # If asked to, return a deep copy of the cached data to ensure that 
-        # the cached data is not updated accidentally!
-        if deepcopy_data:
+        # If asked to, return a view or a deep copy of the cached data to
+        # ensure that the cached data is not updated accidentally!
+        if copy_on_write:
+            return _make_view(item.data)
+        elif deepcopy_data:
             return copy.deepcopy(item.data)
         else:
             return item.data
@@ -258,7 +532,7 @@ class YamlCache(object):
         path = item.path
         try:
             with open(path, "r") as fh:
-                raw_data = yaml.load(fh)
+                raw_data = load_yaml(fh)
         except IOError:
             raise TankFileDoesNotExistError("File does not exist: %s" % path)
         except Exception, e:
@@ -9,6 +9,7 @@
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
 import os
+import shutil
 import zipfile
 from . import filesystem
 from .. import LogManager
@@ -101,11 +102,21 @@ def _process_item(zip_obj, item_path, target_path):
             os.mkdir(target_path, 0777)
 
     else:
-        # this is a file! - write it in a way which is compatible
-        # with py25 zipfile library interface
+        # this is a file! - stream it to disk rather than reading
+        # the whole member in memory when the zipfile library allows it.
         target_obj = open(target_path, "wb")
-        target_obj.write(zip_obj.read(item_path))
-        target_obj.close()
+        try:
+            if hasattr(zip_obj, "open"):
+                source_obj = zip_obj.open(item_path)
+                try:
+                    shutil.copyfileobj(source_obj, target_obj)
+                finally:
+                    source_obj.close()
+            else:
+                # py25 zipfile library interface
+                target_obj.write(zip_obj.read(item_path))
+        finally:
+            target_obj.close()
         # Restore permissions on the extracted file
         # Took bits and bobs from here :
         # http://bugs.python.org/file34893/issue15795_test_and_doc_fixes.patch
@@ -0,0 +1,144 @@
+# Copyright (c) 2016 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from __future__ import with_statement
+
+import threading
+
+from mock import Mock
+import sgtk
+from sgtk.bootstrap.errors import TankBootstrapError
+
+from tank_test.tank_test_base import setUpModule, TankTestBase # noqa
+
+
+class TestCacheApps(TankTestBase):
+    """
+    Tests the caching of bundles by the toolkit manager.
+    """
+
+    def setUp(self):
+        super(TestCacheApps, self).setUp()
+        self.manager = sgtk.bootstrap.ToolkitManager(sg_user=Mock())
+        self.progress = []
+        self.downloaded = []
+        self.download_threads = {}
+        self.lock = threading.Lock()
+
+    def _progress_callback(self, progress_value, message):
+        self.progress.append((progress_value, message))
+
+    def _create_descriptor(self, name, exists=False, error=None, concurrent=True):
+        descriptor = Mock()
+        descriptor.__str__ = Mock(return_value=name)
+        descriptor.get_uri.return_value = "sgtk:descriptor:app_store?name=%s" % name
+        descriptor.exists_local.return_value = exists
+        descriptor.supports_concurrent_download.return_value = concurrent
+
+        def download_local():
+            if error:
+                raise error
+            with self.lock:
+                self.downloaded.append(name)
+                self.download_threads[name] = threading.current_thread()
+        descriptor.download_local.side_effect = download_local
+        return descriptor
+
+    def _create_pipeline_configuration(self, descriptors):
+        env = Mock()
+        env.get_engines.return_value = ["tk-engine"]
+        env.get_engine_descriptor.return_value = descriptors[0]
+        env.get_apps.return_value = range(1, len(descriptors))
+        env.get_app_descriptor.side_effect = lambda engine, idx: descriptors[idx]
+        env.get_frameworks.return_value = []
+
+        pipeline_configuration = Mock()
+        # two environments using the same bundles
+        pipeline_configuration.get_environments.return_value = ["env_a", "env_b"]
+        pipeline_configuration.get_environment.return_value = env
+        return pipeline_configuration
+
+    def test_concurrent_downloads(self):
+        """
+        Ensures missing bundles are downloaded once and progress is reported for all bundles.
+        """
+        descriptors = [self._create_descriptor("bundle_%d" % idx, exists=(idx == 0)) for idx in range(10)]
+        self.manager._cache_apps(
+            self._create_pipeline_configuration(descriptors), "tk-engine", self._progress_callback
+        )
+        self.assertEqual(sorted(self.downloaded), sorted("bundle_%d" % idx for idx in range(1, 10)))
+        self.assertFalse(descriptors[0].download_local.called)
+
+        # one check, one download start and nine download completions
+        self.assertEqual(len(self.progress), 11)
+        self.assertEqual(self.progress[-1][1].split(" (")[1], "10 of 10).")
+        progress_values = [x[0] for x in self.progress]
+        self.assertEqual(progress_values, sorted(progress_values))
+
+    def test_non_concurrent_downloads(self):
+        """
+        Ensures bundles which don't support concurrent downloads are downloaded by the calling thread.
+        """
+        descriptors = [
+            self._create_descriptor("bundle_%d" % idx, concurrent=(idx % 3 != 0)) for idx in range(10)
+        ]
+        self.manager._cache_apps(
+            self._create_pipeline_configuration(descriptors), "tk-engine", self._progress_callback
+        )
+        self.assertEqual(sorted(self.downloaded), sorted("bundle_%d" % idx for idx in range(10)))
+        # the non concurrent downloads are carried out first
+        self.assertEqual(self.downloaded[:4], ["bundle_0", "bundle_3", "bundle_6", "bundle_9"])
+        for idx in range(10):
+            self.assertEqual(
+                self.download_threads["bundle_%d" % idx] == threading.current_thread(),
+                idx % 3 == 0
+            )
+        self.assertEqual(self.progress[-1][1].split(" (")[1], "10 of 10).")
+        progress_values = [x[0] for x in self.progress]
+        self.assertEqual(progress_values, sorted(progress_values))
+
+    def test_single_failure(self):
+        """
+        Ensures the original error is raised when a single download fails.
+        """
+        descriptors = [
+            self._create_descriptor("bundle_0"),
+            self._create_descriptor("bundle_1", error=ValueError("boom")),
+            self._create_descriptor("bundle_2"),
+        ]
+        self.assertRaises(
+            ValueError,
+            self.manager._cache_apps,
+            self._create_pipeline_configuration(descriptors),
+            "tk-engine",
+            self._progress_callback
+        )
+        # other downloads are still carried out
+        self.assertEqual(sorted(self.downloaded), ["bundle_0", "bundle_2"])
+
+    def test_aggregated_failures(self):
+        """
+        Ensures all errors are reported when several downloads fail.
+        """
+        descriptors = [
+            self._create_descriptor("bundle_0", error=ValueError("first error")),
+            self._create_descriptor("bundle_1", error=ValueError("second error")),
+            self._create_descriptor("bundle_2"),
+        ]
+        try:
+            self.manager._cache_apps(
+                self._create_pipeline_configuration(descriptors), "tk-engine", self._progress_callback
+            )
+        except TankBootstrapError, e:
+            self.assertIn("first error", str(e))
+            self.assertIn("second error", str(e))
+        else:
+            self.fail("TankBootstrapError not raised")
+        self.assertEqual(self.downloaded, ["bundle_2"])
@@ -19,7 +19,7 @@ import sgtk
 
 import tank
 from tank.api import Tank
-from tank.errors import TankError
+from tank.errors import TankError, TankMultipleMatchingTemplatesError
 from tank.template import TemplatePath, TemplateString
 from tank.templatekey import StringKey, IntegerKey, SequenceKey
 
@@ -64,6 +64,54 @@ class TestTemplateFromPath(TankTestBase):
         self.assertIsNotNone(template)
         self.assertIsInstance(template, TemplateString)
 
+    def test_matches_all_templates_scan(self):
+        """Indexed lookups should give the same results as validating every template."""
+        paths = [
+            "sequences/Sequence_1/shot_010/Anm/publish/shot_010.jfk.v001.ma",
+            "sequences/Sequence_1/shot_010/Anm/publish/",
+            "sequences/Sequence_1/shot_010/Anm/work/maya",
+            "sequences/Sequence_1/shot_010",
+            "assets/Character/foo/Anm/work",
+            "",
+        ]
+        for path in paths:
+            full_path = os.path.join(self.project_root, path)
+            expected = [t for t in self.tk.templates.values() if t.validate(full_path)]
+            template = self.tk.template_from_path(full_path)
+            if expected:
+                self.assertEqual([template], expected)
+            else:
+                self.assertIsNone(template)
+
+    def test_modified_templates(self):
+        """Changes to the templates dictionary should be picked up."""
+        keys = {"Shot": StringKey("Shot")}
+        template = TemplatePath("custom_folder/{Shot}", keys, self.project_root, "custom")
+        path = os.path.join(self.project_root, "custom_folder", "shot_010")
+        self.assertIsNone(self.tk.template_from_path(path))
+
+        self.tk.templates["custom"] = template
+        self.assertEqual(self.tk.template_from_path(path), template)
+
+        self.tk.templates = {}
+        self.assertIsNone(self.tk.template_from_path(path))
+
+    def test_ambiguous_templates(self):
+        """Multiple matching templates should still raise."""
+        keys = {"Shot": StringKey("Shot"), "name": StringKey("name")}
+        self.tk.templates["ambiguous_a"] = TemplatePath(
+            "custom_folder/{Shot}", keys, self.project_root, "ambiguous_a"
+        )
+        self.tk.templates["ambiguous_b"] = TemplatePath(
+            "custom_folder/{name}", keys, self.project_root, "ambiguous_b"
+        )
+        path = os.path.join(self.project_root, "custom_folder", "shot_010")
+        self.assertRaises(
+            TankMultipleMatchingTemplatesError,
+            self.tk.template_from_path,
+            path
+        )
+
 
 class TestTemplatesLoaded(TankTestBase):
     """Test case for the loading of templates from project level config."""
@@ -186,6 +234,21 @@ class TestPathsFromTemplate(TankTestBase):
         self.assertIn(good_file_path, result)
         self.assertNotIn(bad_file_path, result)
 
+    def test_iter_paths(self):
+        """
+        Test that paths are streamed and that the scan stops at the limit.
+        """
+        fields = {"Sequence": "Seq_1", "Shot": "shot_1", "Step": "step_name"}
+        paths = self.tk.iter_paths_from_template(self.template, fields, skip_keys="version")
+        self.assertFalse(isinstance(paths, list))
+        self.assertEquals(set([self.file_1, self.file_2]), set(paths))
+
+        result = list(self.tk.iter_paths_from_template(self.template, fields, skip_keys="version", limit=1))
+        self.assertEquals(1, len(result))
+        self.assertIn(result[0], [self.file_1, self.file_2])
+
+        self.assertEquals([], list(self.tk.iter_paths_from_template(self.template, fields, limit=0)))
+
 
 class TestAbstractPathsFromTemplate(TankTestBase):
     """Tests Tank.abstract_paths_from_template method."""
@@ -306,9 +369,20 @@ class TestAbstractPathsFromTemplate(TankTestBase):
         result = self.tk.abstract_paths_from_template(self.template, {"name": "filename"})
         self.assertEquals(set(expected), set(result))
 
+    def test_iter_abstract_paths(self):
+        expected = [os.path.join(self.shot_a_path, "%V", "filename.%04d.exr"),
+                    os.path.join(self.shot_a_path, "%V", "anothername.%04d.exr")]
+
+        result = list(self.tk.iter_abstract_paths_from_template(self.template, {"Shot": "AAA"}))
+        self.assertEquals(sorted(expected), sorted(result))
+
+        result = list(self.tk.iter_abstract_paths_from_template(self.template, {"Shot": "AAA"}, limit=1))
+        self.assertEquals(1, len(result))
+        self.assertIn(result[0], expected)
+
 
 class TestPathsFromTemplateGlob(TankTestBase):
-    """Tests for Tank.paths_from_template method which check the string sent to glob.glob."""
+    """Tests for Tank.paths_from_template method which check the glob string sent to the scanner."""
     def setUp(self):
         super(TestPathsFromTemplateGlob, self).setUp()
         keys = {"Shot": StringKey("Shot"),
@@ -317,7 +391,7 @@ class TestPathsFromTemplateGlob(TankTestBase):
 
         self.template = TemplatePath("{Shot}/{version}/filename.{seq_num}", keys, root_path=self.project_root)
 
-    @patch("tank.api.glob.iglob")
+    @patch("tank.template_path_scanner.TemplatePathScanner.scan")
     def assert_glob(self, fields, expected_glob, skip_keys, mock_glob):
         # want to ensure that value returned from glob is returned
         expected = [os.path.join(self.project_root, "shot_1","001","filename.00001")]
@@ -11,6 +11,7 @@
 from __future__ import with_statement
 
 import os
+import time
 import copy
 
 from tank_test.tank_test_base import *
@@ -278,6 +279,94 @@ class TestFromPath(TestContext):
 
 
 
+class TestFromPathCache(TestContext):
+
+    @patch("tank.util.login.get_current_user")
+    def test_cache_hit(self, get_current_user):
+        """
+        Check that resolving the same path twice is served by the cache.
+        """
+        get_current_user.return_value = self.current_user
+        shot_path_abs = os.path.join(self.project_root, self.shot_path)
+
+        cache = self.tk.context_cache
+        result_1 = self.tk.context_from_path(shot_path_abs)
+        misses = cache.misses
+        hits = cache.hits
+
+        # trailing separators and redundant components share a cache entry
+        result_2 = self.tk.context_from_path(shot_path_abs + os.path.sep)
+        self.assertEquals(cache.hits, hits + 1)
+        self.assertEquals(cache.misses, misses)
+        self.assertEquals(result_1, result_2)
+
+        # modifying a returned context doesn't affect the cached data
+        result_2.entity["name"] = "modified"
+        result_3 = self.tk.context_from_path(shot_path_abs)
+        self.assertEquals(result_3.entity["name"], self.shot["name"])
+
+    def test_invalidated_by_add_mappings(self):
+        """
+        Check that adding path cache mappings invalidates cached contexts.
+        """
+        step_path = os.path.join(self.project_root, self.shot_path, "step_folder")
+        os.makedirs(step_path)
+
+        result = self.tk.context_from_path(step_path)
+        self.assertIsNone(result.step)
+
+        self.add_to_path_cache(step_path, self.step)
+        misses = self.tk.context_cache.misses
+        result = self.tk.context_from_path(step_path)
+        self.assertEquals(self.tk.context_cache.misses, misses + 1)
+        self.assertEquals(self.step["id"], result.step["id"])
+
+    @patch("tank.util.login.get_current_user")
+    def test_previous_context(self, get_current_user):
+        """
+        Check that the previous context is still applied to cached contexts.
+        """
+        get_current_user.return_value = self.current_user
+        shot_path_abs = os.path.join(self.project_root, self.shot_path)
+
+        task = {"id": 1,
+                "type": "Task",
+                "content": "task_content",
+                "project": self.project,
+                "entity": self.shot,
+                "step": self.step}
+        self.add_to_sg_mock_db(task)
+        prev_ctx = context.from_entity(self.tk, task["type"], task["id"])
+
+        self.assertIsNone(self.tk.context_from_path(shot_path_abs).task)
+        hits = self.tk.context_cache.hits
+        result = self.tk.context_from_path(shot_path_abs, prev_ctx)
+        self.assertEquals(self.tk.context_cache.hits, hits + 1)
+        self.assertEquals(task["id"], result.task["id"])
+        self.assertIsNone(self.tk.context_from_path(shot_path_abs).task)
+
+    def test_least_recently_used(self):
+        """
+        Check that the least recently used paths are evicted first.
+        """
+        cache = context.PathContextCache(max_size=2)
+        token_getter = lambda: 1
+        cache.add("/a", {"name": "a"}, 1, token_getter)
+        cache.add("/b", {"name": "b"}, 1, token_getter)
+        self.assertEquals(cache.get("/a"), {"name": "a"})
+        cache.add("/c", {"name": "c"}, 1, token_getter)
+        self.assertIsNone(cache.get("/b"))
+        self.assertEquals(cache.get("/a"), {"name": "a"})
+        self.assertEquals(cache.get("/c"), {"name": "c"})
+
+        # re-adding a path doesn't duplicate it
+        cache.add("/c", {"name": "c2"}, 1, token_getter)
+        cache.add("/d", {"name": "d"}, 1, token_getter)
+        self.assertIsNone(cache.get("/a"))
+        self.assertEquals(cache.get("/c"), {"name": "c2"})
+        self.assertEquals(cache.get("/d"), {"name": "d"})
+
+
 class TestFromPathWithPrevious(TestContext):
 
     @patch("tank.util.login.get_current_user")
@@ -751,6 +840,36 @@ class TestAsTemplateFields(TestContext):
         # Check that the shotgun method find_one was not used
         self.assertEqual(finds, self.tk.shotgun.finds)
 
+    def test_query_batched(self):
+        """
+        Test that the fields needed from an entity are retrieved in a single query
+        and shared with other contexts until they expire.
+        """
+        self.keys["shot_extra"] = StringKey("shot_extra", shotgun_entity_type="Shot", shotgun_field_name="extra_field")
+        self.keys["shot_seq"] = StringKey("shot_seq", shotgun_entity_type="Shot", shotgun_field_name="sg_sequence")
+        template_def = "/sequence/{Sequence}/{Shot}/{Step}/work/{shot_extra}_{shot_seq}.ext"
+        template = TemplatePath(template_def, self.keys, self.project_root)
+
+        finds = self.tk.shotgun.finds
+        result = self.ctx.as_template_fields(template)
+        self.assertEquals("extravalue", result["shot_extra"])
+        self.assertEquals("seq_name", result["shot_seq"])
+        self.assertEqual(finds + 1, self.tk.shotgun.finds)
+
+        # another context for the same shot doesn't need to query shotgun.
+        other_ctx = context.Context(self.tk, project=self.project, entity=self.shot, step=self.step)
+        finds = self.tk.shotgun.finds
+        result = other_ctx.as_template_fields(template)
+        self.assertEquals("extravalue", result["shot_extra"])
+        self.assertEqual(finds, self.tk.shotgun.finds)
+
+        # until the values expire.
+        other_ctx = context.Context(self.tk, project=self.project, entity=self.shot, step=self.step)
+        with patch("time.time", return_value=time.time() + tank.constants.ENTITY_FIELDS_CACHE_TTL + 1):
+            result = other_ctx.as_template_fields(template)
+        self.assertEquals("extravalue", result["shot_extra"])
+        self.assertEqual(finds + 1, self.tk.shotgun.finds)
+
     def test_shot_step(self):
         expected_step_name = "step_short_name"
         expected_shot_name = "shot_code"
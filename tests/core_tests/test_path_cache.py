@@ -8,6 +8,8 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights 
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
+from __future__ import with_statement
+
 import os
 import sys
 import time
@@ -17,6 +19,9 @@ import cPickle as pickle
 import sqlite3
 import shutil
 import logging
+import threading
+
+from mock import patch
 
 from tank_test.tank_test_base import *
 
@@ -94,6 +99,54 @@ class TestInit(TestPathCache):
         column_names = [x[1] for x in ret.fetchall()]
         self.assertEquals(expected, column_names)
 
+    def test_connection_reused(self):
+        """Test that path cache instances in the same thread share their connection"""
+        pc = path_cache.PathCache(self.tk)
+        try:
+            self.assertIs(pc._connection, self.path_cache._connection)
+        finally:
+            pc.close()
+
+        # closing a path cache doesn't close the pooled connection
+        self.path_cache._connection.execute("SELECT count(*) FROM path_cache")
+
+    def test_connection_per_thread(self):
+        """Test that each thread gets its own connection"""
+        connections = []
+
+        def get_connection():
+            pc = path_cache.PathCache(self.tk)
+            connections.append(pc._connection)
+            # connections are not usable across threads so make sure
+            # this one works in the thread that created it.
+            pc.get_paths("Shot", 1, primary_only=False)
+            pc.close()
+
+        thread = threading.Thread(target=get_connection)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(len(connections), 1)
+        self.assertIsNot(connections[0], self.path_cache._connection)
+
+    def test_schema_verified_once(self):
+        """Test that the schema isn't verified every time a path cache is created"""
+        with patch.object(path_cache._ConnectionPool, "_init_schema") as init_schema_mock:
+            pc = path_cache.PathCache(self.tk)
+            pc.close()
+            self.assertEqual(init_schema_mock.call_count, 0)
+
+    def test_db_recreated(self):
+        """Test that a deleted database file is recreated with a valid schema"""
+        self.path_cache.close()
+        os.remove(self.path_cache_location)
+        pc = path_cache.PathCache(self.tk)
+        try:
+            ret = pc._connection.execute("PRAGMA table_info(path_cache)")
+            self.assertEqual(len(ret.fetchall()), 6)
+        finally:
+            pc.close()
+
 
 
 class TestAddMapping(TestPathCache):
@@ -226,6 +279,60 @@ class TestAddMapping(TestPathCache):
         entry = res.fetchall()[0]
         self.assertEquals(entity_name, entry[0])
 
+    def test_add_batch(self):
+        """
+        Tests that mappings added in a single batch are checked against each other.
+        """
+        et = self.entity["type"]
+        en = self.entity["name"]
+        data = []
+        for eid in range(1, 51):
+            full_path = os.path.join(self.project_root, "shot_%d" % eid)
+            data.append({"entity": {"type": et, "id": eid, "name": en}, "path": full_path, "primary": True, "metadata": {}})
+            # secondary entity for the same path, twice
+            secondary = {"type": "Step", "id": 1000 + eid, "name": en}
+            data.append({"entity": secondary, "path": full_path, "primary": False, "metadata": {}})
+            data.append({"entity": secondary, "path": full_path, "primary": False, "metadata": {}})
+            # same primary mapping again
+            data.append({"entity": {"type": et, "id": eid, "name": "foo"}, "path": full_path, "primary": True, "metadata": {}})
+
+        num_records = self.db_cursor.execute("SELECT COUNT(*) FROM path_cache").fetchone()[0]
+        self.path_cache.validate_mappings(data)
+        self.path_cache.add_mappings(data, None, [])
+
+        res = self.db_cursor.execute("SELECT COUNT(*) FROM path_cache")
+        self.assertEqual(res.fetchone()[0], num_records + 100)
+        full_path = os.path.join(self.project_root, "shot_10")
+        self.assertEqual(self.path_cache.get_entity(full_path), {"type": et, "id": 10, "name": en})
+        self.assertEqual(self.path_cache.get_paths("Step", 1010, primary_only=False), [full_path])
+
+        # adding everything again is fine and doesn't add anything.
+        self.path_cache.validate_mappings(data)
+        self.path_cache.add_mappings(data, None, [])
+        res = self.db_cursor.execute("SELECT COUNT(*) FROM path_cache")
+        self.assertEqual(res.fetchone()[0], num_records + 100)
+
+        # a mapping conflicting with an existing record is reported by the validation.
+        conflict = {"entity": {"type": et, "id": 2, "name": en}, "path": os.path.join(self.project_root, "shot_1"),
+                    "primary": True, "metadata": {}}
+        self.assertRaises(tank.TankError, self.path_cache.validate_mappings, data + [conflict])
+
+    def test_add_batch_conflict(self):
+        """
+        Tests that conflicting mappings within a single batch are rejected.
+        """
+        full_path = os.path.join(self.project_root, "shot")
+        data = [
+            {"entity": {"type": "Shot", "id": 1, "name": "foo"}, "path": full_path, "primary": True, "metadata": {}},
+            {"entity": {"type": "Shot", "id": 2, "name": "bar"}, "path": full_path, "primary": True, "metadata": {}},
+        ]
+        num_records = self.db_cursor.execute("SELECT COUNT(*) FROM path_cache").fetchone()[0]
+        self.assertRaises(tank.TankError, self.path_cache.add_mappings, data, None, [])
+
+        # nothing should have been added.
+        res = self.db_cursor.execute("SELECT COUNT(*) FROM path_cache")
+        self.assertEqual(res.fetchone()[0], num_records)
+
 
 class TestGetEntity(TestPathCache):
     """
@@ -288,6 +395,62 @@ class TestGetEntity(TestPathCache):
         self.assertIsNone(result)
 
 
+class TestGetEntitiesForPathHierarchy(TestPathCache):
+    """
+    Tests for get_entities_for_path_hierarchy.
+    """
+    def setUp(self):
+        super(TestGetEntitiesForPathHierarchy, self).setUp()
+        self.proj = {"type": "Project", "id": self.project["id"], "name": self.project["name"]}
+        self.seq = {"type": "Sequence", "id": 1, "name": "seq"}
+        self.shot = {"type": "Shot", "id": 2, "name": "shot_name"}
+        self.step = {"type": "Step", "id": 3, "name": "step_name"}
+
+        self.seq_path = os.path.join(self.project_root, "seq")
+        self.shot_path = os.path.join(self.seq_path, "shot_name")
+        self.step_path = os.path.join(self.shot_path, "step_name")
+
+        add_item_to_cache(self.path_cache, self.proj, self.project_root)
+        add_item_to_cache(self.path_cache, self.seq, self.seq_path)
+        add_item_to_cache(self.path_cache, self.shot, self.shot_path)
+        add_item_to_cache(self.path_cache, self.seq, self.shot_path, primary=False)
+        add_item_to_cache(self.path_cache, self.step, self.step_path, primary=False)
+
+    def test_hierarchy(self):
+        """Test that all levels up to the storage root are returned"""
+        file_path = os.path.join(self.step_path, "work", "file.ma")
+        hierarchy = self.path_cache.get_entities_for_path_hierarchy(file_path)
+
+        self.assertEqual(
+            [level_path for (level_path, _, _) in hierarchy],
+            [
+                file_path,
+                os.path.dirname(file_path),
+                self.step_path,
+                self.shot_path,
+                self.seq_path,
+                self.project_root
+            ]
+        )
+
+        # should match the results of the individual lookups
+        for (level_path, entity, secondary_entities) in hierarchy:
+            self.assertEqual(entity, self.path_cache.get_entity(level_path))
+            self.assertEqual(secondary_entities, self.path_cache.get_secondary_entities(level_path))
+
+        self.assertEqual(hierarchy[2][1:], (None, [self.step]))
+        self.assertEqual(hierarchy[3][1:], (self.shot, [self.seq]))
+        self.assertEqual(hierarchy[5][1:], (self.proj, []))
+
+    def test_non_project_path(self):
+        """Test that paths outside of the project don't resolve any entities"""
+        non_project_path = os.path.join(os.path.dirname(self.project_root), "not_in_project")
+        for (_, entity, secondary_entities) in \
+                self.path_cache.get_entities_for_path_hierarchy(non_project_path):
+            self.assertIsNone(entity)
+            self.assertEqual(secondary_entities, [])
+
+
 class TestGetPaths(TestPathCache):
     def test_add_and_find_shot(self):
         # add two paths to cache for a shot
@@ -453,6 +616,152 @@ class TestShotgunSync(TankTestBase):
         
         
         
+    def test_full_sync_paged(self):
+        """Tests that a full sync fetches records one page at a time."""
+
+        folder.process_filesystem_structure(self.tk,
+                                            self.task["type"],
+                                            self.task["id"],
+                                            preview=False,
+                                            engine=None)
+        path_cache_contents_1 = self._get_path_cache()
+        self.assertEqual(len(path_cache_contents_1), 4)
+
+        # mockgun doesn't support limits, so apply them here
+        find = self.tk.shotgun.find
+        page_sizes = []
+
+        def paged_find(*args, **kwargs):
+            result = find(*args, **kwargs)
+            if kwargs.get("limit"):
+                result = result[:kwargs["limit"]]
+                page_sizes.append(len(result))
+            return result
+
+        with patch.object(self.tk.shotgun, "find", side_effect=paged_find):
+            with patch("tank.path_cache.SYNC_PAGE_SIZE", 3):
+                log = sync_path_cache(self.tk, force_full_sync=True)
+
+        self.assertTrue("Performing a complete Shotgun folder sync" in log)
+        self.assertEqual(page_sizes, [3, 1])
+        self.assertEqual(self._get_path_cache(), path_cache_contents_1)
+
+    def test_full_sync_items(self):
+        """Tests that a full sync returns the synced items one page at a time."""
+
+        folder.process_filesystem_structure(self.tk,
+                                            self.task["type"],
+                                            self.task["id"],
+                                            preview=False,
+                                            engine=None)
+
+        pc = path_cache.PathCache(self.tk)
+        try:
+            with patch("tank.path_cache.SYNC_PAGE_SIZE", 3):
+                items = pc.synchronize(full_sync=True)
+                self.assertFalse(isinstance(items, list))
+                items = list(items)
+
+            self.assertEqual(len(items), 4)
+            paths = [x["path"] for x in items]
+            self.assertTrue(self.project_root in paths)
+            for item in items:
+                self.assertEqual(pc.get_entity(item["path"]), item["entity"])
+        finally:
+            pc.close()
+
+    def test_full_sync_duplicates(self):
+        """Tests that a full sync skips duplicate Shotgun records."""
+
+        folder.process_filesystem_structure(self.tk,
+                                            self.seq["type"],
+                                            self.seq["id"],
+                                            preview=False,
+                                            engine=None)
+        path_cache_contents_1 = self._get_path_cache()
+
+        # duplicate the sequence record in Shotgun
+        sg_data = self.tk.shotgun.find(
+            tank.path_cache.SHOTGUN_ENTITY,
+            [["linked_entity_type", "is", "Sequence"]],
+            ["entity", "path", "configuration_metadata", "is_primary",
+             "linked_entity_id", "linked_entity_type", "code", "project"]
+        )[0]
+        del sg_data["id"]
+        del sg_data["type"]
+        self.tk.shotgun.create(tank.path_cache.SHOTGUN_ENTITY, sg_data)
+
+        log = sync_path_cache(self.tk, force_full_sync=True)
+        self.assertTrue("Found existing records" in log)
+        self.assertEqual(self._get_path_cache(), path_cache_contents_1)
+
+        # the indices dropped during the sync have been rebuilt
+        path_cache = tank.path_cache.PathCache(self.tk)
+        c = path_cache._connection.cursor()
+        indices = [x[0] for x in c.execute("SELECT name FROM sqlite_master WHERE type='index'")]
+        c.close()
+        path_cache.close()
+        self.assertTrue("path_cache_entity" in indices)
+        self.assertTrue("path_cache_path" in indices)
+
+    def test_local_replica(self):
+        """Tests that lookups can be served from a local replica of the path cache."""
+
+        replica_root = os.path.join(self.tank_temp, "replica_cache")
+        replica_file = os.path.join(replica_root, "path_cache_replica.db")
+
+        # create folders for the sequence without a replica
+        folder.process_filesystem_structure(self.tk,
+                                            self.seq["type"],
+                                            self.seq["id"],
+                                            preview=False,
+                                            engine=None)
+        self.assertEqual(len(self._get_path_cache()), 2)
+
+        with patch.dict(os.environ, {constants.PATH_CACHE_REPLICA_ENV_VAR: "1"}):
+            with patch("tank.path_cache.LocalFileStorageManager") as storage_manager:
+                storage_manager.get_configuration_root.return_value = replica_root
+
+                # the replica is seeded from the shared path cache
+                pc = path_cache.PathCache(self.tk)
+                self.assertEqual(pc._pool.path, os.path.normpath(replica_file))
+                self.assertEqual(pc._shared_pool.path, os.path.normpath(pc._get_path_cache_location()))
+                self.assertEqual(
+                    list(pc._connection.execute("PRAGMA journal_mode")),
+                    [("wal",)]
+                )
+                pc.close()
+                self.assertEqual(len(self._get_path_cache()), 2)
+
+                # new folders are written to both the shared path cache and the replica
+                folder.process_filesystem_structure(self.tk,
+                                                    self.task["type"],
+                                                    self.task["id"],
+                                                    preview=False,
+                                                    engine=None)
+                self.assertEqual(len(self._get_path_cache()), 4)
+
+        # the shared path cache is up to date
+        self.assertEqual(len(self._get_path_cache()), 4)
+
+        # now register folders from another host by deleting them and
+        # creating them again without the replica.
+        sg_data = self.tk.shotgun.find(tank.path_cache.SHOTGUN_ENTITY,
+                                       [["linked_entity_type", "is", "Step"]])
+        self._unregister_folders([x["id"] for x in sg_data])
+        sync_path_cache(self.tk)
+        self.assertEqual(len(self._get_path_cache()), 3)
+
+        with patch.dict(os.environ, {constants.PATH_CACHE_REPLICA_ENV_VAR: "1"}):
+            with patch("tank.path_cache.LocalFileStorageManager") as storage_manager:
+                storage_manager.get_configuration_root.return_value = replica_root
+
+                # the replica hasn't picked up the deletion yet
+                self.assertEqual(len(self._get_path_cache()), 4)
+                log = sync_path_cache(self.tk)
+                self.assertTrue("Doing an incremental sync" in log)
+                self.assertEqual(len(self._get_path_cache()), 3)
+
     def test_no_new_folders_created(self):
         """
         Test the case when folder creation is running for an already existing path 
@@ -579,6 +888,191 @@ class TestShotgunSync(TankTestBase):
         self.assertEqual( len(self._get_path_cache()), 4)
 
 
+    def _get_journal(self):
+        path_cache = tank.path_cache.PathCache(self.tk)
+        c = path_cache._connection.cursor()
+        journal = list(c.execute("select path_cache_id, sent from upload_journal"))
+        c.close()
+        path_cache.close()
+        return journal
+
+    def _get_folder_events(self):
+        return self.tk.shotgun.find("EventLogEntry", 
+                                    [["event_type", "is", "Toolkit_Folders_Create"]], 
+                                    ["meta"],
+                                    [{"field_name": "id", "direction": "asc"}])
+
+    def test_upload_batches(self):
+        """Tests that new folders are uploaded in batches, with an event log entry per batch."""
+        
+        # the project folder is registered when the test is set up
+        num_events = len(self._get_folder_events())
+        
+        with patch("tank.path_cache.UPLOAD_BATCH_SIZE", 2):
+            folder.process_filesystem_structure(self.tk,
+                                                self.task["type"],
+                                                self.task["id"],
+                                                preview=False,
+                                                engine=None)
+        
+        sg_ids = [x["id"] for x in self.tk.shotgun.find(tank.path_cache.SHOTGUN_ENTITY, [])]
+        self.assertEqual(len(sg_ids), 4)
+        
+        events = self._get_folder_events()[num_events:]
+        self.assertEqual([len(x["meta"]["sg_folder_ids"]) for x in events], [2, 1])
+        self.assertEqual(sum([x["meta"]["sg_folder_ids"] for x in events], []), sg_ids[-3:])
+        self.assertEqual(self._get_journal(), [])
+        
+        # a full sync gives the same result
+        path_cache_contents_1 = self._get_path_cache()
+        sync_path_cache(self.tk, force_full_sync=True)
+        self.assertEqual(self._get_path_cache(), path_cache_contents_1)
+
+    def test_upload_resumed(self):
+        """Tests that an interrupted upload is resumed by the next sync."""
+        
+        num_events = len(self._get_folder_events())
+        batch = self.tk.shotgun.batch
+        num_calls = []
+        
+        def failing_batch(requests):
+            num_calls.append(requests)
+            if len(num_calls) == 2:
+                raise Exception("Request timeout")
+            return batch(requests)
+        
+        with patch("tank.path_cache.UPLOAD_BATCH_SIZE", 2):
+            with patch.object(self.tk.shotgun, "batch", side_effect=failing_batch):
+                self.assertRaises(tank.TankError, 
+                                  folder.process_filesystem_structure,
+                                  self.tk,
+                                  self.task["type"],
+                                  self.task["id"],
+                                  preview=False,
+                                  engine=None)
+        
+        # the first batch made it to shotgun, the second one is still journaled 
+        self.assertEqual(len(self.tk.shotgun.find(tank.path_cache.SHOTGUN_ENTITY, [])), 3)
+        self.assertEqual(len(self._get_path_cache()), 4)
+        self.assertEqual(len(self._get_journal()), 1)
+        
+        # the sync resumes the upload
+        sync_path_cache(self.tk)
+        self.assertEqual(len(self.tk.shotgun.find(tank.path_cache.SHOTGUN_ENTITY, [])), 4)
+        self.assertEqual(len(self._get_path_cache()), 4)
+        self.assertEqual(self._get_journal(), [])
+        self.assertEqual(len(self._get_folder_events()), num_events + 2)
+        
+        # all records are registered as being in shotgun
+        path_cache = tank.path_cache.PathCache(self.tk)
+        c = path_cache._connection.cursor()
+        self.assertEqual(list(c.execute("select count(*) from shotgun_status"))[0][0], 4)
+        c.close()
+        path_cache.close()
+        
+        # running folder creation again doesn't change anything
+        path_cache_contents_1 = self._get_path_cache()
+        folder.process_filesystem_structure(self.tk,
+                                            self.task["type"],
+                                            self.task["id"],
+                                            preview=False,
+                                            engine=None)
+        self.assertEqual(len(self.tk.shotgun.find(tank.path_cache.SHOTGUN_ENTITY, [])), 4)
+        self.assertEqual(self._get_path_cache(), path_cache_contents_1)
+
+    def test_upload_resumed_after_send(self):
+        """Tests that records created in shotgun before an upload was interrupted are not created again."""
+        
+        num_events = len(self._get_folder_events())
+        create = self.tk.shotgun.create
+        
+        def failing_create(entity_type, data, *args, **kwargs):
+            if entity_type == "EventLogEntry":
+                raise Exception("Connection reset")
+            return create(entity_type, data, *args, **kwargs)
+        
+        with patch.object(self.tk.shotgun, "create", side_effect=failing_create):
+            self.assertRaises(tank.TankError, 
+                              folder.process_filesystem_structure,
+                              self.tk,
+                              self.task["type"],
+                              self.task["id"],
+                              preview=False,
+                              engine=None)
+        
+        # the records were created in shotgun but not registered locally
+        self.assertEqual(len(self.tk.shotgun.find(tank.path_cache.SHOTGUN_ENTITY, [])), 4)
+        journal = self._get_journal()
+        self.assertEqual(len(journal), 3)
+        self.assertEqual(set([sent for (_, sent) in journal]), set([1]))
+        
+        # the sync looks the records up rather than creating them again
+        sync_path_cache(self.tk)
+        self.assertEqual(len(self.tk.shotgun.find(tank.path_cache.SHOTGUN_ENTITY, [])), 4)
+        self.assertEqual(self._get_journal(), [])
+        events = self._get_folder_events()[num_events:]
+        self.assertEqual(len(events), 1)
+        self.assertEqual(len(events[0]["meta"]["sg_folder_ids"]), 3)
+
+    def _claim_journal(self, owner, claimed_at):
+        path_cache = tank.path_cache.PathCache(self.tk)
+        c = path_cache._connection.cursor()
+        c.execute("update upload_journal set claimed_by = ?, claimed_at = ?", (owner, claimed_at))
+        path_cache._connection.commit()
+        c.close()
+        path_cache.close()
+
+    def test_upload_claimed(self):
+        """Tests that records being uploaded by another process are only resumed once their claim is stale."""
+        
+        with patch.object(self.tk.shotgun, "batch", side_effect=Exception("Request timeout")):
+            self.assertRaises(tank.TankError, 
+                              folder.process_filesystem_structure,
+                              self.tk,
+                              self.task["type"],
+                              self.task["id"],
+                              preview=False,
+                              engine=None)
+        self.assertEqual(len(self._get_journal()), 3)
+        
+        # the records are still being uploaded by another process
+        self._claim_journal("other_host 1234 0000", time.time())
+        sync_path_cache(self.tk)
+        self.assertEqual(len(self._get_journal()), 3)
+        self.assertEqual(len(self.tk.shotgun.find(tank.path_cache.SHOTGUN_ENTITY, [])), 1)
+        
+        # the other process never completed the upload
+        self._claim_journal("other_host 1234 0000", time.time() - tank.path_cache.UPLOAD_CLAIM_TIMEOUT - 1)
+        sync_path_cache(self.tk)
+        self.assertEqual(self._get_journal(), [])
+        self.assertEqual(len(self.tk.shotgun.find(tank.path_cache.SHOTGUN_ENTITY, [])), 4)
+
+    def test_upload_resumed_after_full_sync(self):
+        """Tests that records which could not be uploaded are kept through a full sync."""
+        
+        with patch.object(self.tk.shotgun, "batch", side_effect=Exception("Request timeout")):
+            self.assertRaises(tank.TankError, 
+                              folder.process_filesystem_structure,
+                              self.tk,
+                              self.task["type"],
+                              self.task["id"],
+                              preview=False,
+                              engine=None)
+            # the upload fails again before the full sync
+            sync_path_cache(self.tk, force_full_sync=True)
+        
+        self.assertEqual(len(self._get_journal()), 3)
+        self.assertEqual(len(self._get_path_cache()), 4)
+        self.assertEqual(len(self.tk.shotgun.find(tank.path_cache.SHOTGUN_ENTITY, [])), 1)
+        
+        # the next sync uploads the records
+        sync_path_cache(self.tk)
+        self.assertEqual(self._get_journal(), [])
+        self.assertEqual(len(self.tk.shotgun.find(tank.path_cache.SHOTGUN_ENTITY, [])), 4)
+        path_cache_contents_1 = self._get_path_cache()
+        sync_path_cache(self.tk, force_full_sync=True)
+        self.assertEqual(self._get_path_cache(), path_cache_contents_1)
+
     def test_truncated_eventlog(self):
         """Tests that a full sync happens if the event log is truncated."""
 
@@ -603,6 +1097,86 @@ class TestShotgunSync(TankTestBase):
 
 
 
+    def _unregister_folders(self, sg_ids):
+        """
+        Deletes FilesystemLocations in Shotgun and records the deletion
+        in the event log the same way the unregister_folders command does.
+        """
+        for sg_id in sg_ids:
+            self.tk.shotgun.delete(tank.path_cache.SHOTGUN_ENTITY, sg_id)
+        self.tk.shotgun.create(
+            "EventLogEntry",
+            {"event_type": "Toolkit_Folders_Delete",
+             "project": self.project,
+             "meta": {"core_api_version": "HEAD", "sg_folder_ids": sg_ids}}
+        )
+
+    def test_incremental_sync_deletions(self):
+        """Tests that deletions are replayed without a full sync."""
+
+        folder.process_filesystem_structure(self.tk,
+                                            self.task["type"],
+                                            self.task["id"],
+                                            preview=False,
+                                            engine=None)
+        self.assertEqual(len(self._get_path_cache()), 4)
+
+        # unregister the shot and step folders
+        sg_data = self.tk.shotgun.find(tank.path_cache.SHOTGUN_ENTITY,
+                                       [["linked_entity_type", "in", ["Shot", "Step"]]])
+        self.assertEqual(len(sg_data), 2)
+        self._unregister_folders([x["id"] for x in sg_data])
+
+        log = sync_path_cache(self.tk)
+        self.assertFalse("Performing a complete Shotgun folder sync" in log)
+        self.assertTrue("Removed 2 records from the path cache" in log)
+        self.assertEqual(len(self._get_path_cache()), 2)
+
+        # re-creating the folders is picked up incrementally as well
+        folder.process_filesystem_structure(self.tk,
+                                            self.task["type"],
+                                            self.task["id"],
+                                            preview=False,
+                                            engine=None)
+        self.assertEqual(len(self._get_path_cache()), 4)
+        log = sync_path_cache(self.tk)
+        self.assertFalse("Performing a complete Shotgun folder sync" in log)
+        self.assertEqual(len(self._get_path_cache()), 4)
+
+    def test_incremental_sync_deletion_of_unsynced_folders(self):
+        """
+        Tests that folders created and deleted since the last sync 
+        are never added to the path cache.
+        """
+        path_cache = tank.path_cache.PathCache(self.tk)
+        pcl = path_cache._get_path_cache_location()
+        path_cache.close()
+
+        folder.process_filesystem_structure(self.tk,
+                                            self.seq["type"],
+                                            self.seq["id"],
+                                            preview=False,
+                                            engine=None)
+        shutil.copy(pcl, "%s.snap1" % pcl)
+
+        folder.process_filesystem_structure(self.tk,
+                                            self.task["type"],
+                                            self.task["id"],
+                                            preview=False,
+                                            engine=None)
+        sg_data = self.tk.shotgun.find(tank.path_cache.SHOTGUN_ENTITY,
+                                       [["linked_entity_type", "is", "Step"]])
+        self._unregister_folders([x["id"] for x in sg_data])
+
+        # roll back to a path cache without the shot and step
+        shutil.copy("%s.snap1" % pcl, pcl)
+        self.assertEqual(len(self._get_path_cache()), 2)
+
+        log = sync_path_cache(self.tk)
+        self.assertFalse("Performing a complete Shotgun folder sync" in log)
+        self.assertEqual(len(self._get_path_cache()), 3)
+
+
     def test_multiple_projects_eventlog(self):
         """
         Tests that projects don't get their path caches mixed up.
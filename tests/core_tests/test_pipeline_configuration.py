@@ -8,10 +8,15 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
+from __future__ import with_statement
+
+import os
 
 from tank_test.tank_test_base import TankTestBase, setUpModule
 
 import tank
+from tank.config_snapshot import ConfigSnapshot
+from tank.util.filesystem import safe_delete_file
 
 
 class TestPipelineConfig(TankTestBase):
@@ -66,3 +71,68 @@ class TestPipelineConfig(TankTestBase):
             self.tk.pipeline_configuration.get_name(),
             "Firstary"
         )
+
+
+class TestConfigSnapshot(TankTestBase):
+    """
+    Tests for the snapshot of the resolved configuration data.
+    """
+
+    def setUp(self):
+        super(TestConfigSnapshot, self).setUp()
+        self.setup_fixtures()
+
+    def _load_snapshot_config(self):
+        """
+        Writes a snapshot of the test configuration and returns a pipeline
+        configuration using it.
+        """
+        pc_path = self.tk.pipeline_configuration.get_path()
+        ConfigSnapshot.build(self.tk.pipeline_configuration).write(pc_path)
+        snapshot_path = os.path.join(pc_path, "config_snapshot.pickle")
+        self.assertTrue(os.path.exists(snapshot_path))
+        self.addCleanup(safe_delete_file, snapshot_path)
+        pipeline_configuration = tank.sgtk_from_path(pc_path).pipeline_configuration
+        self.assertNotEqual(pipeline_configuration.get_config_snapshot(), None)
+        return pipeline_configuration
+
+    def test_snapshot_data(self):
+        """
+        Makes sure the data read from the snapshot is the same as the one resolved from disk.
+        """
+        pipeline_configuration = self._load_snapshot_config()
+        snapshot = pipeline_configuration.get_config_snapshot()
+
+        self.assertEqual(snapshot.get_templates(), self.tk.pipeline_configuration.get_templates_config())
+        self.assertEqual(pipeline_configuration.get_data_roots(), self.tk.pipeline_configuration.get_data_roots())
+
+        env_path = pipeline_configuration.get_environment_path("test")
+        env_data = pipeline_configuration.get_environment("test")._env_data
+        self.assertEqual(env_data, self.tk.pipeline_configuration.get_environment("test")._env_data)
+        self.assertEqual(env_data, snapshot.get_environment(env_path))
+
+        # changes to the data don't affect the snapshot
+        env_data["engines"].clear()
+        self.assertNotEqual(snapshot.get_environment(env_path)["engines"], {})
+
+    def test_invalidation(self):
+        """
+        Makes sure entries are ignored once one of their files changed.
+        """
+        pipeline_configuration = self._load_snapshot_config()
+        snapshot = pipeline_configuration.get_config_snapshot()
+        env_path = pipeline_configuration.get_environment_path("test")
+        self.assertNotEqual(snapshot.get_environment(env_path), None)
+
+        # change the included file
+        include_path = os.path.join(os.path.dirname(env_path), "empty_config.yml")
+        with open(include_path, "a") as fh:
+            fh.write("\n# updated\n")
+
+        self.assertEqual(snapshot.get_environment(env_path), None)
+        self.assertNotEqual(snapshot.get_templates(), None)
+        # the environment is loaded from disk instead
+        self.assertEqual(
+            pipeline_configuration.get_environment("test")._env_data,
+            self.tk.pipeline_configuration.get_environment("test")._env_data
+        )
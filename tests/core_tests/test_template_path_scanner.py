@@ -0,0 +1,111 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from __future__ import with_statement
+
+import os
+import glob
+
+from mock import patch
+
+from tank.template import TemplatePath
+from tank.template_path_scanner import TemplatePathScanner, _list_folder
+from tank_test.tank_test_base import *
+from tank.templatekey import StringKey, IntegerKey
+
+
+class TestTemplatePathScanner(TankTestBase):
+    """
+    Tests for the TemplatePathScanner class.
+    """
+    def setUp(self):
+        super(TestTemplatePathScanner, self).setUp()
+        self.keys = {
+            "Sequence": StringKey("Sequence"),
+            "Shot": StringKey("Shot"),
+            "name": StringKey("name"),
+            "version": IntegerKey("version", format_spec="03"),
+        }
+        self.template = TemplatePath(
+            "sequences/{Sequence}/{Shot}/v{version}/{name}.ma", self.keys, self.project_root
+        )
+
+        self.valid_paths = []
+        for sequence in ["seq_1", "seq_2"]:
+            for shot in ["shot_1", "shot_2", "shot_3"]:
+                for version in [1, 2]:
+                    path = self.template.apply_fields(
+                        {"Sequence": sequence, "Shot": shot, "version": version, "name": "scene"}
+                    )
+                    self.create_file(path)
+                    self.valid_paths.append(path)
+
+        # folders which don't match the version folder of the template
+        self.invalid_folder = os.path.join(self.project_root, "sequences", "seq_1", "shot_1", "vXYZ")
+        self.create_file(os.path.join(self.invalid_folder, "scene.ma"))
+
+    def _glob_str(self, fields, skip_keys):
+        for key in skip_keys:
+            fields[key] = "*"
+        return self.template._apply_fields(fields, ignore_types=skip_keys)
+
+    def test_same_as_glob(self):
+        """
+        Makes sure the scanner finds the same paths as glob, minus the
+        ones in folders not matching the template.
+        """
+        glob_str = self._glob_str({"name": "scene"}, ["Sequence", "Shot", "version"])
+        expected = set(glob.glob(glob_str))
+        expected.remove(os.path.join(self.invalid_folder, "scene.ma"))
+        self.assertEqual(expected, set(self.valid_paths))
+
+        for max_workers in [1, 4]:
+            scanner = TemplatePathScanner(self.template, max_workers=max_workers)
+            self.assertEqual(sorted(scanner.scan(glob_str)), sorted(self.valid_paths))
+
+    def test_literal_leaf(self):
+        """
+        Makes sure paths with a fully specified leaf are checked for existence.
+        """
+        glob_str = self._glob_str({"Sequence": "seq_1", "version": 2, "name": "scene"}, ["Shot"])
+        scanner = TemplatePathScanner(self.template)
+        self.assertEqual(sorted(scanner.scan(glob_str)), sorted(glob.glob(glob_str)))
+
+        glob_str = self._glob_str({"Sequence": "seq_1", "version": 2, "name": "missing"}, ["Shot"])
+        self.assertEqual(list(scanner.scan(glob_str)), [])
+
+    def test_pruning(self):
+        """
+        Makes sure folders not matching the parent templates are not listed.
+        """
+        glob_str = self._glob_str({}, ["Sequence", "Shot", "version", "name"])
+        with patch("tank.template_path_scanner._list_folder", wraps=_list_folder) as list_folder_mock:
+            list(TemplatePathScanner(self.template).scan(glob_str))
+        listed = [x[0][0] for x in list_folder_mock.call_args_list]
+        self.assertIn(os.path.join(self.project_root, "sequences", "seq_1", "shot_1", "v001"), listed)
+        self.assertNotIn(self.invalid_folder, listed)
+
+    def test_optional_keys(self):
+        """
+        Makes sure folders matching any variation of the template are scanned.
+        """
+        template = TemplatePath(
+            "sequences/{Sequence}/{Shot}[_{name}]/v{version}/{name}.ma", self.keys, self.project_root
+        )
+        path = template.apply_fields({"Sequence": "seq_3", "Shot": "shot_1", "version": 1, "name": "scene"})
+        self.create_file(path)
+        # this builds the glob string from the variation without the optional key.
+        glob_str = template._apply_fields(
+            {"Sequence": "*", "Shot": "*", "version": "*", "name": "scene"},
+            ignore_types=["Sequence", "Shot", "version"]
+        )
+        scanner = TemplatePathScanner(template)
+        self.assertEqual(sorted(scanner.scan(glob_str)), sorted(glob.glob(glob_str)))
+        self.assertIn(path, glob.glob(glob_str))
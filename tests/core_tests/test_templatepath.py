@@ -14,6 +14,7 @@ import os
 
 import tank
 from tank import TankError
+from tank.errors import TankAmbiguousTemplateFieldsError
 
 from tank.template import TemplatePath
 from tank_test.tank_test_base import *
@@ -957,6 +958,65 @@ class TestGetFields(TestTemplatePath):
         input_path = os.path.join(self.project_root, "some", "thing", "else")
         self.assertRaises(TankError, template.get_fields, input_path)
 
+    def test_regex_matches_parser(self):
+        """
+        Checks that the compiled regular expression resolves the same fields
+        as the recursive parser.
+        """
+        from tank.template_path_parser import TemplatePathParser, TemplatePathRegex
+        definition = "shots/{Sequence}/{Shot}/{Step}/work/{Shot}.{branch}[_{name}].v{version}.{snapshot}.ma"
+        template = TemplatePath(definition, self.keys, self.project_root)
+        paths = [
+            "shots/seq_1/shot_1/Anm/work/shot_1.mmm.v003.002.ma",
+            "shots/seq_1/shot_1/Anm/work/shot_1.mmm_foo.v003.002.ma",
+            "shots/seq.1/s2/Anm/work/s2.mmm_foo.bar.v003.002.ma",
+            "shots/seq_2/s1/Lgt/work/s1.main.v012.001.ma",
+            "shots/seq_2/s1/Lgt/work/s1.main_final.v100.010.ma",
+            "shots/seq_1/shot_1/Anm/work/s2.mmm.v003.002.ma",
+            "shots/seq_1/shot_1/Anm/work/shot_1.m-m.v003.002.ma",
+            "shots/seq_1/shot_1/Anm/work/shot_1.mmm.vABC.002.ma",
+            "shots/seq_1/shot_1/Anm/work",
+            "shots/seq_1/shot_1/Anm/work/shot_1.mmm.v003.002.ma.bak",
+        ]
+        matches = []
+        for relative_path in paths:
+            # parse the full path in the same way as get_fields
+            input_path = os.path.join(self.project_root, relative_path)
+            path_fields = None
+            for ordered_keys, static_tokens in zip(template._ordered_keys, template._static_tokens):
+                regex = TemplatePathRegex(ordered_keys, static_tokens)
+                with_regex = TemplatePathParser(ordered_keys, static_tokens, regex)
+                without_regex = TemplatePathParser(ordered_keys, static_tokens)
+                fields = without_regex.parse_path(input_path, [])
+                self.assertEqual(fields, with_regex.parse_path(input_path, []))
+                path_fields = path_fields or fields
+            if path_fields is not None:
+                matches.append(path_fields)
+
+        # the valid paths resolve to the expected fields
+        self.assertEqual(len(matches), 5)
+        self.assertEqual(
+            matches[0],
+            {"Sequence": "seq_1", "Shot": "shot_1", "Step": "Anm", "branch": "mmm",
+             "version": 3, "snapshot": 2}
+        )
+        self.assertEqual(matches[1]["name"], "foo")
+        self.assertEqual(matches[3]["version"], 12)
+        self.assertEqual(matches[4]["name"], "final")
+        self.assertEqual(matches[4]["snapshot"], 10)
+
+    def test_regex_cached(self):
+        """
+        Checks that the regular expressions are only compiled once per template.
+        """
+        relative_path = os.path.join("shots", "seq_1", "shot_1", "Anm", "work", "shot_1.mmm.v003.002.ma")
+        file_path = os.path.join(self.project_root, relative_path)
+        self.template_path.get_fields(file_path)
+        path_regexes = dict(self.template_path._path_regexes)
+        self.assertTrue(path_regexes)
+        self.template_path.get_fields(file_path)
+        self.assertEqual(path_regexes, self.template_path._path_regexes)
+
 
 class TestGetKeysSepInValue(TestTemplatePath):
     """Tests for cases where seperator used between keys is used in value for keys."""
@@ -1011,7 +1071,15 @@ class TestGetKeysSepInValue(TestTemplatePath):
         template = TemplatePath(definition, self.keys, "")          
         expected_msg = ("Template %s: Ambiguous values found for key 'Asset' could be any of: 'cat', 'cat_man'" 
                         % template)
-        self.check_error_message(TankError, expected_msg, template.get_fields, input_path)        
+        self.check_error_message(TankAmbiguousTemplateFieldsError, expected_msg, template.get_fields, input_path)        
+
+        # paths which don't fit the template are not ambiguous
+        try:
+            template.get_fields("build/maya/cat.ext")
+        except TankError, e:
+            self.assertFalse(isinstance(e, TankAmbiguousTemplateFieldsError))
+        else:
+            self.fail("Path should not match the template")
         
     def test_ambiguous_begining(self):
         """
@@ -8,6 +8,8 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
+from __future__ import with_statement
+
 import os
 import tempfile
 
@@ -147,3 +149,155 @@ class TestIODescriptors(TankTestBase):
             ]
         )
 
+
+    def test_manifest_registry(self):
+        """
+        Tests that manifests of immutable descriptors are registered in the bundle cache.
+        """
+        from tank.descriptor.io_descriptor.manifest_registry import ManifestRegistry
+
+        sg = self.tk.shotgun
+        root = os.path.join(self.project_root, "registry_cache_root")
+
+        d = sgtk.descriptor.create_descriptor(
+            sg,
+            sgtk.descriptor.Descriptor.APP,
+            {"type": "app_store", "version": "v1.1.1", "name": "tk-bundle"},
+            bundle_cache_root_override=root
+        )
+
+        app_path = os.path.join(root, "app_store", "tk-bundle", "v1.1.1")
+        os.makedirs(app_path)
+        fh = open(os.path.join(app_path, "info.yml"), "wt")
+        fh.write("display_name: Test App\nrequires_core_version: v0.18.0\n")
+        fh.close()
+
+        self.assertEqual(d.display_name, "Test App")
+        self.assertTrue(os.path.exists(os.path.join(root, "manifest_registry.marshal")))
+
+        # a new registry, as another process would use, doesn't need the bundle.
+        os.remove(os.path.join(app_path, "info.yml"))
+        registry = ManifestRegistry(root)
+        manifest = registry.get(d.get_uri())
+        self.assertEqual(manifest["display_name"], "Test App")
+
+        # changing the returned data doesn't affect the registry
+        manifest["display_name"] = "Changed"
+        self.assertEqual(registry.get(d.get_uri())["display_name"], "Test App")
+
+        # registries of other processes are merged, but not while another process writes.
+        from tank.descriptor.io_descriptor.download_lock import DownloadLock
+        registry_path = os.path.join(root, "manifest_registry.marshal")
+        other_process = DownloadLock(registry_path)
+        self.assertTrue(other_process.acquire())
+        registry.add("sgtk:descriptor:app_store?name=tk-other&version=v1.0.0", {"display_name": "Other"})
+        other_process.release()
+        self.assertEqual(
+            ManifestRegistry(root).get("sgtk:descriptor:app_store?name=tk-other&version=v1.0.0"), None
+        )
+        ManifestRegistry(root).add("sgtk:descriptor:app_store?name=tk-other&version=v1.0.0", {"display_name": "Other"})
+        registry.add("sgtk:descriptor:app_store?name=tk-third&version=v1.0.0", {"display_name": "Third"})
+        registry = ManifestRegistry(root)
+        self.assertEqual(registry.get(d.get_uri())["display_name"], "Test App")
+        self.assertEqual(registry.get("sgtk:descriptor:app_store?name=tk-other&version=v1.0.0"), {"display_name": "Other"})
+        self.assertEqual(registry.get("sgtk:descriptor:app_store?name=tk-third&version=v1.0.0"), {"display_name": "Third"})
+
+        # mutable descriptors are not registered
+        dev_path = os.path.join(self.project_root, "registry_dev_bundle")
+        os.makedirs(dev_path)
+        fh = open(os.path.join(dev_path, "info.yml"), "wt")
+        fh.write("display_name: Dev App\n")
+        fh.close()
+        dev = sgtk.descriptor.create_descriptor(
+            sg,
+            sgtk.descriptor.Descriptor.APP,
+            {"type": "dev", "path": dev_path},
+            bundle_cache_root_override=root
+        )
+        self.assertEqual(dev.display_name, "Dev App")
+        self.assertEqual(ManifestRegistry(root).get(dev.get_uri()), None)
+
+    def test_download_lock(self):
+        """
+        Tests that downloads into a shared bundle cache are coordinated through lock files.
+        """
+        from tank.descriptor.io_descriptor.download_lock import DownloadLock, get_lock_path
+
+        sg = self.tk.shotgun
+        root = os.path.join(self.project_root, "lock_cache_root")
+        d = sgtk.descriptor.create_descriptor(
+            sg,
+            sgtk.descriptor.Descriptor.APP,
+            {"type": "app_store", "version": "v1.1.1", "name": "tk-bundle"},
+            bundle_cache_root_override=root
+        )
+        app_path = os.path.join(root, "app_store", "tk-bundle", "v1.1.1")
+
+        # a bundle downloaded by a process holding the lock is not complete yet.
+        other_process = DownloadLock(app_path)
+        self.assertTrue(other_process.acquire())
+        os.makedirs(app_path)
+        self.assertFalse(d._io_descriptor.exists_local())
+        self.assertFalse(DownloadLock(app_path).acquire())
+        other_process.release()
+        self.assertFalse(os.path.exists(get_lock_path(app_path)))
+
+        # bundles cached without any lock are complete.
+        self.assertTrue(d._io_descriptor.exists_local())
+
+        # an interrupted download is cleaned up and downloaded again.
+        fh = open(get_lock_path(app_path), "wt")
+        fh.write("%s %s 0" % ("some_other_host", os.getpid()))
+        fh.close()
+        os.utime(get_lock_path(app_path), (0, 0))
+        self.assertFalse(d._io_descriptor.exists_local())
+        with d._io_descriptor._locked_download_target() as target:
+            self.assertEqual(target, app_path)
+            self.assertFalse(os.path.exists(target))
+            os.makedirs(target)
+        self.assertTrue(os.path.exists(os.path.join(app_path, ".sgtk_download_complete")))
+        self.assertFalse(os.path.exists(get_lock_path(app_path)))
+
+        # a holder whose lock was broken doesn't release the lock of the new holder.
+        abandoned = DownloadLock(app_path)
+        self.assertTrue(abandoned.acquire())
+        os.utime(get_lock_path(app_path), (0, 0))
+        new_holder = DownloadLock(app_path)
+        self.assertTrue(new_holder.acquire())
+        self.assertFalse(DownloadLock(app_path).acquire())
+        abandoned.release()
+        self.assertTrue(os.path.exists(get_lock_path(app_path)))
+        new_holder.release()
+        self.assertFalse(os.path.exists(get_lock_path(app_path)))
+        self.assertTrue(d._io_descriptor.exists_local())
+
+        # nothing to download once the bundle exists.
+        with d._io_descriptor._locked_download_target() as target:
+            self.assertEqual(target, None)
+
+    def test_failed_download(self):
+        """
+        Tests that a failed download doesn't leave a bundle behind.
+        """
+        from tank.descriptor.io_descriptor.download_lock import get_lock_path
+
+        sg = self.tk.shotgun
+        root = os.path.join(self.project_root, "failed_download_cache_root")
+        d = sgtk.descriptor.create_descriptor(
+            sg,
+            sgtk.descriptor.Descriptor.APP,
+            {"type": "app_store", "version": "v1.1.1", "name": "tk-bundle"},
+            bundle_cache_root_override=root
+        )
+        app_path = os.path.join(root, "app_store", "tk-bundle", "v1.1.1")
+
+        def failing_download():
+            with d._io_descriptor._locked_download_target() as target:
+                os.makedirs(target)
+                open(os.path.join(target, "info.yml"), "wt").close()
+                raise IOError("Connection reset")
+
+        self.assertRaises(IOError, failing_download)
+        self.assertFalse(os.path.exists(app_path))
+        self.assertFalse(os.path.exists(get_lock_path(app_path)))
+        self.assertFalse(d._io_descriptor.exists_local())
@@ -8,15 +8,19 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights 
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
+from __future__ import with_statement
+
 import os
 import unittest
 import shutil
-from mock import Mock
+from mock import Mock, patch
 import tank
 from tank_vendor import yaml
 from tank import TankError
 from tank import hook
 from tank import folder
+from tank.config_snapshot import ConfigSnapshot
+from tank.util.filesystem import safe_delete_file
 from tank_test.tank_test_base import *
 
 
@@ -74,3 +78,72 @@ class TestFolderConfiguration(TankTestBase):
                           self.schema_location)
 
 
+class TestSchemaCache(TankTestBase):
+    """
+    Tests the process wide cache of the schema read from disk.
+    """
+    def setUp(self):
+        super(TestSchemaCache, self).setUp()
+        self.setup_fixtures()
+        self.schema_location = os.path.join(self.pipeline_config_root, "config", "core", "schema")
+
+    def _get_entity_types(self, config):
+        """
+        Returns the entity types of the entity nodes of a configuration.
+        """
+        return sorted(
+            et for (et, nodes) in config._entity_nodes_by_type.iteritems() if nodes
+        )
+
+    def test_cached(self):
+        """
+        Makes sure the schema is only read again once it changed.
+        """
+        scan_schema = folder.configuration.scan_schema
+        with patch.object(folder.configuration, "scan_schema", wraps=scan_schema) as scan_mock:
+            config_1 = folder.configuration.FolderConfiguration(self.tk, self.schema_location)
+            config_2 = folder.configuration.FolderConfiguration(self.tk, self.schema_location)
+            self.assertEqual(scan_mock.call_count, 1)
+
+            # folder objects are not shared between configurations
+            self.assertEqual(self._get_entity_types(config_1), self._get_entity_types(config_2))
+            self.assertNotEqual(config_1.get_folder_objs_for_entity_type("Shot"),
+                                config_2.get_folder_objs_for_entity_type("Shot"))
+
+            # a new folder is picked up
+            os.mkdir(os.path.join(self.schema_location, "project", "editorial"))
+            folder.configuration.FolderConfiguration(self.tk, self.schema_location)
+            self.assertEqual(scan_mock.call_count, 2)
+
+            # as well as changes to metadata files
+            asset_yml = os.path.join(self.schema_location, "project", "assets", "asset_type", "asset.yml")
+            with open(asset_yml, "a") as fh:
+                fh.write("\n# updated\n")
+            folder.configuration.FolderConfiguration(self.tk, self.schema_location)
+            self.assertEqual(scan_mock.call_count, 3)
+
+            folder.configuration.FolderConfiguration(self.tk, self.schema_location)
+            self.assertEqual(scan_mock.call_count, 3)
+
+    def test_config_snapshot(self):
+        """
+        Makes sure the schema is read from the config snapshot when available.
+        """
+        expected_entity_types = self._get_entity_types(
+            folder.configuration.FolderConfiguration(self.tk, self.schema_location)
+        )
+
+        pc_path = self.tk.pipeline_configuration.get_path()
+        ConfigSnapshot.build(self.tk.pipeline_configuration).write(pc_path)
+        self.addCleanup(safe_delete_file, os.path.join(pc_path, "config_snapshot.pickle"))
+        tk = tank.sgtk_from_path(pc_path)
+
+        folder.configuration.g_schema_cache.clear()
+        with patch.object(folder.configuration, "scan_schema") as scan_mock:
+            config = folder.configuration.FolderConfiguration(tk, self.schema_location)
+            self.assertEqual(scan_mock.call_count, 0)
+        self.assertEqual(self._get_entity_types(config), expected_entity_types)
+
+        # the snapshot is ignored once the schema changed
+        os.mkdir(os.path.join(self.schema_location, "project", "editorial"))
+        self.assertEqual(tk.pipeline_configuration.get_config_snapshot().get_schema(self.schema_location), None)
@@ -8,10 +8,12 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights 
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
+from __future__ import with_statement
+
 import os
 import unittest
 import shutil
-from mock import Mock
+from mock import Mock, patch
 import tank
 from tank_vendor import yaml
 from tank import TankError
@@ -550,7 +552,35 @@ class TestCreateFilesystemStructure(TankTestBase):
                                             engine=None)
         self.assertTrue(os.path.exists(expected))
 
-              
+    def test_create_shots_bulk(self):
+        """
+        Makes sure creating folders for several shots queries each entity level once.
+        """
+        shots = []
+        for shot_id in range(100, 110):
+            shots.append({"type": "Shot",
+                          "id": shot_id,
+                          "code": "shot_%d" % shot_id,
+                          "sg_sequence": self.seq,
+                          "project": self.project})
+        self.add_to_sg_mock_db(shots)
+
+        with patch.object(self.tk.shotgun, "find", wraps=self.tk.shotgun.find) as find_mock:
+            folder.process_filesystem_structure(self.tk,
+                                                "Shot",
+                                                [shot["id"] for shot in shots],
+                                                preview=False,
+                                                engine=None)
+
+        for shot in shots:
+            expected = os.path.join(self.project_root, "sequences", self.seq["code"], shot["code"])
+            self.assertTrue(os.path.exists(expected))
+
+        # one query per level of the hierarchy, regardless of the number of shots.
+        queried_types = [args[0] for (args, _) in find_mock.call_args_list]
+        for entity_type in ["Project", "Sequence", "Shot"]:
+            self.assertEqual(queried_types.count(entity_type), 1)
+
     def test_wrong_type_entity_ids(self):
         """Test passing in type other than list, int or tuple as value for entity_ids parameter.
         """
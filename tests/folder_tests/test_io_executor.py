@@ -0,0 +1,124 @@
+# Copyright (c) 2016 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from __future__ import with_statement
+
+import os
+import sys
+import stat
+import uuid
+
+from tank.folder import FolderIOExecutor
+from tank_test.tank_test_base import *
+
+
+class TestFolderIOExecutor(TankTestBase):
+    """
+    Tests the concurrent execution of folder creation items.
+    """
+
+    def setUp(self):
+        super(TestFolderIOExecutor, self).setUp()
+        self._root = os.path.join(self.tank_temp, "io_executor_%s" % uuid.uuid4().hex)
+        os.makedirs(self._root)
+
+        self._source_file = os.path.join(self.tank_temp, "io_executor_source.txt")
+        with open(self._source_file, "wt") as fh:
+            fh.write("source")
+
+    def _get_items(self):
+        """
+        Returns items for a small folder structure. Children are listed before
+        their parents and the parent of the shots is not an item.
+        """
+        items = []
+        for shot in range(20):
+            shot_path = os.path.join(self._root, "sequences", "seq", "shot_%02d" % shot)
+            items.append({"action": "folder", "path": os.path.join(shot_path, "work")})
+            items.append({"action": "entity_folder", "path": shot_path, "entity": {"type": "Shot", "id": shot}})
+            items.append({
+                "action": "copy",
+                "source_path": self._source_file,
+                "target_path": os.path.join(shot_path, "work", "readme.txt")
+            })
+        items.append({"action": "folder", "path": os.path.join(self._root, "sequences")})
+        items.append({"action": "folder", "path": os.path.join(self._root, "sequences")})
+        items.append({
+            "action": "create_file",
+            "path": os.path.join(self._root, "editorial", "notes.txt"),
+            "content": "notes"
+        })
+        items.append({"action": "remote_entity_folder", "path": os.path.join(self._root, "remote")})
+        if sys.platform != "win32":
+            items.append({
+                "action": "symlink",
+                "path": os.path.join(self._root, "latest"),
+                "target": "sequences"
+            })
+        return items
+
+    def _get_created_paths(self, items):
+        """
+        Returns the paths the items are expected to create, in order.
+        """
+        paths = []
+        seen = set()
+        for item in items:
+            path = item.get("target_path") or item["path"]
+            if item["action"] == "remote_entity_folder" or path in seen:
+                continue
+            seen.add(path)
+            paths.append(path)
+        return paths
+
+    def test_execute(self):
+        """
+        Makes sure all items are created with the right permissions.
+        """
+        items = self._get_items()
+        created = FolderIOExecutor(False, max_workers=4).execute(items)
+        self.assertEqual(created, self._get_created_paths(items))
+
+        for path in created:
+            self.assertTrue(os.path.lexists(path))
+        self.assertFalse(os.path.exists(os.path.join(self._root, "remote")))
+
+        with open(os.path.join(self._root, "editorial", "notes.txt"), "rt") as fh:
+            self.assertEqual(fh.read(), "notes")
+
+        if sys.platform != "win32":
+            shot_path = os.path.join(self._root, "sequences", "seq", "shot_00")
+            self.assertEqual(stat.S_IMODE(os.stat(shot_path).st_mode), 0777)
+            self.assertEqual(stat.S_IMODE(os.stat(os.path.join(self._root, "sequences", "seq")).st_mode), 0777)
+            self.assertEqual(stat.S_IMODE(os.stat(os.path.join(shot_path, "work", "readme.txt")).st_mode), 0666)
+
+        # nothing is created the second time around.
+        self.assertEqual(FolderIOExecutor(False, max_workers=4).execute(items), [])
+
+    def test_preview(self):
+        """
+        Makes sure nothing is created in preview mode.
+        """
+        items = self._get_items()
+        created = FolderIOExecutor(True, max_workers=4).execute(items)
+        self.assertEqual(created, self._get_created_paths(items))
+        self.assertEqual(os.listdir(self._root), [])
+
+    def test_error(self):
+        """
+        Makes sure errors raised by worker threads are reported.
+        """
+        items = self._get_items()
+        items.append({
+            "action": "copy",
+            "source_path": os.path.join(self.tank_temp, "missing_source.txt"),
+            "target_path": os.path.join(self._root, "missing.txt")
+        })
+        self.assertRaises(IOError, FolderIOExecutor(False, max_workers=4).execute, items)
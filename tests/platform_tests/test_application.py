@@ -212,6 +212,34 @@ class TestGetSetting(TestApplication):
             self.app.get_setting("test_default_syntax_with_new_style_engine_specific_hook_sparse")
         )
 
+    def test_resolved_settings_cache(self):
+        """
+        Makes sure resolved settings are cached until the settings change.
+        """
+        resolve_method = "_TankBundle__get_setting_value"
+        with mock.patch.object(
+            self.app, resolve_method, wraps=getattr(self.app, resolve_method)
+        ) as resolve_mock:
+            test_list = self.app.get_setting("test_simple_list")
+            self.assertEqual(resolve_mock.call_count, 1)
+            self.assertEqual(self.app.get_setting("test_simple_list"), test_list)
+            self.assertEqual(self.app.get_setting("test_str_sparse"), "a")
+            self.assertEqual(self.app.get_setting("test_str_sparse"), "a")
+            self.assertEqual(resolve_mock.call_count, 2)
+            self.assertEqual(self.app.settings_cache_stats, (2, 2))
+
+            # changes to returned values don't affect the cache
+            test_list.append("z")
+            self.assertEqual(len(self.app.get_setting("test_simple_list")), 4)
+
+            # values are resolved again after the settings change
+            settings = dict(self.app.settings)
+            settings["test_simple_list"] = ["x"]
+            self.app._set_settings(settings)
+            self.assertEqual(self.app.get_setting("test_simple_list"), ["x"])
+            self.assertEqual(resolve_mock.call_count, 3)
+            self.assertEqual(self.app.settings_cache_stats, (0, 1))
+
 class TestExecuteHookByName(TestApplication):
     
 
@@ -484,6 +512,25 @@ class TestHookCache(TestApplication):
             self.engine.destroy()
             self.assertEqual(clear_mock.call_count, 1)
 
+    def test_resolved_hooks(self):
+        """
+        Makes sure resolved hook paths and classes are reused, unless in hook development mode.
+        """
+        tank.hook.clear_hooks_cache()
+        app = self.engine.apps["test_app"]
+        self.assertTrue(app.execute_hook("test_hook_std", dummy_param=True))
+
+        with mock.patch("tank.hook.load_plugin") as load_plugin_mock:
+            with mock.patch("os.path.exists", wraps=os.path.exists) as exists_mock:
+                self.assertTrue(app.execute_hook("test_hook_std", dummy_param=True))
+                self.assertEqual(exists_mock.call_count, 0)
+            self.assertEqual(load_plugin_mock.call_count, 0)
+
+        with mock.patch.dict(os.environ, {"SGTK_HOOK_DEV_MODE": "1"}):
+            with mock.patch("tank.hook.load_plugin", wraps=tank.hook.load_plugin) as load_plugin_mock:
+                self.assertTrue(app.execute_hook("test_hook_std", dummy_param=True))
+                self.assertTrue(load_plugin_mock.call_count > 0)
+
 
 class TestProperties(TestApplication):
 
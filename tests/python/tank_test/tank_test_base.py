@@ -349,6 +349,12 @@ class TankTestBase(unittest.TestCase):
         # clear bundle in-memory cache
         sgtk.descriptor.io_descriptor.factory.g_cached_instances = {}
 
+        # clear shotgun field values cached by contexts
+        tank.context.g_entity_fields_cache.clear()
+
+        # clear folder creation schemas read by previous tests
+        tank.folder.configuration.g_schema_cache.clear()
+
         self.pipeline_configuration = sgtk.pipelineconfig_factory.from_path(self.pipeline_config_root)
         self.tk = tank.Tank(self.pipeline_configuration)
 
@@ -0,0 +1,97 @@
+# Copyright (c) 2016 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from __future__ import with_statement
+
+import os
+import uuid
+import __builtin__
+
+from mock import patch
+
+from tank.util import loader
+from tank.util import LocalFileStorageManager
+from tank import constants, Hook
+from tank_test.tank_test_base import *
+
+
+class TestLoadPlugin(TankTestBase):
+    """
+    Tests the bytecode cache of the plugin loader.
+    """
+
+    def setUp(self):
+        super(TestLoadPlugin, self).setUp()
+        # the bytecode cache is keyed on the path, use a new plugin for every test.
+        self._plugin_file = os.path.join(self.tank_temp, "loader_plugin_%s.py" % uuid.uuid4().hex)
+        self._cache_folder = os.path.join(
+            LocalFileStorageManager.get_global_root(LocalFileStorageManager.CACHE),
+            constants.BYTECODE_CACHE_FOLDER
+        )
+
+    def _write_plugin(self, value):
+        with open(self._plugin_file, "wt") as fh:
+            fh.write(
+                "from tank import Hook\n"
+                "class Plugin(Hook):\n"
+                "    value = %r\n" % value
+            )
+
+    def _get_cached_files(self):
+        if not os.path.exists(self._cache_folder):
+            return set()
+        return set(os.listdir(self._cache_folder))
+
+    def test_bytecode_cache(self):
+        """
+        Makes sure plugins are compiled once and compiled again when they change.
+        """
+        cached_files = self._get_cached_files()
+        self._write_plugin(1)
+        plugin = loader.load_plugin(self._plugin_file, Hook)
+        self.assertEqual(plugin.value, 1)
+        self.assertEqual(len(self._get_cached_files() - cached_files), 1)
+
+        # loading the same file again must not compile it.
+        with patch.object(__builtin__, "compile", side_effect=Exception("compiled")):
+            plugin = loader.load_plugin(self._plugin_file, Hook)
+        self.assertEqual(plugin.value, 1)
+
+        # a change to the file must be picked up, and replace the cached code.
+        self._write_plugin(2)
+        plugin = loader.load_plugin(self._plugin_file, Hook)
+        self.assertEqual(plugin.value, 2)
+        self.assertEqual(len(self._get_cached_files() - cached_files), 1)
+
+        with patch.object(__builtin__, "compile", side_effect=Exception("compiled")):
+            plugin = loader.load_plugin(self._plugin_file, Hook)
+        self.assertEqual(plugin.value, 2)
+
+    def test_corrupt_cache(self):
+        """
+        Makes sure corrupt cache files are ignored.
+        """
+        cached_files = self._get_cached_files()
+        self._write_plugin("corrupt")
+        loader.load_plugin(self._plugin_file, Hook)
+        (cache_file,) = self._get_cached_files() - cached_files
+        with open(os.path.join(self._cache_folder, cache_file), "wb") as fh:
+            fh.write("garbage")
+
+        plugin = loader.load_plugin(self._plugin_file, Hook)
+        self.assertEqual(plugin.value, "corrupt")
+
+    def test_load_error(self):
+        """
+        Makes sure errors raised by the plugin are reported.
+        """
+        with open(self._plugin_file, "wt") as fh:
+            fh.write("raise Exception('broken plugin')\n")
+        self.assertRaises(loader.TankLoadPluginError, loader.load_plugin, self._plugin_file, Hook)
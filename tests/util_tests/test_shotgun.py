@@ -523,6 +523,73 @@ class TestShotgunDownloadUrl(TankTestBase):
         self.assertEqual(self.download_destination, full_path)
 
 
+class TestDownloadAndUnpackAttachment(TankTestBase):
+    """
+    Tests the download and unpacking of zip attachments.
+    """
+
+    def setUp(self):
+        super(TestDownloadAndUnpackAttachment, self).setUp()
+        self.zip_file = os.path.join(self.fixtures_root, "misc", "zip", "tank_core.zip")
+        self.target = os.path.join(self.tank_temp, "download_target_%s" % self.id(), "v1.0.0")
+
+    def _download_attachment(self, attachment_id, file_path=None):
+        """
+        Mocks Shotgun.download_attachment, which the code must use with a file path.
+        """
+        self.assertIsNotNone(file_path)
+        with open(self.zip_file, "rb") as src:
+            with open(file_path, "wb") as dst:
+                dst.write(src.read())
+        return file_path
+
+    def test_unpack(self):
+        """
+        Ensures the attachment is streamed to disk and moved in place.
+        """
+        with patch.object(self.mockgun, "download_attachment", side_effect=self._download_attachment, create=True):
+            tank.util.shotgun.download_and_unpack_attachment(self.mockgun, 123, self.target)
+
+        self.assertTrue(os.path.exists(os.path.join(self.target, "info.yml")))
+        self.assertTrue(os.path.exists(os.path.join(self.target, "hooks", "copy_file.py")))
+        # no staging folder is left behind
+        self.assertEqual(os.listdir(os.path.dirname(self.target)), ["v1.0.0"])
+
+    def test_unpack_into_existing_folder(self):
+        """
+        Ensures an existing target, possibly in use by another process, is left untouched.
+        """
+        os.makedirs(self.target)
+        existing_file = os.path.join(self.target, "existing.txt")
+        open(existing_file, "w").close()
+
+        with patch.object(self.mockgun, "download_attachment", side_effect=self._download_attachment, create=True):
+            tank.util.shotgun.download_and_unpack_attachment(self.mockgun, 123, self.target)
+
+        self.assertEqual(os.listdir(self.target), ["existing.txt"])
+        self.assertEqual(os.listdir(os.path.dirname(self.target)), ["v1.0.0"])
+
+    def test_failed_unpack(self):
+        """
+        Ensures nothing is left in the target location when the download fails.
+        """
+        def download_attachment(attachment_id, file_path=None):
+            with open(file_path, "wb") as fh:
+                fh.write("not a zip file")
+
+        with patch.object(self.mockgun, "download_attachment", side_effect=download_attachment, create=True):
+            with patch("time.sleep"):
+                self.assertRaises(
+                    tank.util.ShotgunAttachmentDownloadError,
+                    tank.util.shotgun.download_and_unpack_attachment,
+                    self.mockgun,
+                    123,
+                    self.target,
+                    retries=2
+                )
+        self.assertEqual(os.listdir(os.path.dirname(self.target)), [])
+
+
 class TestGetSgConfigData(TankTestBase):
 
     def _prepare_common_mocks(self, get_api_core_config_location_mock):
@@ -0,0 +1,79 @@
+# Copyright (c) 2016 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import time
+import threading
+
+from tank_test.tank_test_base import *
+from tank.util import thread_pool
+
+
+class TestImapUnordered(TankTestBase):
+    """
+    Tests the thread pool helper.
+    """
+
+    def test_results(self):
+        """
+        Ensures all items are processed and errors are returned.
+        """
+        def func(item):
+            if item == 3:
+                raise ValueError("boom")
+            return item * 2
+
+        for max_workers in [1, 4]:
+            results = sorted(thread_pool.imap_unordered(func, range(10), max_workers))
+            self.assertEqual([item for (item, _, _) in results], range(10))
+            for (item, result, exc_info) in results:
+                if item == 3:
+                    self.assertEqual(result, None)
+                    self.assertEqual(exc_info[0], ValueError)
+                else:
+                    self.assertEqual(result, item * 2)
+                    self.assertEqual(exc_info, None)
+
+    def test_threads(self):
+        """
+        Ensures items are processed by the calling thread only with a single worker.
+        """
+        threads = set()
+
+        def func(item):
+            threads.add(threading.current_thread())
+            time.sleep(0.01)
+
+        list(thread_pool.imap_unordered(func, range(4), 1))
+        self.assertEqual(threads, set([threading.current_thread()]))
+
+        threads.clear()
+        list(thread_pool.imap_unordered(func, range(8), 4))
+        self.assertFalse(threading.current_thread() in threads)
+
+    def test_stopped(self):
+        """
+        Ensures workers stop picking up items once the results are closed.
+        """
+        processed = []
+        lock = threading.Lock()
+
+        def func(item):
+            time.sleep(0.01)
+            lock.acquire()
+            try:
+                processed.append(item)
+            finally:
+                lock.release()
+
+        results = thread_pool.imap_unordered(func, range(100), 2)
+        results.next()
+        results.close()
+        time.sleep(0.1)
+        self.assertTrue(len(processed) < 100)
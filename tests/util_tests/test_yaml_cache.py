@@ -121,3 +121,56 @@ class TestYamlCache(TankTestBase):
 
 
 
+
+    def test_copy_on_write(self):
+        """
+        Test that copy-on-write views share the cached data and that
+        changes made to them don't affect the cache.
+        """
+        yaml_path = os.path.join(self.tank_temp, "test_copy_on_write.yml")
+
+        test_data = {
+            "engines": {"tk-shell": {"apps": {"tk-multi-a": {"hooks": ["one", "two"]}}}},
+            "items": [{"name": "first"}, {"name": "second"}],
+            "value": 1
+        }
+
+        yaml_file = open(yaml_path, "w")
+        try:
+            yaml_file.write(yaml.dump(test_data))
+        finally:
+            yaml_file.close()
+
+        yaml_cache = YamlCache()
+        view = yaml_cache.get(yaml_path, copy_on_write=True)
+        self.assertEquals(view, test_data)
+        self.assertTrue(isinstance(view, dict))
+        self.assertTrue(isinstance(view["items"], list))
+
+        # nested containers are only wrapped, not copied, until changed.
+        cached_data = yaml_cache._cache.values()[0].data
+        self.assertTrue(dict.__getitem__(view, "engines") is cached_data["engines"])
+
+        # change the view at various levels
+        view["engines"]["tk-shell"]["apps"]["tk-multi-a"]["hooks"].append("three")
+        view["items"][0]["name"] = "changed"
+        for item in view["items"]:
+            item["visited"] = True
+        view.pop("value")
+
+        self.assertEquals(view["engines"]["tk-shell"]["apps"]["tk-multi-a"]["hooks"], ["one", "two", "three"])
+        self.assertEquals(
+            view["items"],
+            [{"name": "changed", "visited": True}, {"name": "second", "visited": True}]
+        )
+        self.assertFalse("value" in view)
+
+        # the cache and other views are unaffected
+        self.assertEquals(cached_data, test_data)
+        self.assertEquals(yaml_cache.get(yaml_path, copy_on_write=True), test_data)
+
+        # deep copies are made of plain data
+        data_copy = copy.deepcopy(view)
+        self.assertTrue(type(data_copy) is dict)
+        self.assertTrue(type(data_copy["items"][0]) is dict)
+        self.assertEquals(data_copy, view)